@@ -1,6 +1,31 @@
+import os
+import time
+from datetime import date, timedelta
+
 import streamlit as st
 import pandas as pd
 
+from anomalias import LIMIAR_PADRAO, anomalias, escores_anomalia, medidas_operacionais, resumo_anomalias
+from cache_arquivos import CacheArquivos, hash_conteudo
+from carga_segundo_plano import CargaCancelada, ExecutorCargas
+from carregamento import ativar_copy_on_write, carregar_rima, carregar_voos
+import historico
+from exibicao import mesmo_minuto, mostrar_tabela, mostrar_tabela_associados
+from conciliacao import COLUNAS_RIMA_CONCILIACAO, conciliar, divergencias_conciliacao
+from indice_movimentos import COLUNAS_INSTANTE, historico_movimentos, indexar_movimentos
+from giros import COLUNAS_HORARIO_GIRO, distribuicao_giros, giros_completos, montar_giros
+from perfil import Perfilador, SessaoPerfil
+from relatorio_auditoria import Secao, gerar_pdf, gerar_xlsx, secoes_scena
+from ocupacao_stands import conflitos_stands, intervalos_stands, pico_ocupacao, utilizacao_stands
+from horario_pico import (
+    COLUNAS_PICO, estatisticas_hora_projeto, fatiar_cubo, montar_cubo, montar_eventos, picos_janela_movel
+)
+from vigiar_pasta import ler_resultados, ler_resumos
+from validacoes import (
+    MOVIMENTO_ANALISE, divergencias_rima, linhas_violadas, movimentos_scena, revalidar, separar_analises
+)
+
+ativar_copy_on_write()
 st.set_page_config(page_title="Análise de Voos SBJU", layout="wide")
 st.markdown(
     """
@@ -17,98 +42,266 @@ st.markdown(
 )
 
 # ========================
-# 📥 Função para carregar dados
+# 🗃️ Cache dos arquivos carregados (sobrevive aos reruns do Streamlit)
 # ========================
-def carregar_voos(arquivo):
-    df = pd.read_excel(arquivo, sheet_name="data")
+@st.cache_resource
+def obter_cache_arquivos():
+    return CacheArquivos(max_bytes=512 * 1024 * 1024, max_entradas=16)
 
-    # Renomear coluna de data, se necessário
-    if "Fecha" in df.columns:
-        df.rename(columns={"Fecha": "Data"}, inplace=True)
+cache_arquivos = obter_cache_arquivos()
 
-    df = df[df["Id.Vuelo"].notna()].copy()
+# ========================
+# ⏳ Carga em segundo plano: barra de progresso e cancelamento
+# ========================
+@st.cache_resource
+def obter_executor_cargas():
+    return ExecutorCargas(max_workers=2)
+
+executor_cargas = obter_executor_cargas()
+
+# 📦 Fontes do relatório de auditoria: (chave, função) – só chamadas quando o relatório é pedido
+fontes_relatorio = []
+
+@st.fragment(run_every=0.5)
+def mostrar_progresso_carga(nome, nome_arquivo, tarefa):
+    # Só este trecho é reexecutado enquanto a carga anda; ao terminar (ou ao
+    # atender o cancelamento), a página inteira roda de novo e usa o resultado
+    if tarefa.concluida:
+        st.rerun()
+    situacao = "cancelando..." if tarefa.cancelada else tarefa.mensagem
+    st.progress(tarefa.fracao, text=f"⏳ {nome} – {nome_arquivo}: {situacao} ({tarefa.fracao:.0%})")
+    if st.button("✖️ Cancelar carga", key=f"cancelar_{nome}", disabled=tarefa.cancelada):
+        tarefa.cancelar()
+
+def carregar_em_segundo_plano(nome, funcao, arquivo):
+    # Devolve o resultado de funcao(arquivo), ou None enquanto a carga não termina.
+    # A tarefa fica na sessão pela chave do conteúdo: reenviar o mesmo arquivo não
+    # dispara uma segunda carga.
+    chave = cache_arquivos.chave_arquivo(funcao, arquivo)
+    if cache_arquivos.em_cache(chave):
+        with perfil.etapa(f"{nome}/{funcao.__name__}"):
+            return cache_arquivos.carregar(funcao, arquivo)
+
+    tarefas = st.session_state.setdefault("cargas", {})
+    tarefa = tarefas.get(chave)
+    if tarefa is None:
+        def carregar(progresso):
+            arquivo.seek(0)
+            return cache_arquivos.obter(chave, lambda: funcao(arquivo, progresso))
+        tarefa = tarefas[chave] = executor_cargas.iniciar(nome, carregar)
+
+    if not tarefa.concluida:
+        mostrar_progresso_carga(nome, arquivo.name, tarefa)
+        return None
+
+    erro = tarefa.erro()
+    if isinstance(erro, CargaCancelada):
+        st.warning(f"✖️ Carga do {nome} cancelada ({arquivo.name}).")
+        if st.button("🔄 Carregar novamente", key=f"recarregar_{nome}"):
+            del tarefas[chave]
+            st.rerun()
+        return None
+
+    # Concluída: o resultado já está no cache de arquivos para os próximos reruns
+    del tarefas[chave]
+    perfil.registrar(f"{nome}/{funcao.__name__} (segundo plano)", tarefa.segundos, erro and f"{type(erro).__name__}: {erro}")
+    if erro is not None:
+        raise erro
+    return tarefa.resultado()
 
-    # Converter colunas que existirem
-    colunas_data = ["Data", "ETime", "AIBT", "F.ETime", "ALDT", "AOBT", "ATOT"]
-    for coluna in colunas_data:
-        if coluna in df.columns:
-            df[coluna] = pd.to_datetime(df[coluna], dayfirst=True, errors="coerce")
+# ========================
+# ⏱️ Modo de perfil (opcional): barra lateral ou SBJU_PERFIL=1
+# ========================
+perfil = Perfilador(
+    st.sidebar.toggle("⏱️ Modo de perfil", value=os.environ.get("SBJU_PERFIL") == "1"),
+    os.environ.get("SBJU_PERFIL_LOG", "perfil_sbju.jsonl"),
+    st.session_state.setdefault("sessao_perfil", SessaoPerfil())
+)
 
-    df_completo = df.copy()
+# ========================
+# 🗄️ Histórico local: gravar uploads e analisar períodos já gravados
+# ========================
+st.sidebar.markdown("### 🗄️ Histórico local")
+gravar_historico = st.sidebar.toggle("Gravar uploads no histórico", key="gravar_historico")
+fonte_historico = st.sidebar.toggle("Analisar o histórico (em vez do upload)", key="fonte_historico")
+
+conjunto_scena, conjunto_rima, periodo = None, None, (None, None)
+if fonte_historico:
+    conjuntos = historico.conjuntos_disponiveis()
+    opcoes_scena = [c for c in conjuntos if historico.tipo_conjunto(c) == "SCENA"]
+    if opcoes_scena:
+        conjunto_scena = st.sidebar.selectbox("Conjunto SCENA", opcoes_scena, key="historico_conjunto_scena")
+    if "RIMA" in conjuntos:
+        conjunto_rima = "RIMA"
+    selecao = st.sidebar.date_input(
+        "Período", value=(date.today() - timedelta(days=90), date.today()), format="DD/MM/YYYY", key="historico_periodo"
+    )
+    # Enquanto só a data inicial foi escolhida, o período vai até ela mesma
+    periodo = (selecao[0], selecao[-1]) if selecao else (None, None)
 
-    # Filtrar datas a partir de 01/02/2024, se a coluna existir
-    if "Data" in df.columns:
-        df = df[df["Data"].notna()]
-        df = df[df["Data"] >= pd.to_datetime("2024-02-01")]
+# ========================
+# 👀 Resultados pré-calculados pelo vigia de pasta (só leitura)
+# ========================
+st.sidebar.markdown("### 👀 Vigia de pasta")
+ver_resultados_vigia = st.sidebar.toggle("Ver resultados pré-calculados", key="ver_resultados_vigia")
+diretorio_vigia = os.environ.get("SBJU_RESULTADOS", "resultados_sbju")
+if ver_resultados_vigia:
+    diretorio_vigia = st.sidebar.text_input("Diretório de resultados", value=diretorio_vigia, key="diretorio_vigia")
+
+def mostrar_resultados_vigia(diretorio):
+    st.markdown("## 👀 Resultados do Vigia de Pasta")
+    resumos = ler_resumos(diretorio)
+    if resumos.empty:
+        st.info(f"Nenhum arquivo processado em “{diretorio}”. Rode `python vigiar_pasta.py <pasta> -o {diretorio}`.")
+        return
+    st.dataframe(resumos.drop(columns=["Pasta"]), use_container_width=True, hide_index=True)
+
+    arquivo_vigia = st.selectbox("Arquivo", resumos["Arquivo"], key="vigia_arquivo")
+    resumo = resumos[resumos["Arquivo"] == arquivo_vigia].iloc[0]
+    # A chave muda quando o vigia regrava o arquivo (novo "Processado em")
+    chave = ("resultados_vigia", diretorio, resumo["Pasta"], resumo.get("Processado em"))
+    with perfil.etapa("vigia/ler resultados"):
+        tabelas = cache_arquivos.obter(chave, lambda: ler_resultados(diretorio, resumo["Pasta"]))
+
+    violacoes = tabelas.get("violacoes")
+    st.subheader(f"❌ Violações ({0 if violacoes is None else len(violacoes)})")
+    if violacoes is None or violacoes.empty:
+        st.success("Nenhuma violação registrada para este arquivo.")
+    else:
+        mostrar_tabela(violacoes, "vigia_violacoes")
+    for nome, tabela in tabelas.items():
+        if nome == "violacoes":
+            continue
+        with st.expander(nome.replace("_", " ").capitalize()):
+            st.dataframe(tabela, use_container_width=True, hide_index=True)
+
+def gravar_no_historico(nome, arquivo, df, tipo):
+    # Cada conteúdo é gravado uma única vez por sessão (os reruns não regravam)
+    gravados = st.session_state.setdefault("historico_gravados", {})
+    chave = (tipo, hash_conteudo(arquivo))
+    if chave not in gravados:
+        with perfil.etapa(f"{nome}/gravar histórico"):
+            gravados[chave] = historico.anexar(df, tipo)
+    resumo = gravados[chave]
+    st.sidebar.caption(
+        f"🗄️ {nome} no histórico ({resumo['conjunto']}): {resumo['novas']} novas, "
+        f"{resumo['atualizadas']} atualizadas – meses {', '.join(resumo['meses'])}"
+    )
+
+def consultar_historico(nome, conjunto):
+    chave = ("consultar_historico",) + historico.assinatura(conjunto, *periodo)
+    with perfil.etapa(f"{nome}/consultar histórico"):
+        df = cache_arquivos.obter(chave, lambda: historico.consultar(conjunto, *periodo))
+    return None if df.empty else df, chave
+
+# ========================
+# 🔁 Revalidação incremental: diferença em relação ao upload anterior
+# ========================
+def mostrar_mudancas(chave, resumo, mudancas):
+    with st.expander(
+        f"🔁 Mudanças desde o upload anterior – {resumo['novas']} violações novas, {resumo['corrigidas']} corrigidas",
+        expanded=not mudancas.empty
+    ):
+        st.caption(
+            f"{resumo['inseridas']} linhas inseridas, {resumo['alteradas']} alteradas e {resumo['removidas']} removidas; "
+            f"{resumo['inalteradas']} linhas inalteradas reaproveitaram o resultado anterior sem nova validação."
+        )
+        if mudancas.empty:
+            st.success("Nenhuma violação nova ou corrigida.")
+        else:
+            mostrar_tabela(mudancas, f"{chave}_mudancas", formatos={"Data": "%d/%m/%Y"})
+
+def revalidar_analise(analise, chave, df, regras, conteudo):
+    # Um snapshot por análise; reruns com o mesmo conteúdo reaproveitam tudo
+    estados = st.session_state.setdefault("revalidacao", {})
+    estado = estados.get(analise)
+    if estado is None or estado["conteudo"] != conteudo:
+        violacoes, snapshot, mudancas, resumo = revalidar(df, regras, estado["snapshot"] if estado else None)
+        estado = estados[analise] = {
+            "conteudo": conteudo, "snapshot": snapshot, "violacoes": violacoes, "mudancas": mudancas, "resumo": resumo
+        }
+    if estado["resumo"] is not None:
+        mostrar_mudancas(chave, estado["resumo"], estado["mudancas"])
+    return estado["violacoes"]
+
+def mostrar_relatorio_carga(nome, df):
+    relatorio = df.attrs.get("relatorio_carga")
+    if relatorio:
+        # Memória só das colunas lidas: sem tipagem (texto/objeto) → tipada
+        memoria = f"{relatorio['memoria_depois'] / 1024 / 1024:.1f} MB"
+        if relatorio["memoria_sem_tipagem"] != relatorio["memoria_depois"]:
+            memoria = f"{relatorio['memoria_sem_tipagem'] / 1024 / 1024:.1f} MB sem tipagem → {memoria} tipadas"
+        st.sidebar.caption(
+            f"📐 {nome}: {relatorio['linhas']} linhas × {relatorio['colunas']} colunas lidas – memória {memoria}"
+            + (f" – leitor: {relatorio['motor']}" if relatorio.get("motor") else "")
+        )
+        if relatorio["datas_invalidas"]:
+            detalhes = ", ".join(f"{coluna}: {qtd}" for coluna, qtd in relatorio["datas_invalidas"].items())
+            st.warning(f"⚠️ {nome}: valores de data/hora não reconhecidos foram ignorados ({detalhes}).")
 
-    return df, df_completo
+# ========================
+# 🛩️ Painéis de chegada e saída (mesmas funções, textos por movimento)
+# ========================
+TEXTOS_MOVIMENTO = {
+    "chegada": {"horario": "AIBT", "estacao": "IBK"},
+    "saida": {"horario": "AOBT", "estacao": "AIR"},
+}
 
 # ========================
-# 🛩️ Painel 1: ETime ≠ AIBT
+# 🛩️ Painel 1: ETime ≠ AIBT (chegada) / AOBT (saída)
 # ========================
-def mostrar_painel1(df):
-    resultado = df[(df["Sit."] == "OPE") & (df["ETime"] != df["AIBT"])].copy()
-    resultado["Data"] = resultado["Data"].dt.strftime("%d/%m/%Y")
-    resultado["ETime"] = resultado["ETime"].dt.strftime("%H:%M")
-    resultado["AIBT"] = resultado["AIBT"].dt.strftime("%H:%M")
+def mostrar_painel1(df, violacoes, movimento):
+    horario = TEXTOS_MOVIMENTO[movimento]["horario"]
+    resultado = linhas_violadas(df, violacoes, f"etime_diferente_{horario.lower()}")[["Data", "Id.Vuelo", "ETime", horario, "Sit."]]
 
-    st.markdown("## 🟥 Painel 1 – Divergência entre ETime e AIBT - A partir de 01/02/2024")
+    st.markdown(f"## 🟥 Painel 1 – Divergência entre ETime e {horario} - A partir de 01/02/2024")
     if resultado.empty:
-        st.success("Nenhuma divergência encontrada entre ETime e AIBT.")
+        st.success(f"Nenhuma divergência encontrada entre ETime e {horario}.")
     else:
-        st.dataframe(resultado[["Data", "Id.Vuelo", "ETime", "AIBT", "Sit."]], hide_index=True, use_container_width=True)
-        
+        mostrar_tabela(
+            resultado, f"{movimento}_etime_{horario.lower()}",
+            formatos={"Data": "%d/%m/%Y", "ETime": "%H:%M", horario: "%H:%M"}
+        )
+
 # ========================
 # 🛩️ Painel 2: Inconsistências Operacionais
 # ========================
-def mostrar_painel2(df):
+def mostrar_painel2(df, violacoes, movimento):
+    estacao = TEXTOS_MOVIMENTO[movimento]["estacao"]
     st.markdown("## 🟥 Painel 2 – Inconsistências Operacionais")
 
-    # 1. Sit. = OPE e Est. ≠ IBK
-    est_diferente = df[(df["Sit."] == "OPE") & (df["Est."].notna()) & (df["Est."] != "IBK")].copy()
-    st.subheader(f"❌ Voos Operados (OPE) mas com Estação divergente de IBK ({len(est_diferente)})")
+    # 1. Sit. = OPE e Est. ≠ IBK (chegada) / AIR (saída)
+    est_diferente = linhas_violadas(df, violacoes, "est_divergente")[["Data", "Id.Vuelo", "Sit.", "Est."]]
+    st.subheader(f"❌ Voos Operados (OPE) mas com Estação divergente de {estacao} ({len(est_diferente)})")
     if est_diferente.empty:
-        st.success("Nenhum voo com Est. diferente de IBK.")
+        st.success(f"Nenhum voo com Est. diferente de {estacao}.")
     else:
-        est_diferente["Data"] = est_diferente["Data"].dt.strftime("%d/%m/%Y")
-        st.dataframe(est_diferente[["Data", "Id.Vuelo", "Sit.", "Est."]].reset_index(drop=True), hide_index=True, use_container_width=True)
-        
+        mostrar_tabela(est_diferente, f"{movimento}_est", formatos={"Data": "%d/%m/%Y"})
+
     # 2. Sit. = OPE e Stand = HOLD
-    stand_hold = df[(df["Sit."] == "OPE") & (df["Stand"].notna()) & (df["Stand"].str.upper() == "HOLD")].copy()
+    stand_hold = linhas_violadas(df, violacoes, "stand_hold")[["Data", "Id.Vuelo", "Sit.", "Stand"]]
     st.subheader(f"❌ Stand em HOLD ({len(stand_hold)})")
     if stand_hold.empty:
         st.success("Nenhum voo com Stand igual a HOLD.")
     else:
-        stand_hold["Data"] = stand_hold["Data"].dt.strftime("%d/%m/%Y")
-        st.dataframe(stand_hold[["Data", "Id.Vuelo", "Sit.", "Stand"]].reset_index(drop=True), hide_index=True, use_container_width=True)
-        
-    # 2.5 Verificar SV proibida em voos comerciais (não ZZZ-)
-    sv_proibida_comercial = ["D", "E", "K", "N", "T", "W"]
-
-    voos_comerciais = df[
-        (df["Sit."] == "OPE") &
-        (df["Id.Vuelo"].notna()) &
-        (~df["Id.Vuelo"].str.startswith("ZZZ-")) &
-        (df["Sv."].isin(sv_proibida_comercial))
-    ].copy()
+        mostrar_tabela(stand_hold, f"{movimento}_hold", formatos={"Data": "%d/%m/%Y"})
 
+    # 3. SV proibida em voos comerciais (não ZZZ-)
+    voos_comerciais = linhas_violadas(df, violacoes, "sv_proibida_comercial")[["Data", "Id.Vuelo", "Sv."]]
     st.subheader(f"❌ Categoria proibida em voos comerciais ({len(voos_comerciais)})")
-
     if voos_comerciais.empty:
         st.success("Nenhum voo comercial com categoria proibida.")
     else:
-        voos_comerciais["Data"] = voos_comerciais["Data"].dt.strftime("%d/%m/%Y")
-        st.dataframe(
-            voos_comerciais[["Data", "Id.Vuelo", "Sv."]].reset_index(drop=True),
-            hide_index=True,
-            use_container_width=True
-        )
+        mostrar_tabela(voos_comerciais, f"{movimento}_sv_comercial", formatos={"Data": "%d/%m/%Y"})
+
+    # 4. Sequência de horários: AIBT ≤ ALDT (chegada) / ATOT ≤ AOBT (saída)
+    if movimento == "chegada":
+        mostrar_calco_pouso(df, violacoes)
+    else:
+        mostrar_decolagem_saida_patio(df, violacoes)
 
-    # 3. AIBT ≤ ALDT
-    tempo_incoerente = df[
-        df["F.ETime"].notna() & df["AIBT"].notna() & df["ALDT"].notna() &
-        (df["AIBT"] <= df["ALDT"])
-    ].copy()
+def mostrar_calco_pouso(df, violacoes):
+    tempo_incoerente = linhas_violadas(df, violacoes, "calco_menor_igual_pouso")[["Data", "Id.Vuelo", "AIBT", "ALDT"]]
 
     st.subheader(f"❌ Calço ≤ Pouso ({len(tempo_incoerente)})")
 
@@ -122,106 +315,224 @@ def mostrar_painel2(df):
     if tempo_incoerente.empty:
         st.success("Nenhum voo com Calço inferior ou Igual ao Pouso.")
     else:
-        # Formatar
-        tempo_incoerente["Data"] = tempo_incoerente["Data"].dt.strftime("%d/%m/%Y")
-        tempo_incoerente["AIBT"] = tempo_incoerente["AIBT"].dt.strftime("%H:%M")
-        tempo_incoerente["ALDT"] = tempo_incoerente["ALDT"].dt.strftime("%H:%M")
+        # Renomear colunas para exibição e destacar linhas com Calço == Pouso (mesmo HH:MM)
+        df_exibir = tempo_incoerente.rename(columns={"AIBT": "Calço", "ALDT": "Pouso"})
+        mostrar_tabela(
+            df_exibir,
+            "chegada_calco_pouso",
+            destaque=mesmo_minuto(df_exibir["Calço"], df_exibir["Pouso"]),
+            formatos={"Data": "%d/%m/%Y", "Calço": "%H:%M", "Pouso": "%H:%M"}
+        )
 
-    # Renomear colunas para exibição
-    df_exibir = tempo_incoerente.rename(columns={"AIBT": "Calço", "ALDT": "Pouso"})
+def mostrar_decolagem_saida_patio(df, violacoes):
+    atot_aobt = linhas_violadas(df, violacoes, "decolagem_menor_igual_saida_patio")[["Data", "Id.Vuelo", "ATOT", "AOBT"]]
 
-    # Estilizar linha se Calço == Pouso
-    def destacar_linha_igualdade(row):
-        return ['background-color: #ffcccc' if row['Calço'] == row['Pouso'] else '' for _ in row]
+    st.subheader(f"❌ Decolagem ≤ Saída Pátio ({len(atot_aobt)})")
 
-    styled_df = df_exibir[["Data", "Id.Vuelo", "Calço", "Pouso"]].style.apply(destacar_linha_igualdade, axis=1)
+    if (atot_aobt["ATOT"] == atot_aobt["AOBT"]).any():
+        st.markdown(
+            '<p style="color:red; font-weight:bold;">⚠️ Atenção: Saída de pátio = Decolagem - Ajuste Necessário.</p>',
+            unsafe_allow_html=True
+        )
 
-    st.dataframe(styled_df, hide_index=True, use_container_width=True)
+    if atot_aobt.empty:
+        st.success("Nenhum voo com Decolagem inferior ou igual a Saída de Pátio.")
+    else:
+        df_exibir = atot_aobt.rename(columns={
+            "ATOT": "Decolagem",
+            "AOBT": "Descalço (Saída de Pátio)"
+        })[["Data", "Id.Vuelo", "Descalço (Saída de Pátio)", "Decolagem"]]
+
+        # Destacar linhas com Decolagem == Saída de Pátio (mesmo HH:MM)
+        mostrar_tabela(
+            df_exibir,
+            "saida_decolagem_patio",
+            destaque=mesmo_minuto(df_exibir["Decolagem"], df_exibir["Descalço (Saída de Pátio)"]),
+            formatos={"Data": "%d/%m/%Y", "Descalço (Saída de Pátio)": "%H:%M", "Decolagem": "%H:%M"}
+        )
 
 # ========================
 # 🛩️ Painel 3: Análise Voos AVG
 # ========================
-def mostrar_painel3(df):
-    st.markdown("## 🟥 Painel 3 – Análise Voos AVG")
-
-    df_zzz = df[(df["Sit."] == "OPE") & (df["Id.Vuelo"].str.startswith("ZZZ-"))].copy()
+def mostrar_painel3(df, violacoes, movimento):
+    st.markdown("## 🟥 Painel 3 – Análise Voos AVG (ZZZ-)")
 
-    if df_zzz.empty:
-        st.success("Nenhum voo ZZZ- com Situação OPE encontrado.")
+    if not violacoes["voos_avg_ope"].any():
+        st.info("Nenhum voo AVG (ZZZ-) com Situação OPE encontrado.")
         return
 
     # 1. Verificar se matrícula no Id.Vuelo bate com Registro
-    df_zzz["Matrícula"] = df_zzz["Id.Vuelo"].str.replace("ZZZ-", "", regex=False)
-    matricula_diferente = df_zzz[df_zzz["Matrícula"] != df_zzz["Registro"]][["Id.Vuelo", "Registro", "Sv."]]
+    matricula_diferente = linhas_violadas(df, violacoes, "matricula_divergente")[["Data", "Id.Vuelo", "Registro", "Sv."]]
     st.subheader(f"❌ Matrícula divergente do Registro ({len(matricula_diferente)})")
     if matricula_diferente.empty:
         st.success("Todos os voos ZZZ- têm matrícula compatível com o Registro.")
     else:
-        matricula_diferente["Data"] = df_zzz["Data"].dt.strftime("%d/%m/%Y")
-        st.dataframe(matricula_diferente[["Data", "Id.Vuelo", "Registro", "Sv."]].reset_index(drop=True), hide_index=True, use_container_width=True)
+        mostrar_tabela(matricula_diferente, f"{movimento}_matricula", formatos={"Data": "%d/%m/%Y"})
 
-    # 2. Verificar inconsistências em voos AVG (ZZZ-)
+    # 2. Categorias proibidas em voos AVG (ZZZ-): aviação geral (ZZZ-P) e militar (ZZZ-[não P])
+    zzz_inconsistentes = linhas_violadas(
+        df, violacoes, "zzz_p_sv_proibida", "zzz_militar_sv_proibida"
+    )[["Data", "Id.Vuelo", "Sv."]]
 
-    # Categorias base proibidas para todos
-    sv_proibidas_geral = ["A", "B", "C", "E", "F", "G", "H", "J", "L", "M", "N", "O", "P", "Q", "R", "S", "U", "V", "X", "Y", "Z"]
+    st.subheader(f"❌ Categorias proibidas em voos AVG (ZZZ-) ({len(zzz_inconsistentes)})")
+    if zzz_inconsistentes.empty:
+        st.success("Nenhum voo AVG (ZZZ-) com categoria proibida.")
+    else:
+        mostrar_tabela(zzz_inconsistentes, f"{movimento}_sv_avg", formatos={"Data": "%d/%m/%Y"})
 
-    # Proibidas para ZZZ-P (aviação geral)
-    sv_proibidas_zzz_p = sv_proibidas_geral + ["W"]
+    # 3. Verificar se Id.Vuelo é idêntico a Id.Asociado
+    voo_diferente_associado = linhas_violadas(df, violacoes, "associado_divergente")[["Data", "Id.Vuelo", "Stand", "Id.Asociado"]]
 
-    # Proibidas para ZZZ-[não P] (aviação militar)
-    sv_proibidas_militar = sv_proibidas_geral + ["D", "K", "T"]
+    st.subheader(f"❌ Operações divergentes de associados ({len(voo_diferente_associado)})")
+    if voo_diferente_associado.empty:
+        st.success("Todos os voos ZZZ- possuem Id.Asociado igual ao Id.Vuelo.")
+    else:
+        mostrar_tabela_associados(voo_diferente_associado, f"{movimento}_associados")
 
-    # Filtrar DataFrame original ZZZ-
-    df_zzz_p = df_zzz[df_zzz["Id.Vuelo"].str.startswith("ZZZ-P")].copy()
-    df_zzz_mil = df_zzz[df_zzz["Id.Vuelo"].str.startswith("ZZZ-") & ~df_zzz["Id.Vuelo"].str.startswith("ZZZ-P")].copy()
+# ========================
+# 🔄 Giros: tempo de solo, taxi-in e taxi-out
+# ========================
+def mostrar_giros(giros):
+    st.markdown("## ⏱️ Giros – Tempo de Solo, Taxi-in e Taxi-out")
+    st.caption(
+        f"{len(giros)} visitas, {giros_completos(giros)} com calço e descalço. "
+        "Só voos OPE e intervalos não negativos entram nas estatísticas (em minutos)."
+    )
 
-    # Detectar inconsistentes
-    zzz_p_invalidos = df_zzz_p[df_zzz_p["Sv."].isin(sv_proibidas_zzz_p)].copy()
-    zzz_mil_invalidos = df_zzz_mil[df_zzz_mil["Sv."].isin(sv_proibidas_militar)].copy()
+    geral = distribuicao_giros(giros)
+    if geral.empty:
+        st.info("Nenhum voo OPE com horários suficientes para calcular os tempos do giro.")
+        return
+    st.dataframe(geral, use_container_width=True, hide_index=True)
+
+    por = st.radio("Distribuição por:", ("Stand", "Operador"), horizontal=True, key="giros_por")
+    distribuicao = distribuicao_giros(giros, por)
+    st.dataframe(distribuicao, use_container_width=True, hide_index=True)
+
+    csv_giros = distribuicao.to_csv(index=False, sep=";", encoding="utf-8")
+    st.download_button(
+        f"📥 Baixar CSV – Giros por {por}",
+        csv_giros,
+        file_name=f"scena_giros_{por.lower()}.csv",
+        mime="text/csv"
+    )
 
-    # Juntar tudo
-    zzz_inconsistentes = pd.concat([zzz_p_invalidos, zzz_mil_invalidos], ignore_index=True)
+    with st.expander("Visitas (uma linha por giro)"):
+        mostrar_tabela(
+            giros, "giros_visitas",
+            formatos={"Data": "%d/%m/%Y", **{coluna: "%H:%M" for coluna in COLUNAS_HORARIO_GIRO}}
+        )
+# ========================
+# 🔎 Histórico de uma aeronave ou voo (busca no índice pré-montado)
+# ========================
+def mostrar_busca_movimentos(df, indice):
+    st.sidebar.markdown("### 🔎 Histórico de aeronave/voo")
+    por = st.sidebar.radio("Buscar por", ("Matrícula", "Id.Vuelo"), horizontal=True, key="busca_por")
+    termo = st.sidebar.text_input(
+        "Matrícula" if por == "Matrícula" else "Id.Vuelo", key="busca_termo",
+        placeholder="PR-ABC" if por == "Matrícula" else "AZU4012"
+    )
+    if not termo.strip():
+        return
 
-    # Exibir
-    st.subheader(f"❌ Categorias proibidas em voos AVG (ZZZ-) ({len(zzz_inconsistentes)})")
+    busca = indice.registro if por == "Matrícula" else indice.voo
+    inicio = time.perf_counter()
+    posicoes = busca.buscar(termo)
+    historico = historico_movimentos(df, posicoes)
+    milissegundos = (time.perf_counter() - inicio) * 1000
+
+    if historico.empty:
+        sugestoes = busca.sugestoes(termo)
+        st.sidebar.warning(f"Nenhum movimento para “{termo}”.")
+        if sugestoes:
+            st.sidebar.caption("Parecidos: " + ", ".join(sugestoes))
+        return
 
-    if zzz_inconsistentes.empty:
-        st.success("Nenhum voo AVG (ZZZ-) com categoria proibida.")
-    else:
-        zzz_inconsistentes["Data"] = zzz_inconsistentes["Data"].dt.strftime("%d/%m/%Y")
-        st.dataframe(
-            zzz_inconsistentes[["Data", "Id.Vuelo", "Sv."]].reset_index(drop=True),
-            hide_index=True,
-            use_container_width=True
+    st.sidebar.caption(f"{len(historico)} movimentos em {milissegundos:.1f} ms")
+    with st.expander(f"🔎 Movimentos de {termo.strip().upper()} ({len(historico)})", expanded=True):
+        mostrar_tabela(
+            historico, "busca_movimentos",
+            formatos={
+                "Data": "%d/%m/%Y",
+                **{coluna: "%d/%m %H:%M" for coluna in COLUNAS_INSTANTE if coluna in historico.columns},
+            }
         )
 
-    # 3. Verificar se Id.Vuelo é idêntico a Id.Asociado
-    voo_diferente_associado = df_zzz[df_zzz["Id.Vuelo"] != df_zzz["Id.Asociado"]][["Data", "Id.Vuelo", "Stand", "Id.Asociado"]].copy()
+# ========================
+# 🅿️ Ocupação de stands: conflitos, pico simultâneo e utilização
+# ========================
+def mostrar_ocupacao_stands(intervalos, conflitos, pico, utilizacao):
+    import plotly.graph_objects as go
 
-    st.subheader(f"❌ Operações divergentes de associados ({len(voo_diferente_associado)})")
+    st.markdown("## 🅿️ Ocupação de Stands")
+    if intervalos.empty:
+        st.info("Nenhum giro OPE com calço e descalço em stand definido.")
+        return
 
-    if voo_diferente_associado.empty:
-        st.success("Todos os voos ZZZ- possuem Id.Asociado igual ao Id.Vuelo.")
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Ocupações analisadas", f"{len(intervalos):,}".replace(",", "."))
+    c2.metric("Conflitos de stand", len(conflitos))
+    c3.metric("Pico de stands ocupados", pico["stands"], f"{pico['inicio']:%d/%m/%Y %H:%M}", delta_color="off")
+
+    st.subheader(f"❌ Aeronaves no mesmo stand em horários sobrepostos ({len(conflitos)})")
+    if conflitos.empty:
+        st.success("Nenhuma sobreposição de ocupação nos stands.")
     else:
-    # Formatar Data
-        voo_diferente_associado["Data"] = pd.to_datetime(voo_diferente_associado["Data"]).dt.strftime("%d/%m/%Y")
+        mostrar_tabela(
+            conflitos, "stands_conflitos",
+            formatos={
+                "Data": "%d/%m/%Y", "Calço": "%d/%m %H:%M", "Descalço": "%d/%m %H:%M",
+                "Calço ocupante": "%d/%m %H:%M", "Descalço ocupante": "%d/%m %H:%M",
+            }
+        )
 
-    # Substituir None/NaN por traço
-    voo_diferente_associado["Id.Asociado"] = voo_diferente_associado["Id.Asociado"].fillna("–")
+    # Utilização diária (% do dia com o stand ocupado)
+    fig = go.Figure(go.Heatmap(
+        x=utilizacao.index, y=[str(stand) for stand in utilizacao.columns], z=utilizacao.to_numpy().T,
+        colorscale="Blues", colorbar=dict(title="% ocupado"),
+        hovertemplate="Stand %{y}<br>%{x|%d/%m/%Y}<br>%{z:.1f}% ocupado<extra></extra>"
+    ))
+    fig.update_layout(
+        title=dict(text="Utilização diária por Stand", x=0.5, xanchor="center", font=dict(size=18, color="#0D47A1")),
+        yaxis=dict(title="Stand", type="category"), plot_bgcolor="white", paper_bgcolor="white", height=400
+    )
+    st.plotly_chart(fig, use_container_width=True)
 
-    # Função de estilização para a coluna "Id.Asociado"
-    def colorir_associado(val):
-        return "background-color: #ffcccc" if val != "–" else ""
+# ========================
+# 📈 Anomalias: tempos plausíveis pelas regras, mas fora do padrão
+# ========================
+def mostrar_anomalias(escores):
+    # Devolve (limiar, métricas) escolhidos: o relatório de auditoria usa o mesmo recorte
+    st.markdown("## 📈 Anomalias de Tempos Operacionais")
+    if escores.empty:
+        st.info("Nenhum voo OPE com horários suficientes para calcular taxi, solo ou ETime.")
+        return LIMIAR_PADRAO, []
+    st.caption(
+        "Cada tempo é comparado com a mediana do mesmo operador, stand e hora (ou de um grupo mais amplo, "
+        "quando há poucas amostras). Escore robusto = 0,6745 × (minutos − mediana) / MAD."
+    )
 
-    # Aplicar estilo apenas na coluna "Id.Asociado"
-    styled_df = voo_diferente_associado.style.applymap(colorir_associado, subset=["Id.Asociado"])
+    limiar = st.slider("Limiar do escore (|escore| acima é anômalo)", 2.0, 10.0, LIMIAR_PADRAO, 0.5, key="anomalias_limiar")
+    st.dataframe(resumo_anomalias(escores, limiar), use_container_width=True, hide_index=True)
 
-    # Exibir DataFrame com índice oculto e layout wide
-    st.dataframe(styled_df, hide_index=True, use_container_width=True)
+    metricas = list(escores["Métrica"].cat.categories)
+    escolhidas = st.multiselect("Métricas", metricas, default=metricas, key="anomalias_metricas")
+    fora = anomalias(escores[escores["Métrica"].isin(escolhidas).to_numpy()], limiar)
+    st.subheader(f"⚠️ Tempos anômalos ({len(fora)})")
+    if fora.empty:
+        st.success("Nenhum tempo fora do padrão com esse limiar.")
+    else:
+        mostrar_tabela(fora, "anomalias_tempos", formatos={"Data": "%d/%m/%Y"})
+    return limiar, escolhidas
 
 # ========================
 # 🚀 Execução principal
 # ========================
+if ver_resultados_vigia:
+    with perfil.etapa("vigia/resultados"):
+        mostrar_resultados_vigia(diretorio_vigia)
+    st.markdown('<hr style="border: 2px dashed red; margin-top: 40px; margin-bottom: 20px;">', unsafe_allow_html=True)
+
 st.markdown(
     """
     <div style="display: flex; align-items: center; font-size: 17px; margin-bottom: 10px;">
@@ -239,271 +550,95 @@ st.markdown(
 
 arquivo = st.file_uploader(label="", type=["xlsx", "xls"], key="arquivo_completo")
 
-def mostrar_painel_saida(df):
-    st.markdown("## 🟥 Painel 1 – Divergência entre ETime e AOBT - A partir de 01/02/2024")
-
-    # ✅ Converter colunas relevantes para datetime
-    for col in ["Data", "ETime", "AOBT"]:
-        if col in df.columns:
-            df[col] = pd.to_datetime(df[col], dayfirst=True, errors="coerce")
-
-    # ✅ Aplicar filtro após conversão
-    resultado = df[
-        (df["Sit."] == "OPE") &
-        (df["Data"] >= pd.to_datetime("2024-02-01")) &
-        (df["ETime"] != df["AOBT"])
-    ].copy()
-
-    # ✅ Formatar para exibição
-    resultado["Data"] = resultado["Data"].dt.strftime("%d/%m/%Y")
-    resultado["ETime"] = resultado["ETime"].dt.strftime("%H:%M")
-    resultado["AOBT"] = resultado["AOBT"].dt.strftime("%H:%M")
-
-    if resultado.empty:
-        st.success("Nenhuma divergência encontrada entre ETime e AOBT.")
-    else:
-        st.dataframe(
-            resultado[["Data", "Id.Vuelo", "ETime", "AOBT"]].reset_index(drop=True),
-            hide_index=True,
-            use_container_width=True
-        )
-
-def mostrar_painel2_saida(df):
-    st.markdown("## 🟥 Painel 2 – Inconsistências Operacionais")
-
-    # 🔧 Converter colunas de data/hora para datetime
-    for col in ["Data"]:
-        if col in df.columns:
-            df[col] = pd.to_datetime(df[col], errors="coerce", dayfirst=True)
-
-    # 🔧 Forçar colunas de texto para string e limpar NaNs
-    df["Id.Vuelo"] = df["Id.Vuelo"].astype(str)
-    df["Sv."] = df["Sv."].astype(str)
-
-    # 1. Estação divergente de AIR
-    est_diferente = df[
-        (df["Sit."] == "OPE") &
-        (df["Est."].notna()) &
-        (df["Est."] != "AIR")
-    ].copy()
-
-    st.subheader(f"❌ Voos Operados (OPE) mas com Estação divergente de AIR ({len(est_diferente)})")
-    if est_diferente.empty:
-        st.success("Todos os voos OPE possuem estação AIR.")
-    else:
-        est_diferente["Data"] = est_diferente["Data"].dt.strftime("%d/%m/%Y")
-        st.dataframe(est_diferente[["Data", "Id.Vuelo", "Sit.", "Est."]].reset_index(drop=True), hide_index=True, use_container_width=True)
-
-    # 2. Stand = HOLD
-    stand_hold = df[
-        (df["Sit."] == "OPE") &
-        (df["Stand"].notna()) &
-        (df["Stand"].str.upper() == "HOLD")
-    ].copy()
-
-    st.subheader(f"❌ Stand = HOLD ({len(stand_hold)})")
-    if stand_hold.empty:
-        st.success("Nenhum voo com Stand igual a HOLD.")
-    else:
-        stand_hold["Data"] = stand_hold["Data"].dt.strftime("%d/%m/%Y")
-        st.dataframe(stand_hold[["Data", "Id.Vuelo", "Sit.", "Stand"]].reset_index(drop=True), hide_index=True, use_container_width=True)
-
-    # 3. Categoria proibida em voos comerciais (não ZZZ-)
-    sv_proibida_comercial = ["D", "E", "K", "N", "T", "W"]
-    sv_invalidos = df[
-        (df["Sit."] == "OPE") &
-        (df["Id.Vuelo"] != "nan") &
-        (~df["Id.Vuelo"].str.startswith("ZZZ-")) &
-        (df["Sv."].isin(sv_proibida_comercial))
-    ].copy()
-
-    st.subheader(f"❌ Categoria proibida em voos comerciais ({len(sv_invalidos)})")
-    if sv_invalidos.empty:
-        st.success("Nenhum voo comercial com categoria proibida.")
-    else:
-        sv_invalidos["Data"] = sv_invalidos["Data"].dt.strftime("%d/%m/%Y")
-        st.dataframe(sv_invalidos[["Data", "Id.Vuelo", "Sv."]].reset_index(drop=True), hide_index=True, use_container_width=True)
-
-    # 4. ATOT ≤ AOBT
-    for col in ["ATOT", "AOBT"]:
-        if col in df.columns:
-            df[col] = pd.to_datetime(df[col], errors="coerce", dayfirst=True)
-
-    atot_aobt = df[
-        (df["Sit."] == "OPE") &
-        df["ATOT"].notna() &
-        df["AOBT"].notna() &
-        (df["ATOT"] <= df["AOBT"])
-    ].copy()
-
-    st.subheader(f"❌ Decolagem ≤ Saída Pátio ({len(atot_aobt)})")
-
-    if (atot_aobt["ATOT"] == atot_aobt["AOBT"]).any():
-        st.markdown(
-            '<p style="color:red; font-weight:bold;">⚠️ Atenção: Saída de pátio = Decolagem - Ajuste Necessário.</p>',
-            unsafe_allow_html=True
-        )
-
-    if atot_aobt.empty:
-        st.success("Nenhum voo com Decolagem inferior ou igual a Saída de Pátio.")
-    else:
-        atot_aobt["Data"] = atot_aobt["Data"].dt.strftime("%d/%m/%Y")
-        atot_aobt["ATOT"] = atot_aobt["ATOT"].dt.strftime("%H:%M")
-        atot_aobt["AOBT"] = atot_aobt["AOBT"].dt.strftime("%H:%M")
-
-        df_exibir = atot_aobt.rename(columns={
-            "ATOT": "Decolagem",
-            "AOBT": "Descalço (Saída de Pátio)"
-        })
-
-        def colorir_iguais(row):
-            return ['background-color: #ffcccc' if row["Decolagem"] == row["Descalço (Saída de Pátio)"] else '' for _ in row]
-
-        df_styled = df_exibir[["Data", "Id.Vuelo", "Descalço (Saída de Pátio)", "Decolagem"]].reset_index(drop=True)
-        styled_df = df_styled.style.apply(colorir_iguais, axis=1)
-        st.dataframe(styled_df, hide_index=True, use_container_width=True)
-
-def mostrar_painel3_saida(df):
-    st.markdown("## 🟥 Painel 3 – Análise Voos AVG (ZZZ-)")
-
-    # Garantir que as colunas de texto estão como string
-    df["Id.Vuelo"] = df["Id.Vuelo"].astype(str)
-    df["Registro"] = df["Registro"].astype(str)
-    df["Sv."] = df["Sv."].astype(str)
-    df["Id.Asociado"] = df["Id.Asociado"].astype(str)
-
-    # Converter a coluna de data, se necessário
-    if "Data" in df.columns:
-        df["Data"] = pd.to_datetime(df["Data"], errors="coerce", dayfirst=True)
-
-    # 1. Filtrar voos ZZZ- com Situação OPE
-    df_zzz = df[
-        (df["Sit."] == "OPE") &
-        (df["Id.Vuelo"] != "nan") &
-        (df["Id.Vuelo"].str.startswith("ZZZ-"))
-    ].copy()
-
-    if df_zzz.empty:
-        st.info("Nenhum voo AVG (ZZZ-) com Situação OPE encontrado.")
-        return
-
-    # 2. Matrícula divergente do Registro
-    df_zzz["Matrícula"] = df_zzz["Id.Vuelo"].str.replace("ZZZ-", "", regex=False)
-    matricula_diferente = df_zzz[df_zzz["Matrícula"] != df_zzz["Registro"]][["Id.Vuelo", "Registro", "Sv.", "Data"]].copy()
-
-    st.subheader(f"❌ Matrícula divergente do Registro ({len(matricula_diferente)})")
-    if matricula_diferente.empty:
-        st.success("Todos os voos ZZZ- têm matrícula compatível com o Registro.")
-    else:
-        matricula_diferente["Data"] = pd.to_datetime(matricula_diferente["Data"], errors="coerce").dt.strftime("%d/%m/%Y")
-        st.dataframe(matricula_diferente[["Data", "Id.Vuelo", "Registro", "Sv."]].reset_index(drop=True), hide_index=True, use_container_width=True)
-
-    # 3. Categorias proibidas em voos AVG
-    sv_proibidas_geral = ["A", "B", "C", "E", "F", "G", "H", "J", "L", "M", "N", "O", "P", "Q", "R", "S", "U", "V", "X", "Y", "Z"]
-    sv_proibidas_zzz_p = sv_proibidas_geral + ["W"]
-    sv_proibidas_militar = sv_proibidas_geral + ["D", "K", "T"]
-
-    df_zzz_p = df_zzz[
-        (df_zzz["Id.Vuelo"].str.startswith("ZZZ-P")) &
-        (df_zzz["Sv."].isin(sv_proibidas_zzz_p))
-    ].copy()
-
-    df_zzz_mil = df_zzz[
-        (~df_zzz["Id.Vuelo"].str.startswith("ZZZ-P")) &
-        (df_zzz["Sv."].isin(sv_proibidas_militar))
-    ].copy()
-
-    zzz_inconsistentes = pd.concat([df_zzz_p, df_zzz_mil], ignore_index=True)
-
-    st.subheader(f"❌ Categorias proibidas em voos AVG (ZZZ-) ({len(zzz_inconsistentes)})")
-    if zzz_inconsistentes.empty:
-        st.success("Nenhum voo AVG (ZZZ-) com categoria proibida.")
-    else:
-        zzz_inconsistentes["Data"] = pd.to_datetime(zzz_inconsistentes["Data"], errors="coerce").dt.strftime("%d/%m/%Y")
-        st.dataframe(zzz_inconsistentes[["Data", "Id.Vuelo", "Sv."]].reset_index(drop=True), hide_index=True, use_container_width=True)
-
-    # 4. Operações divergentes de associados
-    voo_diferente_associado = df_zzz[
-        df_zzz["Id.Vuelo"] != df_zzz["Id.Asociado"]
-    ][["Data", "Id.Vuelo", "Stand", "Id.Asociado"]].copy()
-
-    st.subheader(f"❌ Operações divergentes de associados ({len(voo_diferente_associado)})")
-    if voo_diferente_associado.empty:
-        st.success("Todos os voos ZZZ- possuem Id.Asociado igual ao Id.Vuelo.")
-    else:
-        voo_diferente_associado["Data"] = pd.to_datetime(voo_diferente_associado["Data"], errors="coerce").dt.strftime("%d/%m/%Y")
-        voo_diferente_associado["Id.Asociado"] = voo_diferente_associado["Id.Asociado"].replace("nan", "–")
-
-        def colorir_associado(val):
-            return "background-color: #ffcccc" if val != "–" else ""
-
-        styled_df = voo_diferente_associado.style.applymap(colorir_associado, subset=["Id.Asociado"])
-        st.dataframe(styled_df, hide_index=True, use_container_width=True)
-
-if arquivo:
-    df, df_completo = carregar_voos(arquivo)
-    colunas = df_completo.columns.tolist()
-
-    tem_chegada = "AIBT" in colunas
-    tem_saida_associada = any(col.startswith("Assoc.") for col in colunas)
-    tem_saida_simples = "AOBT" in colunas and not tem_saida_associada and not tem_chegada
-
-    # 📥 Painéis de Chegada
-    if tem_chegada:
+df_completo = None
+carga_scena_pendente = False
+if arquivo and (gravar_historico or not fonte_historico):
+    perfil.contexto["arquivo_scena"] = arquivo.name
+    carregado = carregar_em_segundo_plano("SCENA", carregar_voos, arquivo)
+    carga_scena_pendente = carregado is None
+    if carregado is not None:
+        df, df_completo = carregado
+        chave_scena = hash_conteudo(arquivo)
+        if gravar_historico:
+            gravar_no_historico("SCENA", arquivo, df_completo, "SCENA")
+if fonte_historico:
+    perfil.contexto["historico_scena"] = conjunto_scena
+    df_completo, chave_scena = consultar_historico("SCENA", conjunto_scena) if conjunto_scena else (None, None)
+
+if df_completo is not None:
+    mostrar_relatorio_carga("SCENA", df_completo)
+    # Chegadas e saídas empilhadas e validadas numa passada única
+    with perfil.etapa("SCENA/regras"), st.spinner("Validando chegadas e saídas..."):
+        movimentos = cache_arquivos.obter(("movimentos_scena", chave_scena), lambda: movimentos_scena(df_completo))
+        violacoes_scena = revalidar_analise("SCENA", "scena", movimentos.df, movimentos.regras, chave_scena)
+    fontes_relatorio.append((
+        ("SCENA", chave_scena), lambda movimentos=movimentos, violacoes=violacoes_scena: secoes_scena(movimentos, violacoes)
+    ))
+    if movimentos.analises:
+        with perfil.etapa("SCENA/índice de movimentos"):
+            indice = cache_arquivos.obter(("indice_movimentos", chave_scena), lambda: indexar_movimentos(movimentos.df))
+            mostrar_busca_movimentos(movimentos.df, indice)
+
+    for posicao, (analise, df_analise, violacoes, _) in enumerate(separar_analises(movimentos, violacoes_scena)):
+        movimento = MOVIMENTO_ANALISE[analise]
+        # Linha vermelha entre as análises de um arquivo conjunto
+        separador = '<hr style="border: 2px dashed red; margin-top: 40px; margin-bottom: 20px;">' if posicao else ""
         st.markdown(
             """
-            <h2 style="text-align: center; color: #2e7d32;">📥 Análise de Voos de Chegada</h2>
+            {}
+            <h2 style="text-align: center; color: #2e7d32;">{} Análise de Voos de {}</h2>
             <p style="text-align: center; color: red; font-size: 16px; margin-top: -10px;">
                 Total de Operações Verificadas: <strong>{}</strong>
             </p>
-            """.format(len(df_completo[df_completo["Sit."] == "OPE"])),
+            """.format(
+                separador, "📥" if movimento == "chegada" else "📤", analise, int(df_analise["Sit."].eq("OPE").sum())
+            ),
             unsafe_allow_html=True
         )
-        mostrar_painel1(df)
-        mostrar_painel2(df_completo)
-        mostrar_painel3(df_completo)
-
-    # 📤 Painéis de Saída com colunas associadas
-    if tem_saida_associada:
-        df_saida = df_completo[[col for col in colunas if col.startswith("Assoc.")]].copy()
-        df_saida.columns = [col.replace("Assoc. ", "") for col in df_saida.columns]
-        df_saida = df_saida.loc[:, ~df_saida.columns.duplicated()]
-
-        st.markdown(
-            """
-            <hr style="border: 2px dashed red; margin-top: 40px; margin-bottom: 20px;">
-            <h2 style="text-align: center; color: #2e7d32;">📤 Análise de Voos de Saída (Associados)</h2>
-            <p style="text-align: center; color: red; font-size: 16px; margin-top: -10px;">
-                Total de Operações Verificadas: <strong>{}</strong>
-            </p>
-            """.format(len(df_saida[df_saida["Sit."] == "OPE"])),
-            unsafe_allow_html=True
-        )
-        mostrar_painel_saida(df_saida)
-        mostrar_painel2_saida(df_saida)
-        mostrar_painel3_saida(df_saida)
+        with perfil.etapa(f"{analise}/painel1"):
+            mostrar_painel1(df_analise, violacoes, movimento)
+        with perfil.etapa(f"{analise}/painel2"):
+            mostrar_painel2(df_analise, violacoes, movimento)
+        with perfil.etapa(f"{analise}/painel3"):
+            mostrar_painel3(df_analise, violacoes, movimento)
+
+    if movimentos.analises:
+        st.markdown('<hr style="border: 2px dashed red; margin-top: 40px; margin-bottom: 20px;">', unsafe_allow_html=True)
+        with perfil.etapa("SCENA/giros"):
+            giros = cache_arquivos.obter(("montar_giros", chave_scena), lambda: montar_giros(df_completo))
+            mostrar_giros(giros)
+        with perfil.etapa("SCENA/ocupação de stands"):
+            def calcular_ocupacao():
+                intervalos = intervalos_stands(giros)
+                return intervalos, conflitos_stands(intervalos), pico_ocupacao(intervalos), utilizacao_stands(intervalos)
+            ocupacao = cache_arquivos.obter(("ocupacao_stands", chave_scena), calcular_ocupacao)
+            mostrar_ocupacao_stands(*ocupacao)
+        fontes_relatorio.append((
+            ("Stands", chave_scena),
+            lambda conflitos=ocupacao[1]: [Secao("Ocupação de Stands", "Aeronaves no mesmo stand em horários sobrepostos", conflitos)]
+        ))
+        with perfil.etapa("SCENA/anomalias"):
+            escores = cache_arquivos.obter(
+                ("anomalias", chave_scena), lambda: escores_anomalia(medidas_operacionais(movimentos.df, giros))
+            )
+            limiar, escolhidas = mostrar_anomalias(escores)
+        fontes_relatorio.append((
+            ("Anomalias", chave_scena, limiar, tuple(escolhidas)),
+            lambda escores=escores, limiar=limiar, escolhidas=escolhidas: [Secao(
+                "Anomalias", f"Tempos operacionais fora do padrão (|escore| > {limiar})",
+                anomalias(escores[escores["Métrica"].isin(escolhidas).to_numpy()], limiar)
+            )]
+        ))
+
+    if not movimentos.analises:
+        st.error("❌ Arquivo inválido: nenhuma estrutura de chegada ou saída reconhecida.")
 
-    # 📤 Painéis de Saída clássica (sem assoc.)
-    if tem_saida_simples:
-        # Só mostra a linha vermelha se também houver dados de chegada (indicando que é um arquivo combinado)
-        if tem_chegada:
-            st.markdown('<hr style="border: 2px dashed red; margin-top: 40px; margin-bottom: 20px;">', unsafe_allow_html=True)
+elif carga_scena_pendente:
+    # Barra de progresso já exibida; os painéis aparecem quando a carga terminar
+    pass
 
-        st.markdown(
-        """
-        <h2 style="text-align: center; color: #2e7d32;">📤 Análise de Voos de Saída</h2>
-        <p style="text-align: center; color: red; font-size: 16px; margin-top: -10px;">
-            Total de Operações Verificadas: <strong>{}</strong>
-        </p>
-        """.format(len(df_completo[df_completo["Sit."] == "OPE"])),
-        unsafe_allow_html=True
-    )
-        mostrar_painel_saida(df_completo)
-        mostrar_painel2_saida(df_completo)
-        mostrar_painel3_saida(df_completo)
-
-    if not (tem_chegada or tem_saida_associada or tem_saida_simples):
-        st.error("❌ Arquivo inválido: nenhuma estrutura de chegada ou saída reconhecida.")
+elif fonte_historico:
+    st.info("🗄️ Nenhum registro SCENA no histórico local para o período selecionado.")
 
 else:
     st.markdown(
@@ -521,85 +656,60 @@ st.markdown(
 
 # Título personalizado da nova seção – ANÁLISE RIMA
 st.markdown(
-    '<span style="font-size:18px;">📁 Faça o upload do arquivo Excel – <strong style="color:red;">ANÁLISE RIMA (EM EXCEL)</strong></span>',
+    '<span style="font-size:18px;">📁 Faça o upload do arquivo CSV ou Excel – <strong style="color:red;">ANÁLISE RIMA (CSV OU EXCEL)</strong></span>',
     unsafe_allow_html=True
 )
 
 # Frase explicativa destacada
 st.markdown(
     '<div style="color:#1a4d80; font-size:16px; font-weight:bold;">'
-    'OBS.: Os arquivos RIMA vêm no formato CSV. Para fazer a leitura correta, transforme-os em XLSX ou XLS (formato Excel).<br>'
-    'Vá em: Arquivo &gt; Salvar Como &gt; Pasta de Trabalho do Excel.'
+    'OBS.: Envie o CSV do RIMA como ele vem do sistema, sem converter para Excel.<br>'
+    'Delimitador e codificação são detectados automaticamente; arquivos XLSX/XLS continuam aceitos.'
     '</div>',
     unsafe_allow_html=True
 )
 
-arquivo_rima = st.file_uploader(label="", type=["xlsx", "xls"], key="rima")
+arquivo_rima = st.file_uploader(label="", type=["csv", "xlsx", "xls"], key="rima")
 
 def mostrar_painel_rima(df):
     st.markdown("## 📋 Análise RIMA – Divergência entre Calço e Toque")
 
-    # Converter colunas de data
-    for col in ["CALCO_DATA", "TOQUE_DATA", "PREVISTO_DATA"]:
-        if col in df.columns:
-            df[col] = pd.to_datetime(df[col], errors="coerce")
-
-    # Converter horários como string e garantir HH:MM
-    for col in ["CALCO_HORARIO", "TOQUE_HORARIO"]:
-        if col in df.columns:
-            df[col] = df[col].astype(str).str.slice(0, 5)
-
-    # Filtrar divergência
-    divergentes = df[
-        df["CALCO_DATA"].notna() &
-        df["TOQUE_DATA"].notna() &
-        (df["CALCO_DATA"] != df["TOQUE_DATA"])
-    ].copy()
-
-    # Criar coluna Movimento
-    divergentes["Movimento"] = divergentes["MOVIMENTO_TIPO"].map({"P": "Pouso", "D": "Decolagem"})
-
-    # Colunas auxiliares formatadas
-    divergentes["Data"] = divergentes["PREVISTO_DATA"].dt.strftime("%d/%m/%Y")
-    divergentes["Matrícula"] = divergentes["AERONAVE_MARCAS"]
-    divergentes["Operador"] = divergentes["AERONAVE_OPERADOR"]
-
-    divergentes["Nº Voo"] = divergentes["VOO_NUMERO"].astype(str).str.replace(",", "").str.strip()
-
-    divergentes["Calço Aeronave"] = (
-        "Calço " + divergentes["CALCO_DATA"].dt.strftime("%d/%m/%Y") +
-        " – " + divergentes["CALCO_HORARIO"].astype(str).str.strip().str[:5]
-    )
-
-    divergentes["Pouso ou Decolagem"] = (
-        divergentes["Movimento"] + " " +
-        divergentes["TOQUE_DATA"].dt.strftime("%d/%m/%Y") +
-        " – " + divergentes["TOQUE_HORARIO"].astype(str).str.strip().str[:5]
-    )
-
-    # Ordem final
-    colunas_exibir = [
-        "Data", "Movimento", "Matrícula", "Operador", "Nº Voo",
-        "Calço Aeronave", "Pouso ou Decolagem"
-    ]
+    divergentes = divergencias_rima(df)
 
     st.subheader(f"❌ Divergência Calço ≠ Toque ({len(divergentes)})")
 
     if divergentes.empty:
         st.success("Nenhum voo com divergência entre CALCO_DATA e TOQUE_DATA.")
     else:
-        st.dataframe(divergentes[colunas_exibir].reset_index(drop=True), hide_index=True, use_container_width=True)
+        mostrar_tabela(divergentes, "rima_divergencias")
 
-        csv = divergentes[colunas_exibir].to_csv(index=False, sep=";", encoding="utf-8")
+        csv = divergentes.to_csv(index=False, sep=";", encoding="utf-8")
         st.download_button("📥 Baixar CSV (RIMA)", csv, file_name="rima_divergencias.csv", mime="text/csv")
 
-def carregar_rima(arquivo):
-    df = pd.read_excel(arquivo)
-    return df, df.copy()
-
-if arquivo_rima:
-    df_rima, df_rima_completo = carregar_rima(arquivo_rima)
-    mostrar_painel_rima(df_rima_completo)
+df_rima_completo = None
+carga_rima_pendente = False
+if arquivo_rima and (gravar_historico or not fonte_historico):
+    perfil.contexto["arquivo_rima"] = arquivo_rima.name
+    carregado = carregar_em_segundo_plano("RIMA", carregar_rima, arquivo_rima)
+    carga_rima_pendente = carregado is None
+    if carregado is not None:
+        df_rima, df_rima_completo = carregado
+        # Chave dos cálculos de pico em cache: o conteúdo do arquivo
+        chave_rima = hash_conteudo(arquivo_rima)
+        if gravar_historico:
+            gravar_no_historico("RIMA", arquivo_rima, df_rima_completo, "RIMA")
+if fonte_historico:
+    perfil.contexto["historico_rima"] = conjunto_rima
+    df_rima_completo, chave_rima = consultar_historico("RIMA", conjunto_rima) if conjunto_rima else (None, None)
+
+if df_rima_completo is not None:
+    mostrar_relatorio_carga("RIMA", df_rima_completo)
+    with perfil.etapa("RIMA/divergências"):
+        mostrar_painel_rima(df_rima_completo)
+    fontes_relatorio.append((
+        ("RIMA", chave_rima),
+        lambda df=df_rima_completo: [Secao("RIMA", "Divergência Calço ≠ Toque", divergencias_rima(df))]
+    ))
 
     # ========================
     # 🕓 ANÁLISE DE HORÁRIO DE PICO – VERSÃO FINAL + FILTRO MOVIMENTO + TOTAL OPERAÇÕES
@@ -616,6 +726,11 @@ if arquivo_rima:
             ("Todas", "Desembarque", "Embarque"),
             horizontal=False
         )
+        modo_pico = st.radio(
+            "Modo de análise:",
+            ("Faixa horária fixa", "Janela móvel (60 min)", "Hora de projeto"),
+            horizontal=False
+        )
 
     with col2:
         st.markdown(
@@ -628,128 +743,142 @@ if arquivo_rima:
         )
 
     try:
-        if all(col in df_rima_completo.columns for col in ["CALCO_HORARIO", "PAX_LOCAL", "PAX_CONEXAO_DOMESTICO", "AERONAVE_OPERADOR", "MOVIMENTO_TIPO"]):
+        if modo_pico == "Janela móvel (60 min)" and all(col in df_rima_completo.columns for col in COLUNAS_PICO + ["CALCO_DATA"]):
 
-            # 🔹 Filtragem conforme o rádio selecionado
-            if filtro_mov == "Desembarque":
-                df_filtrado = df_rima_completo[df_rima_completo["MOVIMENTO_TIPO"].astype(str).str.upper().eq("P")]
-            elif filtro_mov == "Embarque":
-                df_filtrado = df_rima_completo[df_rima_completo["MOVIMENTO_TIPO"].astype(str).str.upper().eq("D")]
-            else:
-                df_filtrado = df_rima_completo.copy()
-
-            # 🔹 Converter horário
-            calco_dt = pd.to_datetime(
-                df_filtrado["CALCO_HORARIO"].astype(str).str.strip(),
-                format="%H:%M:%S", errors="coerce"
-            )
-            mask_na = calco_dt.isna()
-            if mask_na.any():
-                calco_dt.loc[mask_na] = pd.to_datetime(
-                    df_filtrado.loc[mask_na, "CALCO_HORARIO"].astype(str).str.strip(),
-                    format="%H:%M", errors="coerce"
+            # 🔹 Eventos ordenados por instante (montados uma vez por arquivo)
+            with perfil.etapa("RIMA/pico janela móvel - cálculo"):
+                eventos = cache_arquivos.obter(
+                    ("montar_eventos", chave_rima),
+                    lambda: montar_eventos(df_rima_completo)
                 )
-            df_filtrado["CALCO_HORARIO_NUM"] = calco_dt.dt.hour
+                picos_dia, pico_geral = picos_janela_movel(eventos, filtro_mov)
 
-            # 🔹 Converter PAX
-            df_filtrado["PAX_LOCAL"] = pd.to_numeric(df_filtrado["PAX_LOCAL"], errors="coerce")
-            df_filtrado["PAX_CONEXAO_DOMESTICO"] = pd.to_numeric(df_filtrado["PAX_CONEXAO_DOMESTICO"], errors="coerce")
+            if picos_dia.empty:
+                st.info("Nenhum movimento comercial com data e horário de calço válidos para o filtro selecionado.")
+            else:
+                c1, c2 = st.columns(2)
+                c1.metric(
+                    "Maior PAX em 60 min (arquivo inteiro)",
+                    f"{int(pico_geral['pax']):,}".replace(",", "."),
+                    f"{pico_geral['inicio_pax']:%d/%m/%Y %H:%M} – {pico_geral['inicio_pax'] + pd.Timedelta(minutes=59):%H:%M}",
+                    delta_color="off"
+                )
+                c2.metric(
+                    "Maior nº de movimentos em 60 min (arquivo inteiro)",
+                    pico_geral["movimentos"],
+                    f"{pico_geral['inicio_movimentos']:%d/%m/%Y %H:%M} – {pico_geral['inicio_movimentos'] + pd.Timedelta(minutes=59):%H:%M}",
+                    delta_color="off"
+                )
 
-            # 🔹 Filtrar apenas aviação comercial
-            df_comercial = df_filtrado[df_filtrado["AERONAVE_OPERADOR"] != "GERAL"].copy()
-            df_comercial["TOTAL_PAX"] = df_comercial["PAX_LOCAL"].fillna(0) + df_comercial["PAX_CONEXAO_DOMESTICO"].fillna(0)
+                mostrar_tabela(picos_dia, "rima_picos_dia")
 
-            # 🔹 Criar faixa horária
-            df_comercial["Faixa Horária"] = df_comercial["CALCO_HORARIO_NUM"].apply(
-                lambda x: f"{int(x):02d}:00 - {int(x):02d}:59"
-            )
+                csv_janela = picos_dia.to_csv(index=False, sep=";", encoding="utf-8")
+                st.download_button(
+                    "📥 Baixar CSV – Pico em Janela Móvel",
+                    csv_janela,
+                    file_name=f"rima_pico_janela_movel_{filtro_mov.lower()}.csv",
+                    mime="text/csv"
+                )
 
-            # 🔹 Agrupar por faixa e operador
-            grupo_operador = (
-                df_comercial.groupby(["Faixa Horária", "AERONAVE_OPERADOR"])["TOTAL_PAX"]
-                .sum()
-                .reset_index()
-            )
+        elif modo_pico == "Hora de projeto" and all(col in df_rima_completo.columns for col in COLUNAS_PICO + ["CALCO_DATA"]):
 
-            # 🔹 Companhia top por faixa
-            operador_top = grupo_operador.loc[
-                grupo_operador.groupby("Faixa Horária")["TOTAL_PAX"].idxmax()
-            ].rename(columns={
-                "AERONAVE_OPERADOR": "Companhia Aérea",
-                "TOTAL_PAX": "PAX Total Cia Aérea"
-            })
-
-            # 🔹 Totais por faixa
-            analise_pico = (
-                df_comercial.groupby("Faixa Horária")
-                .agg(
-                    Total_PAX=("TOTAL_PAX", "sum"),
-                    Total_Operações=("TOTAL_PAX", "count")
+            # 🔹 Matriz dia × hora sobre os mesmos eventos da janela móvel
+            with perfil.etapa("RIMA/hora de projeto - cálculo"):
+                eventos = cache_arquivos.obter(
+                    ("montar_eventos", chave_rima),
+                    lambda: montar_eventos(df_rima_completo)
                 )
-                .reset_index()
-            )
+                hora_projeto = estatisticas_hora_projeto(eventos, filtro_mov)
 
-            # 🔹 Merge final
-            analise_pico = analise_pico.merge(operador_top, on="Faixa Horária", how="left")
-            analise_pico = analise_pico.sort_values(by="Total_PAX", ascending=False).reset_index(drop=True)
-
-            # 🔹 Formatar números
-            analise_pico["Total_PAX"] = analise_pico["Total_PAX"].map(lambda x: f"{int(x):,}".replace(",", "."))
-            analise_pico["PAX Total Cia Aérea"] = analise_pico["PAX Total Cia Aérea"].map(lambda x: f"{int(x):,}".replace(",", "."))
-            analise_pico["Total_Operações"] = analise_pico["Total_Operações"].map(lambda x: f"{int(x):,}".replace(",", "."))
-
-            # 🔹 Renomear colunas
-            analise_pico.rename(columns={
-                "Total_PAX": "Total PAX",
-                "Total_Operações": "Total de Operações"
-            }, inplace=True)
-
-            # 🔹 Exibir tabela
-            st.dataframe(
-                analise_pico,
-                use_container_width=True,
-                hide_index=True
-            )
+            if hora_projeto.empty:
+                st.info("Nenhum movimento comercial com data e horário de calço válidos para o filtro selecionado.")
+            else:
+                st.caption("Horas de todos os dias do período, inclusive as sem movimento, ordenadas pelo total da hora.")
+                hora_projeto["Valor"] = hora_projeto["Valor"].map(lambda x: f"{x:,.0f}".replace(",", "."))
+                st.dataframe(hora_projeto, use_container_width=True, hide_index=True)
+
+                csv_projeto = hora_projeto.to_csv(index=False, sep=";", encoding="utf-8")
+                st.download_button(
+                    "📥 Baixar CSV – Hora de Projeto",
+                    csv_projeto,
+                    file_name=f"rima_hora_projeto_{filtro_mov.lower()}.csv",
+                    mime="text/csv"
+                )
 
-            # 🔹 Gráfico interativo (Plotly)
-            analise_plot = analise_pico.copy()
-            analise_plot["Total PAX"] = analise_plot["Total PAX"].str.replace(".", "").astype(int)
-
-            fig = go.Figure()
-            fig.add_trace(go.Bar(
-                x=analise_plot["Faixa Horária"],
-                y=analise_plot["Total PAX"],
-                text=[f"{v:,.0f}".replace(",", ".") for v in analise_plot["Total PAX"]],
-                textposition="outside",
-                marker=dict(color="#1565C0"),
-                hovertemplate="<b>%{x}</b><br>Total PAX: %{text}<extra></extra>"
-            ))
-
-            fig.update_layout(
-                title=dict(
-                    text=f"Horário de Pico – Total de Passageiros ({filtro_mov})",
-                    x=0.5,
-                    xanchor="center",
-                    font=dict(size=18, color="#0D47A1")
-                ),
-                xaxis=dict(title="Faixa Horária", tickangle=-45),
-                yaxis=dict(title="Total de Passageiros", showgrid=False),  # gráfico limpo
-                bargap=0.3,
-                plot_bgcolor="white",
-                paper_bgcolor="white",
-                height=500
-            )
+        elif modo_pico == "Faixa horária fixa" and all(col in df_rima_completo.columns for col in COLUNAS_PICO):
 
-            st.plotly_chart(fig, use_container_width=True)
+            # 🔹 Cubo hora × operador × movimento (montado uma vez por arquivo)
+            with perfil.etapa("RIMA/pico faixa fixa - cálculo"):
+                cubo = cache_arquivos.obter(
+                    ("montar_cubo", chave_rima),
+                    lambda: montar_cubo(df_rima_completo)
+                )
+                analise_pico = fatiar_cubo(cubo, filtro_mov)
+            if cubo.horarios_invalidos:
+                st.caption(f"⚠️ {cubo.horarios_invalidos} movimentos comerciais sem CALCO_HORARIO válido foram desconsiderados.")
 
-            # 🔹 Botão para download
-            csv_pico = analise_pico.to_csv(index=False, sep=";", encoding="utf-8")
-            st.download_button(
-                "📥 Baixar CSV – Análise de Horário de Pico",
-                csv_pico,
-                file_name=f"rima_horario_pico_{filtro_mov.lower()}.csv",
-                mime="text/csv"
-            )
+            if analise_pico.empty:
+                st.info("Nenhum movimento comercial com horário de calço válido para o filtro selecionado.")
+            else:
+                # 🔹 Fatia conforme o rádio selecionado (calculada acima)
+                analise_plot = analise_pico.copy()
+
+                # 🔹 Formatar números
+                analise_pico["Total_PAX"] = analise_pico["Total_PAX"].map(lambda x: f"{int(x):,}".replace(",", "."))
+                analise_pico["PAX Total Cia Aérea"] = analise_pico["PAX Total Cia Aérea"].map(lambda x: f"{int(x):,}".replace(",", "."))
+                analise_pico["Total_Operações"] = analise_pico["Total_Operações"].map(lambda x: f"{int(x):,}".replace(",", "."))
+
+                # 🔹 Renomear colunas
+                analise_pico.rename(columns={
+                    "Total_PAX": "Total PAX",
+                    "Total_Operações": "Total de Operações"
+                }, inplace=True)
+
+                # 🔹 Exibir tabela
+                with perfil.etapa("RIMA/pico faixa fixa - tabela"):
+                    st.dataframe(
+                        analise_pico,
+                        use_container_width=True,
+                        hide_index=True
+                    )
+
+                # 🔹 Gráfico interativo (Plotly)
+                with perfil.etapa("RIMA/pico faixa fixa - gráfico"):
+                    fig = go.Figure()
+                    fig.add_trace(go.Bar(
+                        x=analise_plot["Faixa Horária"],
+                        y=analise_plot["Total_PAX"],
+                        text=[f"{v:,.0f}".replace(",", ".") for v in analise_plot["Total_PAX"]],
+                        textposition="outside",
+                        marker=dict(color="#1565C0"),
+                        hovertemplate="<b>%{x}</b><br>Total PAX: %{text}<extra></extra>"
+                    ))
+
+                    fig.update_layout(
+                        title=dict(
+                            text=f"Horário de Pico – Total de Passageiros ({filtro_mov})",
+                            x=0.5,
+                            xanchor="center",
+                            font=dict(size=18, color="#0D47A1")
+                        ),
+                        xaxis=dict(title="Faixa Horária", tickangle=-45),
+                        yaxis=dict(title="Total de Passageiros", showgrid=False),  # gráfico limpo
+                        bargap=0.3,
+                        plot_bgcolor="white",
+                        paper_bgcolor="white",
+                        height=500
+                    )
+
+                    st.plotly_chart(fig, use_container_width=True)
+
+                # 🔹 Botão para download
+                csv_pico = analise_pico.to_csv(index=False, sep=";", encoding="utf-8")
+                st.download_button(
+                    "📥 Baixar CSV – Análise de Horário de Pico",
+                    csv_pico,
+                    file_name=f"rima_horario_pico_{filtro_mov.lower()}.csv",
+                    mime="text/csv"
+                )
 
         else:
             st.info("As colunas necessárias para a análise de horário de pico não foram encontradas no arquivo RIMA.")
@@ -757,10 +886,111 @@ if arquivo_rima:
     except Exception as e:
         st.error(f"Ocorreu um erro ao processar a análise de horário de pico: {e}")
 
+elif carga_rima_pendente:
+    pass
+
+elif fonte_historico:
+    st.info("🗄️ Nenhum registro RIMA no histórico local para o período selecionado.")
+
 else:
     st.markdown(
         '<div style="background-color:#e1f5fe; padding:10px; border-radius:5px;">'
-        'ℹ️ <strong>Envie um arquivo Excel com os dados dos voos – <span style="color:red;">ANÁLISE RIMA (EXCEL)</span>.</strong>'
+        'ℹ️ <strong>Envie um arquivo CSV ou Excel com os dados dos voos – <span style="color:red;">ANÁLISE RIMA (CSV OU EXCEL)</span>.</strong>'
         '</div>',
         unsafe_allow_html=True
     )
+
+# ========================
+# 🔗 Conciliação SCENA ↔ RIMA (quando os dois estão carregados)
+# ========================
+if df_completo is not None and df_rima_completo is not None:
+    st.markdown('<hr style="border: 2px dashed red; margin-top: 40px; margin-bottom: 20px;">', unsafe_allow_html=True)
+    st.markdown("## 🔗 Conciliação SCENA ↔ RIMA")
+
+    if not all(col in df_rima_completo.columns for col in COLUNAS_RIMA_CONCILIACAO):
+        st.info("As colunas necessárias para a conciliação não foram encontradas no arquivo RIMA.")
+    else:
+        c1, c2 = st.columns(2)
+        tolerancia = c1.number_input("Tolerância para casar movimentos (min)", min_value=1, max_value=720, value=30, key="conciliacao_tolerancia")
+        limite = c2.number_input("Diferença aceitável de horário (min)", min_value=0, max_value=120, value=5, key="conciliacao_limite")
+
+        with perfil.etapa("Conciliação/merge_asof"):
+            giros = cache_arquivos.obter(("montar_giros", chave_scena), lambda: montar_giros(df_completo))
+            conciliacao = cache_arquivos.obter(
+                ("conciliar", chave_scena, chave_rima, tolerancia),
+                lambda: conciliar(giros, df_rima_completo, tolerancia)
+            )
+            divergentes = divergencias_conciliacao(conciliacao, limite)
+        fontes_relatorio.append((
+            ("Conciliação", tolerancia, limite),
+            lambda: [
+                Secao("Conciliação SCENA ↔ RIMA", f"Horários divergentes (> {limite} min)", divergentes),
+                Secao("Conciliação SCENA ↔ RIMA", "SCENA sem par no RIMA", conciliacao.scena_sem_par),
+                Secao("Conciliação SCENA ↔ RIMA", "RIMA sem par no SCENA", conciliacao.rima_sem_par),
+            ]
+        ))
+
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Movimentos conciliados", len(conciliacao.conciliados))
+        m2.metric(f"Com diferença > {limite} min", len(divergentes))
+        m3.metric("SCENA sem par no RIMA", len(conciliacao.scena_sem_par))
+        m4.metric("RIMA sem par no SCENA", len(conciliacao.rima_sem_par))
+
+        formatos_conciliacao = {coluna: "%d/%m/%Y %H:%M" for coluna in ["Calço SCENA", "Calço RIMA", "Toque SCENA", "Toque RIMA", "Calço", "Toque"]}
+        st.subheader(f"❌ Horários divergentes entre SCENA e RIMA ({len(divergentes)})")
+        if divergentes.empty:
+            st.success("Todos os movimentos conciliados têm horários compatíveis.")
+        else:
+            mostrar_tabela(divergentes, "conciliacao_divergentes", formatos=formatos_conciliacao)
+            csv_conciliacao = divergentes.to_csv(index=False, sep=";", encoding="utf-8")
+            st.download_button("📥 Baixar CSV – Conciliação", csv_conciliacao, file_name="conciliacao_divergencias.csv", mime="text/csv")
+
+        with st.expander(f"SCENA sem par no RIMA ({len(conciliacao.scena_sem_par)})"):
+            mostrar_tabela(conciliacao.scena_sem_par, "conciliacao_scena_sem_par", formatos=formatos_conciliacao)
+        with st.expander(f"RIMA sem par no SCENA ({len(conciliacao.rima_sem_par)})"):
+            mostrar_tabela(conciliacao.rima_sem_par, "conciliacao_rima_sem_par", formatos=formatos_conciliacao)
+
+# ========================
+# 📦 Relatório de auditoria: gerado só quando pedido, a partir dos resultados já calculados
+# ========================
+if fontes_relatorio:
+    st.sidebar.markdown("### 📦 Relatório de auditoria")
+    chave_relatorio = tuple(chave for chave, _ in fontes_relatorio)
+    relatorio = st.session_state.get("relatorio_auditoria")
+    if relatorio is not None and relatorio["chave"] != chave_relatorio:
+        # Dados mudaram: descarta o relatório anterior em vez de guardar os dois
+        relatorio = st.session_state["relatorio_auditoria"] = None
+
+    if st.sidebar.button("Gerar relatório (XLSX + PDF)", key="gerar_relatorio"):
+        with perfil.etapa("Relatório de auditoria"), st.spinner("Gerando relatório de auditoria..."):
+            secoes = [secao for _, fonte in fontes_relatorio for secao in fonte()]
+            arquivos_relatorio = {chave: valor for chave, valor in perfil.contexto.items() if valor}
+            relatorio = st.session_state["relatorio_auditoria"] = {
+                "chave": chave_relatorio, "xlsx": gerar_xlsx(secoes), "pdf": gerar_pdf(secoes, arquivos_relatorio)
+            }
+
+    if relatorio is not None:
+        st.sidebar.download_button(
+            "📥 Baixar XLSX", relatorio["xlsx"], file_name="auditoria_sbju.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+        st.sidebar.download_button("📥 Baixar PDF", relatorio["pdf"], file_name="auditoria_sbju.pdf", mime="application/pdf")
+
+# 🗃️ Estatísticas do cache de arquivos
+estatisticas_cache = cache_arquivos.estatisticas()
+st.sidebar.caption(
+    f"🗃️ Cache de arquivos: {estatisticas_cache['entradas']} em memória "
+    f"({estatisticas_cache['bytes'] / 1024 / 1024:.1f} MB) – "
+    f"{estatisticas_cache['acertos']} acertos / {estatisticas_cache['falhas']} falhas"
+)
+
+# ⏱️ Resumo do perfil desta execução
+if perfil.ativo:
+    with st.sidebar.expander("⏱️ Perfil desta execução", expanded=True):
+        tabela_perfil = perfil.tabela()
+        st.dataframe(tabela_perfil, hide_index=True, use_container_width=True)
+        st.caption(
+            f"Total: {tabela_perfil['segundos'].sum():.2f} s – registros anexados a {perfil.caminho_log}. "
+            "O rastreamento de memória deixa a página mais lenta enquanto o perfil estiver ligado."
+        )
+    perfil.gravar()
@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+
+from giros import operador_voo
+
+
+# ========================
+# 📈 Anomalias de tempos operacionais: mediana/MAD por operador, stand e hora
+# ========================
+# Métrica: (movimento, início, fim, só valores não negativos)
+METRICAS_ANOMALIA = {
+    "Taxi-in (min)": ("chegada", "ALDT", "AIBT", True),
+    "ETime × AIBT (min)": ("chegada", "ETime", "AIBT", False),
+    "Taxi-out (min)": ("saida", "AOBT", "ATOT", True),
+    "ETime × AOBT (min)": ("saida", "ETime", "AOBT", False),
+}
+# Linha de base do grupo mais específico com amostras suficientes
+NIVEIS_BASE = [("Operador", "Stand", "Hora"), ("Operador", "Hora"), ("Hora",), ()]
+AMOSTRAS_MINIMAS = 20
+# Horários vêm em minutos: MAD menor que isso não é dispersão real
+MAD_MINIMO = 1.0
+# Escore robusto de Iglewicz–Hoaglin: 0,6745 · (x − mediana) / MAD
+FATOR_MAD = 0.6745
+LIMIAR_PADRAO = 3.5
+
+COLUNAS_ANOMALIA = [
+    "Métrica", "Data", "Voo", "Registro", "Operador", "Stand", "Hora",
+    "Minutos", "Mediana", "MAD", "Escore", "Base", "Linha",
+]
+
+
+def medidas_operacionais(movimentos_df, giros=None):
+    # Formato longo (uma linha por movimento e métrica), só voos OPE.
+    # Com os giros, entra também o tempo de solo (calço → descalço)
+    ope = movimentos_df["Sit."].eq("OPE").fillna(False).to_numpy(dtype=bool)
+    movimento = movimentos_df["Movimento"].to_numpy()
+    operador = operador_voo(movimentos_df["Id.Vuelo"]).to_numpy(dtype=object, na_value=None)
+    partes = []
+
+    def parte(metrica, origem, linhas, inicio, fim, nao_negativo, voo, operador_linhas):
+        minutos = (origem[fim] - origem[inicio]).dt.total_seconds().to_numpy() / 60
+        validas = ~np.isnan(minutos) & (minutos >= 0 if nao_negativo else True)
+        origem = origem.loc[validas]
+        partes.append(pd.DataFrame({
+            "Métrica": metrica,
+            "Data": origem["Data"].to_numpy(),
+            "Voo": voo[validas],
+            "Registro": origem["Registro"].astype("string").to_numpy(dtype=object, na_value=None),
+            "Operador": operador_linhas[validas],
+            "Stand": origem["Stand"].astype("string").to_numpy(dtype=object, na_value=None),
+            "Hora": origem[inicio].dt.hour.to_numpy(),
+            "Minutos": minutos[validas],
+            "Linha": linhas[validas] + 2,
+        }))
+
+    for metrica, (do_movimento, inicio, fim, nao_negativo) in METRICAS_ANOMALIA.items():
+        if not {inicio, fim} <= set(movimentos_df.columns):
+            continue
+        selecao = ope & (movimento == do_movimento)
+        origem = movimentos_df.loc[selecao]
+        parte(
+            metrica, origem, origem.index.to_numpy(), inicio, fim, nao_negativo,
+            origem["Id.Vuelo"].astype("string").to_numpy(dtype=object, na_value=None), operador[selecao],
+        )
+
+    if giros is not None:
+        operados = giros.loc[giros["Sit."].eq("OPE").fillna(False).to_numpy(dtype=bool)]
+        parte(
+            "Solo (min)", operados, operados.index.to_numpy(), "AIBT", "AOBT", True,
+            operados["Voo chegada"].fillna(operados["Voo saída"]).astype("string").to_numpy(dtype=object, na_value=None),
+            operados["Operador"].astype("string").to_numpy(dtype=object, na_value=None),
+        )
+
+    if not partes:
+        return pd.DataFrame(columns=[col for col in COLUNAS_ANOMALIA if col not in ("Mediana", "MAD", "Escore", "Base")])
+    medidas = pd.concat(partes, ignore_index=True)
+    for chave in ("Métrica", "Operador", "Stand"):
+        medidas[chave] = medidas[chave].astype("category")
+    return medidas
+
+
+def escores_anomalia(medidas):
+    # Mediana, MAD e contagem de cada nível com transform (sem laço por linha);
+    # cada medida usa o nível mais específico com AMOSTRAS_MINIMAS ou mais
+    n = len(medidas)
+    mediana, mad, base = np.full(n, np.nan), np.full(n, np.nan), np.full(n, "", dtype=object)
+    pendente = np.ones(n, dtype=bool)
+    minutos = medidas["Minutos"]
+
+    for nivel in NIVEIS_BASE:
+        chaves = [medidas["Métrica"]] + [medidas[col] for col in nivel]
+        grupos = minutos.groupby(chaves, observed=True, dropna=False, sort=False)
+        mediana_nivel = grupos.transform("median")
+        mad_nivel = (minutos - mediana_nivel).abs().groupby(chaves, observed=True, dropna=False, sort=False).transform("median")
+        suficiente = grupos.transform("size").to_numpy() >= AMOSTRAS_MINIMAS
+        # O último nível (só a métrica) vale para o que sobrar
+        usar = pendente & (suficiente | (nivel == NIVEIS_BASE[-1]))
+        mediana[usar] = mediana_nivel.to_numpy()[usar]
+        mad[usar] = mad_nivel.to_numpy()[usar]
+        base[usar] = " × ".join(nivel) or "Geral"
+        pendente &= ~usar
+
+    mad_efetivo = np.maximum(mad, MAD_MINIMO)
+    return medidas.assign(
+        Mediana=np.round(mediana, 1),
+        MAD=np.round(mad, 1),
+        Escore=np.round(FATOR_MAD * (minutos.to_numpy() - mediana) / mad_efetivo, 2),
+        Base=base,
+    )[COLUNAS_ANOMALIA]
+
+
+def anomalias(escores, limiar=LIMIAR_PADRAO):
+    # Medidas com |escore| acima do limiar, das mais extremas para as menos
+    fora = np.abs(escores["Escore"].to_numpy()) > limiar
+    return escores.loc[fora].sort_values("Escore", key=np.abs, ascending=False, kind="stable").reset_index(drop=True)
+
+
+def resumo_anomalias(escores, limiar=LIMIAR_PADRAO):
+    fora = np.abs(escores["Escore"].to_numpy()) > limiar
+    agrupado = pd.DataFrame({"Métrica": escores["Métrica"], "Anômalas": fora}).groupby("Métrica", observed=True)["Anômalas"]
+    return pd.DataFrame({"Medidas": agrupado.size(), "Anômalas": agrupado.sum()}).reset_index()
@@ -0,0 +1,226 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from pandas.io.formats.style import Styler
+
+from anomalias import escores_anomalia, medidas_operacionais
+from benchmarks.gerador_sintetico import LAYOUTS_SCENA, gerar_rima, gerar_scena, gravar_rima, gravar_scena
+from cache_arquivos import CacheArquivos
+from carregamento import ativar_copy_on_write, carregar_rima, carregar_voos, copy_on_write_ativo
+from exibicao import TAMANHO_PAGINA, mesmo_minuto, preparar_pagina, tabela_associados
+from giros import montar_giros
+from horario_pico import (
+    FILTROS_MOVIMENTO, estatisticas_hora_projeto, fatiar_cubo, montar_cubo, montar_eventos, picos_janela_movel
+)
+from leitores_excel import medir_motores
+from ocupacao_stands import conflitos_stands, intervalos_stands, pico_ocupacao, utilizacao_stands
+from validacoes import MOVIMENTO_ANALISE, avaliar_regras, linhas_violadas, movimentos_scena, separar_analises
+
+
+# ========================
+# ⏱️ Benchmark por etapa (tempo e pico de memória)
+# ========================
+# Cada painel refaz o preparo da página: recorte das linhas violadas, colunas,
+# 1ª página formatada e o Styler dos destaques (mesmas chamadas de mostrar_tabela)
+DATA = {"Data": "%d/%m/%Y"}
+HORARIO_MOVIMENTO = {"chegada": "AIBT", "saida": "AOBT"}
+
+
+def _pagina_exibida(tabela, destaque=None, colunas_destaque=None, formatos=None):
+    if tabela.empty:
+        return None
+    tabela = tabela.reset_index(drop=True)
+    exibir = preparar_pagina(tabela, np.arange(min(len(tabela), TAMANHO_PAGINA)), destaque, colunas_destaque, formatos)
+    if isinstance(exibir, Styler):
+        # O st.dataframe calcula os estilos ao serializar o Styler
+        exibir._compute()
+    return exibir
+
+
+def painel1(df, violacoes, movimento):
+    horario = HORARIO_MOVIMENTO[movimento]
+    tabela = linhas_violadas(df, violacoes, f"etime_diferente_{horario.lower()}")[["Data", "Id.Vuelo", "ETime", horario, "Sit."]]
+    return [_pagina_exibida(tabela, formatos={**DATA, "ETime": "%H:%M", horario: "%H:%M"})]
+
+
+def painel2(df, violacoes, movimento):
+    paginas = [
+        _pagina_exibida(linhas_violadas(df, violacoes, regra)[colunas], formatos=DATA)
+        for regra, colunas in (
+            ("est_divergente", ["Data", "Id.Vuelo", "Sit.", "Est."]),
+            ("stand_hold", ["Data", "Id.Vuelo", "Sit.", "Stand"]),
+            ("sv_proibida_comercial", ["Data", "Id.Vuelo", "Sv."]),
+        )
+    ]
+    if movimento == "chegada":
+        tabela = linhas_violadas(df, violacoes, "calco_menor_igual_pouso")[["Data", "Id.Vuelo", "AIBT", "ALDT"]]
+        paginas.append(_pagina_exibida(
+            tabela, destaque=mesmo_minuto(tabela["AIBT"], tabela["ALDT"]),
+            formatos={**DATA, "AIBT": "%H:%M", "ALDT": "%H:%M"}
+        ))
+    else:
+        tabela = linhas_violadas(df, violacoes, "decolagem_menor_igual_saida_patio")[["Data", "Id.Vuelo", "AOBT", "ATOT"]]
+        paginas.append(_pagina_exibida(
+            tabela, destaque=mesmo_minuto(tabela["ATOT"], tabela["AOBT"]),
+            formatos={**DATA, "AOBT": "%H:%M", "ATOT": "%H:%M"}
+        ))
+    return paginas
+
+
+def painel3(df, violacoes, movimento):
+    if not violacoes["voos_avg_ope"].any():
+        return []
+    associados, destaque = tabela_associados(
+        linhas_violadas(df, violacoes, "associado_divergente")[["Data", "Id.Vuelo", "Stand", "Id.Asociado"]]
+    )
+    return [
+        _pagina_exibida(linhas_violadas(df, violacoes, "matricula_divergente")[["Data", "Id.Vuelo", "Registro", "Sv."]], formatos=DATA),
+        _pagina_exibida(linhas_violadas(df, violacoes, "zzz_p_sv_proibida", "zzz_militar_sv_proibida")[["Data", "Id.Vuelo", "Sv."]], formatos=DATA),
+        _pagina_exibida(associados, destaque=destaque, colunas_destaque=["Id.Asociado"], formatos=DATA),
+    ]
+
+
+PAINEIS = {"painel1": painel1, "painel2": painel2, "painel3": painel3}
+
+
+def medir(funcao, repeticoes=1):
+    # Pico de memória numa execução com tracemalloc; o tempo (melhor de N)
+    # é medido em execuções separadas, sem o custo do rastreamento
+    tracemalloc.start()
+    resultado = funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return resultado, min(tempos), pico
+
+
+def _arquivo_sintetico(diretorio, nome, gerar, gravar):
+    # Planilhas ficam em cache no diretório: gravar xlsx grandes é lento
+    caminho = os.path.join(diretorio, nome)
+    if not os.path.exists(caminho):
+        gravar(gerar(), caminho)
+    return caminho
+
+
+def benchmark_scena(diretorio, tamanho, layout, semente, repeticoes):
+    caminho = _arquivo_sintetico(
+        diretorio, f"scena_{layout}_{tamanho}_{semente}.xlsx",
+        lambda: gerar_scena(tamanho, layout, semente), gravar_scena
+    )
+    resultados = []
+
+    def registrar(etapa, funcao):
+        resultado, segundos, pico = medir(funcao, repeticoes)
+        resultados.append({
+            "arquivo": "SCENA", "layout": layout, "tamanho": tamanho, "etapa": etapa,
+            "segundos": round(segundos, 6), "pico_memoria_mb": round(pico / 1024 / 1024, 3),
+        })
+        return resultado
+
+    _, df_completo = registrar("carregar_voos", lambda: carregar_voos(caminho))
+    for motor, segundos in medir_motores(caminho, "data", nrows=None).items():
+        resultados.append({
+            "arquivo": "SCENA", "layout": layout, "tamanho": tamanho, "etapa": f"leitor/{motor}",
+            "segundos": None if segundos is None else round(segundos, 6), "pico_memoria_mb": None,
+        })
+    # Acerto no cache: o que cada rerun do app paga para receber o DataFrame
+    cache = CacheArquivos()
+    cache.obter("scena", lambda: df_completo)
+    registrar("cache/acerto", lambda: cache.obter("scena", None))
+    movimentos = registrar("movimentos_scena", lambda: movimentos_scena(df_completo))
+    violacoes_scena = registrar("avaliar_regras", lambda: avaliar_regras(movimentos.df, movimentos.regras))
+    giros = registrar("montar_giros", lambda: montar_giros(df_completo))
+    intervalos = registrar("stands/intervalos", lambda: intervalos_stands(giros))
+    registrar("stands/conflitos", lambda: conflitos_stands(intervalos))
+    registrar("stands/pico", lambda: pico_ocupacao(intervalos))
+    registrar("stands/utilizacao", lambda: utilizacao_stands(intervalos))
+    medidas = registrar("anomalias/medidas", lambda: medidas_operacionais(movimentos.df, giros))
+    registrar("anomalias/escores", lambda: escores_anomalia(medidas))
+    for analise, df, violacoes, _ in separar_analises(movimentos, violacoes_scena):
+        movimento = MOVIMENTO_ANALISE[analise]
+        for painel, preparar in PAINEIS.items():
+            registrar(f"{analise}/{painel}", lambda: preparar(df, violacoes, movimento))
+    return resultados
+
+
+def benchmark_rima(diretorio, tamanho, semente, repeticoes):
+    caminho = _arquivo_sintetico(
+        diretorio, f"rima_{tamanho}_{semente}.xlsx",
+        lambda: gerar_rima(tamanho, semente), gravar_rima
+    )
+    resultados = []
+
+    def registrar(etapa, funcao):
+        resultado, segundos, pico = medir(funcao, repeticoes)
+        resultados.append({
+            "arquivo": "RIMA", "layout": "rima", "tamanho": tamanho, "etapa": etapa,
+            "segundos": round(segundos, 6), "pico_memoria_mb": round(pico / 1024 / 1024, 3),
+        })
+        return resultado
+
+    _, df_rima = registrar("carregar_rima", lambda: carregar_rima(caminho))
+    cubo = registrar("pico/montar_cubo", lambda: montar_cubo(df_rima))
+    registrar("pico/fatiar_cubo", lambda: [fatiar_cubo(cubo, filtro) for filtro in FILTROS_MOVIMENTO])
+    eventos = registrar("pico/montar_eventos", lambda: montar_eventos(df_rima))
+    registrar("pico/janela_movel", lambda: picos_janela_movel(eventos, "Todas"))
+    registrar("pico/hora_projeto", lambda: estatisticas_hora_projeto(eventos, "Todas"))
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark das etapas do app com dados SCENA/RIMA sintéticos.")
+    parser.add_argument("-t", "--tamanhos", type=int, nargs="+", default=[10_000, 100_000], help="Quantidade de voos/movimentos")
+    parser.add_argument("-l", "--layouts", nargs="+", default=list(LAYOUTS_SCENA), choices=LAYOUTS_SCENA)
+    parser.add_argument("-s", "--semente", type=int, default=0)
+    parser.add_argument("-r", "--repeticoes", type=int, default=3)
+    parser.add_argument("-d", "--diretorio", default=os.path.join(tempfile.gettempdir(), "sbju_benchmark"), help="Cache das planilhas geradas")
+    parser.add_argument("-o", "--saida", default="benchmark.json", help="Relatório JSON")
+    parser.add_argument("--sem-rima", action="store_true")
+    parser.add_argument("--sem-copy-on-write", action="store_true", help="Mede sem copy-on-write (pandas 2.x)")
+    args = parser.parse_args(argv)
+    if not args.sem_copy_on_write:
+        ativar_copy_on_write()
+
+    os.makedirs(args.diretorio, exist_ok=True)
+    resultados = []
+    for tamanho in args.tamanhos:
+        for layout in args.layouts:
+            print(f"SCENA {layout} {tamanho}...", file=sys.stderr)
+            resultados += benchmark_scena(args.diretorio, tamanho, layout, args.semente, args.repeticoes)
+        if not args.sem_rima:
+            print(f"RIMA {tamanho}...", file=sys.stderr)
+            resultados += benchmark_rima(args.diretorio, tamanho, args.semente, args.repeticoes)
+
+    relatorio = {
+        "ambiente": {
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "copy_on_write": copy_on_write_ativo(),
+        },
+        "parametros": {"semente": args.semente, "repeticoes": args.repeticoes},
+        "resultados": resultados,
+    }
+    with open(args.saida, "w", encoding="utf-8") as arquivo:
+        json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+
+    print(pd.DataFrame(resultados).to_string(index=False), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
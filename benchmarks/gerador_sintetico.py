@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+
+
+# ========================
+# 🧪 Gerador de exportações SCENA/RIMA sintéticas (reprodutível por semente)
+# ========================
+LAYOUTS_SCENA = ("chegada", "saida", "conjunto")
+
+OPERADORES = np.array(["AZU", "GLO", "TAM", "PTB", "GERAL"])
+PESO_OPERADORES = [0.35, 0.3, 0.2, 0.05, 0.1]
+
+SITUACOES = np.array(["OPE", "CAN", "PRG", "DES"])
+PESO_SITUACOES = [0.9, 0.05, 0.04, 0.01]
+
+SV_COMERCIAL = np.array(["J", "C", "G", "D", "N", "W"])
+PESO_SV_COMERCIAL = [0.9, 0.04, 0.03, 0.01, 0.01, 0.01]
+SV_AVG = np.array(["D", "K", "T", "W", "A", "J"])
+PESO_SV_AVG = [0.35, 0.2, 0.2, 0.15, 0.05, 0.05]
+
+STANDS = np.array(["1", "2", "3", "4", "5", "6", "7", "8", "HOLD"])
+PESO_STANDS = [0.14, 0.14, 0.14, 0.14, 0.14, 0.12, 0.1, 0.07, 0.01]
+
+
+def _matriculas(rng, n):
+    letras = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+    sufixo = letras[rng.integers(0, 26, (n, 3))]
+    return np.char.add(rng.choice(["PR", "PS", "PT", "PP"], n), np.char.add(np.char.add(sufixo[:, 0], sufixo[:, 1]), sufixo[:, 2]))
+
+
+def _movimentos(rng, n, inicio, dias, estacao_ok):
+    # ~15% de voos AVG: aviação geral "ZZZ-<matrícula P...>" e militar "ZZZ-FAB..."
+    matriculas = _matriculas(rng, n)
+    avg = rng.random(n) < 0.15
+    militar = avg & (rng.random(n) < 0.3)
+    id_vuelo = np.where(
+        avg,
+        np.where(militar, np.char.add("ZZZ-FAB", rng.integers(2000, 2999, n).astype(str)), np.char.add("ZZZ-", matriculas)),
+        np.char.add(rng.choice(OPERADORES[:4], n), rng.integers(1000, 9999, n).astype(str)),
+    ).astype(object)
+
+    registro = np.where(avg & (rng.random(n) < 0.97), np.char.replace(id_vuelo.astype(str), "ZZZ-", ""), matriculas).astype(object)
+    id_asociado = np.where(avg & (rng.random(n) < 0.9), id_vuelo, None).astype(object)
+
+    # Horários concentrados em bancos de chegada/saída ao longo do dia
+    minutos = (rng.normal(rng.choice([8, 13, 18, 22], n) * 60, 50) % 1440).astype(int)
+    etime = pd.Timestamp(inicio) + pd.to_timedelta(rng.integers(0, dias, n), unit="D") + pd.to_timedelta(minutos, unit="m")
+
+    sv = np.where(avg, rng.choice(SV_AVG, n, p=PESO_SV_AVG), rng.choice(SV_COMERCIAL, n, p=PESO_SV_COMERCIAL))
+    estacao = np.where(rng.random(n) < 0.98, estacao_ok, rng.choice(["SCH", "DLY"], n))
+
+    return pd.DataFrame({
+        "Fecha": etime.strftime("%d/%m/%Y"),
+        "Id.Vuelo": id_vuelo,
+        "Registro": registro,
+        "Id.Asociado": id_asociado,
+        "Sit.": rng.choice(SITUACOES, n, p=PESO_SITUACOES),
+        "Est.": estacao,
+        "Sv.": sv,
+        "Stand": rng.choice(STANDS, n, p=PESO_STANDS),
+        "ETime": etime,
+    })
+
+
+def _desvio(rng, n, media, desvio):
+    return pd.to_timedelta(np.maximum(rng.normal(media, desvio, n), 0).round(), unit="m")
+
+
+def gerar_scena(n, layout="chegada", semente=0, inicio="2024-02-01", dias=30):
+    if layout not in LAYOUTS_SCENA:
+        raise ValueError(f"layout inválido: {layout} (use {', '.join(LAYOUTS_SCENA)})")
+    rng = np.random.default_rng(semente)
+
+    if layout in ("chegada", "conjunto"):
+        chegada = _movimentos(rng, n, inicio, dias, "IBK")
+        chegada["ALDT"] = chegada["ETime"] - _desvio(rng, n, 6, 3)
+        chegada["AIBT"] = chegada["ETime"].where(rng.random(n) < 0.9, chegada["ETime"] + _desvio(rng, n, 3, 2))
+        # ~1% com calço igual ou anterior ao pouso
+        erro = rng.random(n) < 0.01
+        chegada.loc[erro, "AIBT"] = chegada.loc[erro, "ALDT"]
+        chegada["F.ETime"] = chegada["ETime"]
+
+    if layout in ("saida", "conjunto"):
+        saida = _movimentos(rng, n, inicio, dias, "AIR")
+        saida["AOBT"] = saida["ETime"].where(rng.random(n) < 0.9, saida["ETime"] + _desvio(rng, n, 5, 4))
+        saida["ATOT"] = saida["AOBT"] + _desvio(rng, n, 9, 4)
+        erro = rng.random(n) < 0.01
+        saida.loc[erro, "ATOT"] = saida.loc[erro, "AOBT"]
+
+    if layout == "chegada":
+        return chegada
+    if layout == "saida":
+        return saida
+
+    # Conjunto: a partida associada vem nas colunas "Assoc. <coluna>"
+    saida = saida.drop(columns=["Fecha"])
+    saida["Data"] = saida["ETime"].dt.strftime("%d/%m/%Y")
+    return pd.concat([chegada, saida.add_prefix("Assoc. ")], axis=1)
+
+
+def gerar_rima(n, semente=0, inicio="2024-02-01", dias=30):
+    rng = np.random.default_rng(semente)
+    operador = rng.choice(OPERADORES, n, p=PESO_OPERADORES)
+    movimento = rng.choice(["P", "D"], n)
+
+    minutos = (rng.normal(rng.choice([8, 13, 18, 22], n) * 60, 50) % 1440).astype(int)
+    calco = pd.Timestamp(inicio) + pd.to_timedelta(rng.integers(0, dias, n), unit="D") + pd.to_timedelta(minutos, unit="m")
+    # Toque alguns minutos antes (pouso) ou depois (decolagem) do calço
+    toque = calco + np.where(movimento == "P", -1, 1) * _desvio(rng, n, 8, 3)
+
+    comercial = operador != "GERAL"
+    return pd.DataFrame({
+        "PREVISTO_DATA": calco.normalize(),
+        "MOVIMENTO_TIPO": movimento,
+        "AERONAVE_MARCAS": _matriculas(rng, n),
+        "AERONAVE_OPERADOR": operador,
+        "VOO_NUMERO": rng.integers(1000, 9999, n),
+        "CALCO_DATA": calco.normalize(),
+        "CALCO_HORARIO": calco.strftime("%H:%M:%S"),
+        "TOQUE_DATA": toque.normalize(),
+        "TOQUE_HORARIO": toque.strftime("%H:%M:%S"),
+        "PAX_LOCAL": np.where(comercial, rng.integers(40, 180, n), rng.integers(0, 6, n)),
+        "PAX_CONEXAO_DOMESTICO": np.where(comercial, rng.integers(0, 30, n), 0),
+    })
+
+
+def gravar_scena(df, caminho):
+    with pd.ExcelWriter(caminho) as planilha:
+        df.to_excel(planilha, sheet_name="data", index=False)
+
+
+def gravar_rima(df, caminho):
+    df.to_excel(caminho, index=False)
@@ -0,0 +1,131 @@
+import dataclasses
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from carregamento import copiar_df, copy_on_write_ativo
+
+
+# ========================
+# 🗃️ Cache LRU de arquivos já lidos (chave = hash do conteúdo)
+# ========================
+def hash_conteudo(arquivo):
+    # Aceita UploadedFile/BytesIO (getvalue) ou bytes puros
+    conteudo = arquivo.getvalue() if hasattr(arquivo, "getvalue") else bytes(arquivo)
+    return hashlib.blake2b(conteudo, digest_size=16).hexdigest()
+
+
+def _tamanho_resultado(resultado):
+    # Soma o uso de memória de todos os DataFrames e arrays do resultado
+    if isinstance(resultado, (pd.DataFrame, pd.Series, pd.Index)):
+        return int(np.sum(resultado.memory_usage(deep=True)))
+    if isinstance(resultado, np.ndarray):
+        if resultado.dtype == object:
+            # nbytes só conta os ponteiros: soma também os objetos apontados
+            return int(pd.Series(resultado.ravel(), copy=False).memory_usage(deep=True, index=False))
+        return resultado.nbytes
+    if isinstance(resultado, (tuple, list)):
+        return sum(_tamanho_resultado(item) for item in resultado)
+    if isinstance(resultado, dict):
+        # Ex.: tabelas do vigia de pasta por nome
+        return sum(_tamanho_resultado(valor) for valor in resultado.values())
+    if hasattr(resultado, "__dict__"):
+        # Estruturas pré-calculadas (ex.: cubo do horário de pico, movimentos SCENA)
+        return sum(_tamanho_resultado(valor) for valor in vars(resultado).values())
+    return 0
+
+
+def _copiar_resultado(resultado):
+    # Cópias rasas com copy-on-write: alterar a cópia não afeta o item em cache,
+    # que é compartilhado por todas as sessões. Os arrays numpy das estruturas
+    # pré-calculadas não são copiados e devem ser tratados como somente leitura
+    if isinstance(resultado, pd.DataFrame):
+        return copiar_df(resultado)
+    if isinstance(resultado, pd.Series):
+        return resultado.copy(deep=not copy_on_write_ativo())
+    if isinstance(resultado, tuple):
+        return tuple(_copiar_resultado(item) for item in resultado)
+    if isinstance(resultado, list):
+        return [_copiar_resultado(item) for item in resultado]
+    if isinstance(resultado, dict):
+        return {chave: _copiar_resultado(valor) for chave, valor in resultado.items()}
+    if dataclasses.is_dataclass(resultado) and not isinstance(resultado, type):
+        # Ex.: MovimentosScena.df, Conciliacao, IndiceMovimentos
+        return dataclasses.replace(resultado, **{
+            campo.name: _copiar_resultado(getattr(resultado, campo.name))
+            for campo in dataclasses.fields(resultado) if campo.init
+        })
+    return resultado
+
+
+class CacheArquivos:
+    def __init__(self, max_bytes=512 * 1024 * 1024, max_entradas=16):
+        self.max_bytes = max_bytes
+        self.max_entradas = max_entradas
+        self.acertos = 0
+        self.falhas = 0
+        self.descartes = 0
+        self._itens = OrderedDict()
+        self._bytes_totais = 0
+        self._trava = threading.Lock()
+
+    def em_cache(self, chave):
+        with self._trava:
+            return chave in self._itens
+
+    def obter(self, chave, carregar):
+        with self._trava:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return _copiar_resultado(self._itens[chave][0])
+            self.falhas += 1
+
+        resultado = carregar()
+        tamanho = _tamanho_resultado(resultado)
+
+        with self._trava:
+            if tamanho <= self.max_bytes:
+                if chave in self._itens:
+                    self._bytes_totais -= self._itens.pop(chave)[1]
+                self._itens[chave] = (resultado, tamanho)
+                self._bytes_totais += tamanho
+                self._descartar_excedentes()
+
+        return _copiar_resultado(resultado)
+
+    @staticmethod
+    def chave_arquivo(funcao, arquivo):
+        return (funcao.__name__, hash_conteudo(arquivo))
+
+    def carregar(self, funcao, arquivo):
+        chave = self.chave_arquivo(funcao, arquivo)
+        if hasattr(arquivo, "seek"):
+            arquivo.seek(0)
+        return self.obter(chave, lambda: funcao(arquivo))
+
+    def _descartar_excedentes(self):
+        while self._itens and (
+            self._bytes_totais > self.max_bytes or len(self._itens) > self.max_entradas
+        ):
+            _, (_, tamanho) = self._itens.popitem(last=False)
+            self._bytes_totais -= tamanho
+            self.descartes += 1
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+            self._bytes_totais = 0
+
+    def estatisticas(self):
+        with self._trava:
+            return {
+                "entradas": len(self._itens),
+                "bytes": self._bytes_totais,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "descartes": self.descartes,
+            }
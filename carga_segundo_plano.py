@@ -0,0 +1,72 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# ========================
+# ⏳ Carga em segundo plano: progresso e cancelamento (sem dependência do Streamlit)
+# ========================
+class CargaCancelada(Exception):
+    pass
+
+
+def subprogresso(progresso, inicio, fim):
+    # Repassa o progresso de uma etapa (0 a 1) para a faixa [inicio, fim] do total
+    if progresso is None:
+        return None
+    return lambda fracao, mensagem: progresso(inicio + (fim - inicio) * fracao, mensagem)
+
+
+class TarefaCarga:
+    def __init__(self, nome):
+        self.nome = nome
+        self.fracao = 0.0
+        self.mensagem = "Na fila"
+        self.segundos = None
+        self._cancelar = threading.Event()
+        self._futuro = None
+
+    def progresso(self, fracao, mensagem):
+        # Chamado pela carga; é também o ponto em que o cancelamento é atendido
+        if self._cancelar.is_set():
+            raise CargaCancelada(self.nome)
+        self.fracao = max(0.0, min(float(fracao), 1.0))
+        self.mensagem = mensagem
+
+    def cancelar(self):
+        self._cancelar.set()
+
+    @property
+    def cancelada(self):
+        return self._cancelar.is_set()
+
+    @property
+    def concluida(self):
+        return self._futuro is not None and self._futuro.done()
+
+    def erro(self):
+        return self._futuro.exception() if self.concluida else None
+
+    def resultado(self):
+        return self._futuro.result()
+
+
+class ExecutorCargas:
+    # Threads: o arquivo enviado e o cache em memória são compartilhados sem cópia
+    def __init__(self, max_workers=2):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="carga")
+
+    def iniciar(self, nome, funcao):
+        # funcao(progresso) roda numa thread do pool
+        tarefa = TarefaCarga(nome)
+
+        def executar():
+            inicio = time.perf_counter()
+            try:
+                tarefa.progresso(0.0, "Iniciando")
+                return funcao(tarefa.progresso)
+            finally:
+                tarefa.segundos = time.perf_counter() - inicio
+
+        tarefa._futuro = self._executor.submit(executar)
+        return tarefa
@@ -0,0 +1,360 @@
+import codecs
+import csv
+import os
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from carga_segundo_plano import subprogresso
+from leitores_excel import ler_excel
+
+
+# ========================
+# 🐄 Copy-on-write: cópias rasas seguras (dados só são copiados ao alterar)
+# ========================
+# No pandas 3 o copy-on-write é sempre ativo; no 2.x cada ponto de entrada
+# (app, validação em lote, vigia, serviço, benchmark) liga com ativar_copy_on_write
+PANDAS_3 = int(pd.__version__.split(".")[0]) >= 3
+
+
+def ativar_copy_on_write():
+    if not PANDAS_3:
+        pd.set_option("mode.copy_on_write", True)
+
+
+def copy_on_write_ativo():
+    return PANDAS_3 or pd.get_option("mode.copy_on_write") is True
+
+
+def copiar_df(df):
+    # Cópia rasa quando o copy-on-write protege o original; senão, cópia completa
+    return df.copy(deep=not copy_on_write_ativo())
+
+
+# ========================
+# 📐 Esquemas de ingestão: só as colunas usadas, já tipadas
+# ========================
+# Colunas SCENA lidas (também nas variantes "Assoc. <coluna>")
+COLUNAS_DATA_SCENA = ["Data", "ETime", "AIBT", "F.ETime", "ALDT", "AOBT", "ATOT"]
+COLUNAS_CATEGORICAS_SCENA = ["Sit.", "Est.", "Sv.", "Stand"]
+COLUNAS_TEXTO_SCENA = ["Id.Vuelo", "Registro", "Id.Asociado"]
+COLUNAS_SCENA = set(["Fecha"] + COLUNAS_DATA_SCENA + COLUNAS_CATEGORICAS_SCENA + COLUNAS_TEXTO_SCENA)
+
+COLUNAS_DATA_RIMA = ["CALCO_DATA", "TOQUE_DATA", "PREVISTO_DATA"]
+COLUNAS_CATEGORICAS_RIMA = ["MOVIMENTO_TIPO", "AERONAVE_OPERADOR"]
+COLUNAS_NUMERICAS_RIMA = ["PAX_LOCAL", "PAX_CONEXAO_DOMESTICO"]
+COLUNAS_TEXTO_RIMA = ["AERONAVE_MARCAS", "VOO_NUMERO", "CALCO_HORARIO", "TOQUE_HORARIO"]
+COLUNAS_RIMA = set(COLUNAS_DATA_RIMA + COLUNAS_CATEGORICAS_RIMA + COLUNAS_NUMERICAS_RIMA + COLUNAS_TEXTO_RIMA)
+
+
+def coluna_base(coluna):
+    return str(coluna).replace("Assoc. ", "", 1)
+
+
+def _usar_coluna_scena(coluna):
+    return coluna_base(coluna) in COLUNAS_SCENA
+
+
+def _usar_coluna_rima(coluna):
+    return str(coluna) in COLUNAS_RIMA
+
+
+def normalizar_chave(serie):
+    # Matrícula/Id.Vuelo comparável entre SCENA e RIMA: "PR-ABC", "pr abc" e
+    # "PRABC" viram "PRABC"; vazio ou só pontuação vira <NA>
+    return serie.astype("string").str.upper().str.replace(r"[^A-Z0-9]", "", regex=True).replace("", pd.NA)
+
+
+def memoria_df(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def _avisar(progresso, fracao, mensagem):
+    if progresso is not None:
+        progresso(fracao, mensagem)
+
+
+# ========================
+# 🕒 Normalização de datas: formato detectado uma vez, conversão explícita
+# ========================
+FORMATOS_DATA = [
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M",
+    "%d/%m/%Y",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%d",
+    "%d-%m-%Y %H:%M",
+    "%d-%m-%Y",
+]
+
+# Último formato detectado por coluna: testado primeiro na próxima carga
+_formatos_detectados = {}
+
+
+def detectar_formato_data(valores, coluna=None, tamanho_amostra=200):
+    amostra = []
+    for valor in valores:
+        if isinstance(valor, str) and valor.strip():
+            amostra.append(valor)
+            if len(amostra) >= tamanho_amostra:
+                break
+    if not amostra:
+        return None
+
+    candidatos = FORMATOS_DATA
+    if coluna in _formatos_detectados:
+        candidatos = [_formatos_detectados[coluna]] + [f for f in FORMATOS_DATA if f != _formatos_detectados[coluna]]
+
+    amostra = pd.Series(amostra, dtype=object)
+    for formato in candidatos:
+        if pd.to_datetime(amostra, format=formato, errors="coerce").notna().all():
+            if coluna is not None:
+                _formatos_detectados[coluna] = formato
+            return formato
+    return None
+
+
+def normalizar_datas(df, colunas):
+    # Converte in-place e devolve {coluna: valores não interpretáveis}
+    invalidas = {}
+    for coluna in colunas:
+        serie = df[coluna]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            continue
+
+        formato = detectar_formato_data(serie.dropna().to_numpy()[:5000], coluna_base(coluna))
+        if formato is None:
+            # Nenhum formato conhecido cobre a amostra: inferência dia-primeiro
+            convertida = pd.to_datetime(serie, dayfirst=True, errors="coerce")
+        else:
+            convertida = pd.to_datetime(serie, format=formato, errors="coerce")
+
+        nao_interpretadas = int((serie.notna() & convertida.isna()).sum())
+        if nao_interpretadas:
+            invalidas[coluna] = nao_interpretadas
+        df[coluna] = convertida
+    return invalidas
+
+
+def _tipar_categoricas(df, colunas):
+    for coluna in df.columns:
+        if coluna_base(coluna) in colunas:
+            df[coluna] = df[coluna].astype("category")
+
+
+def _registrar_relatorio(df, memoria_sem_tipagem, datas_invalidas, motor=None):
+    # Relatório de memória anexado ao DataFrame (sobrevive a cópias). As duas
+    # medidas são só das colunas lidas: as descartadas por usecols nunca chegam
+    # a ser carregadas, então não há como medir a planilha inteira
+    df.attrs["relatorio_carga"] = {
+        "colunas": len(df.columns),
+        "linhas": len(df),
+        "memoria_sem_tipagem": memoria_sem_tipagem,
+        "memoria_depois": memoria_df(df),
+        "datas_invalidas": datas_invalidas,
+        "motor": motor,
+    }
+
+
+# ========================
+# 📥 Funções para carregar dados (sem dependência do Streamlit)
+# ========================
+def carregar_voos(arquivo, progresso=None):
+    # progresso(fração, mensagem), opcional: usado pela carga em segundo plano
+    _avisar(progresso, 0.0, "Lendo a planilha")
+    df, motor = ler_excel(arquivo, sheet_name="data", usecols=_usar_coluna_scena, progresso=subprogresso(progresso, 0.0, 0.8))
+
+    # Renomear coluna de data, se necessário
+    df.rename(columns={"Fecha": "Data", "Assoc. Fecha": "Assoc. Data"}, inplace=True)
+
+    # Filtros só geram um novo DataFrame quando descartam alguma linha
+    com_id = df["Id.Vuelo"].notna()
+    if not com_id.all():
+        df = df[com_id]
+    memoria_sem_tipagem = memoria_df(df)
+
+    _avisar(progresso, 0.8, "Convertendo datas e horários")
+    # Converter colunas que existirem (inclusive as "Assoc.")
+    datas_invalidas = normalizar_datas(df, [col for col in df.columns if coluna_base(col) in COLUNAS_DATA_SCENA])
+
+    _tipar_categoricas(df, COLUNAS_CATEGORICAS_SCENA)
+    _registrar_relatorio(df, memoria_sem_tipagem, datas_invalidas, motor)
+
+    df_completo = copiar_df(df)
+
+    # Filtrar datas a partir de 01/02/2024, se a coluna existir (NaT fica de fora)
+    if "Data" in df.columns:
+        a_partir = df["Data"] >= pd.Timestamp("2024-02-01")
+        if not a_partir.all():
+            df = df[a_partir]
+
+    _avisar(progresso, 1.0, "Concluído")
+    return df, df_completo
+
+
+def extrair_saida_associada(df_completo):
+    df_saida = df_completo[[col for col in df_completo.columns if col.startswith("Assoc.")]]
+    df_saida.columns = [col.replace("Assoc. ", "") for col in df_saida.columns]
+    df_saida = df_saida.loc[:, ~df_saida.columns.duplicated()]
+
+    # As colunas de data "Assoc." já chegam convertidas por carregar_voos
+    return df_saida
+
+
+def identificar_estrutura(colunas):
+    colunas = [str(col) for col in colunas]
+    tem_chegada = "AIBT" in colunas
+    tem_saida_associada = any(col.startswith("Assoc.") for col in colunas)
+    tem_saida_simples = "AOBT" in colunas and not tem_saida_associada and not tem_chegada
+    return tem_chegada, tem_saida_associada, tem_saida_simples
+
+
+def _tipar_rima(df):
+    # Conversões do RIMA, in-place; devolve as datas não interpretáveis
+    datas_invalidas = normalizar_datas(df, [col for col in COLUNAS_DATA_RIMA if col in df.columns])
+    for coluna in COLUNAS_NUMERICAS_RIMA:
+        if coluna in df.columns:
+            df[coluna] = pd.to_numeric(df[coluna], errors="coerce")
+
+    _tipar_categoricas(df, COLUNAS_CATEGORICAS_RIMA)
+    return datas_invalidas
+
+
+def carregar_rima(arquivo, progresso=None):
+    if eh_csv(arquivo):
+        df = _ler_rima_csv(arquivo, progresso)
+        _avisar(progresso, 1.0, "Concluído")
+        return df, copiar_df(df)
+
+    _avisar(progresso, 0.0, "Lendo a planilha")
+    df, motor = ler_excel(arquivo, usecols=_usar_coluna_rima, progresso=subprogresso(progresso, 0.0, 0.8))
+    memoria_sem_tipagem = memoria_df(df)
+
+    _avisar(progresso, 0.8, "Convertendo datas e números")
+    datas_invalidas = _tipar_rima(df)
+    _registrar_relatorio(df, memoria_sem_tipagem, datas_invalidas, motor)
+
+    _avisar(progresso, 1.0, "Concluído")
+    return df, copiar_df(df)
+
+
+# ========================
+# 📄 RIMA em CSV: leitura em blocos, tipados à medida que chegam
+# ========================
+TAMANHO_BLOCO_CSV = 100_000
+TAMANHO_AMOSTRA_CSV = 64 * 1024
+CODIFICACOES_CSV = ["utf-8-sig", "cp1252", "latin-1"]
+DELIMITADORES_CSV = ";,\t|"
+
+
+def eh_csv(arquivo):
+    nome = arquivo if isinstance(arquivo, (str, os.PathLike)) else getattr(arquivo, "name", "")
+    return str(nome).lower().endswith(".csv")
+
+
+def _tamanho_arquivo(arquivo):
+    if hasattr(arquivo, "getbuffer"):
+        return arquivo.getbuffer().nbytes
+    if isinstance(arquivo, (str, os.PathLike)):
+        return os.path.getsize(arquivo)
+    return None
+
+
+def _ler_amostra(arquivo):
+    if hasattr(arquivo, "read"):
+        arquivo.seek(0)
+        amostra = arquivo.read(TAMANHO_AMOSTRA_CSV)
+        arquivo.seek(0)
+        return amostra
+    with open(arquivo, "rb") as f:
+        return f.read(TAMANHO_AMOSTRA_CSV)
+
+
+def detectar_formato_csv(amostra):
+    # (codificações candidatas, delimitador) a partir dos primeiros bytes
+    codificacoes = list(CODIFICACOES_CSV)
+    for codificacao in CODIFICACOES_CSV:
+        try:
+            # final=False: a amostra pode cortar um caractere multibyte no fim
+            texto = codecs.getincrementaldecoder(codificacao)().decode(amostra, final=False)
+            break
+        except UnicodeDecodeError:
+            codificacoes.remove(codificacao)
+
+    cabecalho = texto.split("\n", 1)[0]
+    linhas_completas = texto[:texto.rfind("\n") + 1] or texto
+    try:
+        delimitador = csv.Sniffer().sniff(linhas_completas, delimiters=DELIMITADORES_CSV).delimiter
+    except csv.Error:
+        # Amostra ambígua: o delimitador mais frequente no cabeçalho
+        delimitador = max(DELIMITADORES_CSV, key=cabecalho.count)
+    return codificacoes, delimitador
+
+
+def concatenar_blocos(blocos):
+    # Categorias diferentes por bloco: unir antes de concatenar, senão viram object
+    df = pd.concat(blocos, ignore_index=True)
+    for coluna in df.columns:
+        partes = [bloco[coluna] for bloco in blocos if coluna in bloco.columns]
+        if len(partes) == len(blocos) and all(isinstance(parte.dtype, pd.CategoricalDtype) for parte in partes):
+            try:
+                df[coluna] = union_categoricals(partes)
+            except TypeError:
+                # Categorias de tipos diferentes (ex.: Stand só numérico numa das partes): fica object
+                pass
+    return df
+
+
+def _ler_rima_csv(arquivo, progresso=None):
+    amostra = _ler_amostra(arquivo)
+    codificacoes, delimitador = detectar_formato_csv(amostra)
+    # Linhas estimadas pelo tamanho médio das linhas da amostra (só para o progresso)
+    tamanho = _tamanho_arquivo(arquivo)
+    linhas_estimadas = tamanho * amostra.count(b"\n") / len(amostra) if tamanho and amostra else None
+    # Tudo como texto na leitura; cada bloco é tipado antes do próximo ser lido
+    esquema = dict.fromkeys(COLUNAS_RIMA, str)
+
+    for codificacao in codificacoes:
+        if hasattr(arquivo, "seek"):
+            arquivo.seek(0)
+        blocos, memoria_sem_tipagem, datas_invalidas = [], 0, {}
+        try:
+            with pd.read_csv(
+                arquivo,
+                sep=delimitador,
+                encoding=codificacao,
+                usecols=_usar_coluna_rima,
+                dtype=esquema,
+                chunksize=TAMANHO_BLOCO_CSV,
+            ) as leitor:
+                for bloco in leitor:
+                    if linhas_estimadas:
+                        lidas = len(blocos) * TAMANHO_BLOCO_CSV + len(bloco)
+                        _avisar(progresso, min(lidas / linhas_estimadas, 0.95), f"{lidas:,} linhas lidas".replace(",", "."))
+                    memoria_sem_tipagem += memoria_df(bloco)
+                    for coluna, n in _tipar_rima(bloco).items():
+                        datas_invalidas[coluna] = datas_invalidas.get(coluna, 0) + n
+                    blocos.append(bloco)
+            break
+        except UnicodeDecodeError:
+            # Byte inválido depois da amostra: tenta a próxima codificação
+            continue
+    else:
+        raise ValueError("Não foi possível identificar a codificação do CSV RIMA.")
+
+    df = concatenar_blocos(blocos)
+    _registrar_relatorio(df, memoria_sem_tipagem, datas_invalidas, f"csv ({codificacao}, '{delimitador}')")
+    return df
+
+
+# ========================
+# 🔎 Identificação do tipo de arquivo (SCENA x RIMA)
+# ========================
+def tipo_arquivo(caminho):
+    # CSV só existe para o RIMA
+    if eh_csv(caminho):
+        return "RIMA"
+    # Exportações SCENA sempre trazem a aba "data"; o RIMA tem uma única aba
+    with pd.ExcelFile(caminho) as planilha:
+        return "SCENA" if "data" in planilha.sheet_names else "RIMA"
@@ -0,0 +1,139 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from carregamento import normalizar_chave
+from horario_pico import converter_horario
+
+
+# ========================
+# 🔗 Conciliação SCENA ↔ RIMA: merge_asof por matrícula e movimento
+# ========================
+# Pouso (P): AIBT ↔ CALCO e ALDT ↔ TOQUE; decolagem (D): AOBT ↔ CALCO e ATOT ↔ TOQUE
+HORARIOS_SCENA = {"P": ("AIBT", "ALDT", "Voo chegada"), "D": ("AOBT", "ATOT", "Voo saída")}
+MOVIMENTOS_RIMA = {"P": "Pouso", "D": "Decolagem"}
+
+COLUNAS_RIMA_CONCILIACAO = [
+    "MOVIMENTO_TIPO", "AERONAVE_MARCAS", "VOO_NUMERO", "CALCO_DATA", "CALCO_HORARIO", "TOQUE_DATA", "TOQUE_HORARIO",
+]
+COLUNAS_CONCILIADOS = [
+    "Movimento", "Matrícula", "Voo", "Nº Voo RIMA",
+    "Calço SCENA", "Calço RIMA", "Δ Calço (min)", "Toque SCENA", "Toque RIMA", "Δ Toque (min)",
+]
+
+
+@dataclass
+class Conciliacao:
+    conciliados: pd.DataFrame
+    scena_sem_par: pd.DataFrame
+    rima_sem_par: pd.DataFrame
+
+
+def movimentos_scena_conciliacao(giros):
+    # Um movimento por metade de giro OPE (pouso e decolagem)
+    operados = giros.loc[giros["Sit."].eq("OPE").fillna(False).to_numpy(dtype=bool)]
+    partes = []
+    for movimento, (calco, toque, voo) in HORARIOS_SCENA.items():
+        parte = pd.DataFrame({
+            "Movimento": movimento,
+            "Matrícula": normalizar_chave(operados["Registro"]).astype(object),
+            "Voo": operados[voo].astype(object),
+            "Calço": operados[calco],
+            "Toque": operados[toque],
+            "Linha SCENA": operados.index.to_numpy() + 2,
+        })
+        partes.append(parte[parte["Calço"].notna() | parte["Toque"].notna()])
+    return pd.concat(partes, ignore_index=True)
+
+
+def _instante(data, horario):
+    # Data já normalizada + "HH:MM" do RIMA
+    return data.dt.normalize() + pd.to_timedelta(converter_horario(horario), unit="m")
+
+
+def movimentos_rima_conciliacao(df_rima):
+    return pd.DataFrame({
+        "Movimento": df_rima["MOVIMENTO_TIPO"].astype("string").str.upper().astype(object),
+        "Matrícula": normalizar_chave(df_rima["AERONAVE_MARCAS"]).astype(object),
+        "Nº Voo RIMA": df_rima["VOO_NUMERO"].astype("string").str.replace(",", "").str.strip().astype(object),
+        "Calço": _instante(df_rima["CALCO_DATA"], df_rima["CALCO_HORARIO"]).to_numpy(),
+        "Toque": _instante(df_rima["TOQUE_DATA"], df_rima["TOQUE_HORARIO"]).to_numpy(),
+    }).reset_index(drop=True)
+
+
+def _preparar(movimentos):
+    # Chave de tempo: calço, ou toque quando falta o calço; sem chave não há como casar
+    movimentos = movimentos.assign(Instante=movimentos["Calço"].fillna(movimentos["Toque"]).astype("datetime64[ns]"))
+    com_chave = movimentos["Instante"].notna() & movimentos["Matrícula"].notna()
+    return movimentos[com_chave].sort_values("Instante", kind="stable"), movimentos[~com_chave]
+
+
+def _casar_mais_proximo(scena, rima, tolerancia):
+    # (pares, perdedores, sem par): cada SCENA pega o RIMA mais próximo; um RIMA
+    # disputado fica com o SCENA mais próximo e os outros voltam para a próxima rodada
+    casados = pd.merge_asof(
+        scena,
+        rima.rename(columns={"Calço": "Calço RIMA", "Toque": "Toque RIMA", "Instante": "Instante RIMA"})
+        .assign(Instante=lambda df: df["Instante RIMA"]),
+        on="Instante",
+        by=["Matrícula", "Movimento"],
+        tolerance=tolerancia,
+        direction="nearest",
+    )
+    casou = casados["Registro RIMA"].notna().to_numpy()
+    distancia = (casados["Instante"] - casados["Instante RIMA"]).abs()
+    ordem = np.lexsort((casados["Instante"].to_numpy(), distancia.to_numpy()))
+    perdeu = np.zeros(len(casados), dtype=bool)
+    perdeu[ordem] = casados["Registro RIMA"].iloc[ordem].duplicated().to_numpy() & casou[ordem]
+    return casados[casou & ~perdeu], scena[perdeu], scena[~casou]
+
+
+def conciliar(giros, df_rima, tolerancia_min=30):
+    # Cada movimento SCENA casa com o registro RIMA mais próximo (mesma matrícula e
+    # movimento) dentro da tolerância: ordenação + busca binária, sem produto cartesiano.
+    # Quem perde a disputa por um RIMA tenta de novo com os RIMA ainda livres
+    # (circuitos de treinamento seguidos), até nenhuma disputa sobrar
+    scena, scena_sem_chave = _preparar(movimentos_scena_conciliacao(giros))
+    rima, rima_sem_chave = _preparar(movimentos_rima_conciliacao(df_rima).rename_axis("Registro RIMA").reset_index())
+    tolerancia = pd.Timedelta(minutes=tolerancia_min)
+
+    rodadas, sem_par, pendentes, livres = [], [], scena, rima
+    while True:
+        pares, pendentes, sem_par_rodada = _casar_mais_proximo(pendentes, livres, tolerancia)
+        rodadas.append(pares)
+        sem_par.append(sem_par_rodada)
+        livres = livres[~livres["Registro RIMA"].isin(pares["Registro RIMA"].to_numpy())]
+        if pendentes.empty or livres.empty:
+            break
+    sem_par.append(pendentes)
+    pares = pd.concat(rodadas, ignore_index=True).sort_values("Instante", kind="stable")
+
+    conciliados = pd.DataFrame({
+        "Movimento": pares["Movimento"].map(MOVIMENTOS_RIMA),
+        "Matrícula": pares["Matrícula"],
+        "Voo": pares["Voo"],
+        "Nº Voo RIMA": pares["Nº Voo RIMA"],
+        "Calço SCENA": pares["Calço"],
+        "Calço RIMA": pares["Calço RIMA"],
+        "Δ Calço (min)": ((pares["Calço"] - pares["Calço RIMA"]).dt.total_seconds() / 60).round(1),
+        "Toque SCENA": pares["Toque"],
+        "Toque RIMA": pares["Toque RIMA"],
+        "Δ Toque (min)": ((pares["Toque"] - pares["Toque RIMA"]).dt.total_seconds() / 60).round(1),
+    }, columns=COLUNAS_CONCILIADOS).reset_index(drop=True)
+
+    scena_sem_par = pd.concat([*(parte[scena_sem_chave.columns] for parte in sem_par), scena_sem_chave], ignore_index=True)
+    usados = pares["Registro RIMA"].to_numpy()
+    rima_sem_par = pd.concat(
+        [rima[~rima["Registro RIMA"].isin(usados)], rima_sem_chave], ignore_index=True
+    ).drop(columns=["Instante", "Registro RIMA"])
+    for df in (scena_sem_par, rima_sem_par):
+        df["Movimento"] = df["Movimento"].map(MOVIMENTOS_RIMA).fillna(df["Movimento"])
+    return Conciliacao(conciliados, scena_sem_par.drop(columns=["Instante"], errors="ignore"), rima_sem_par)
+
+
+def divergencias_conciliacao(conciliacao, limite_min=5):
+    # Pares casados cujo calço ou toque difere mais que o limite
+    conciliados = conciliacao.conciliados
+    divergente = (conciliados["Δ Calço (min)"].abs() > limite_min) | (conciliados["Δ Toque (min)"].abs() > limite_min)
+    return conciliados[divergente.to_numpy()]
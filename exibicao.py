@@ -0,0 +1,79 @@
+import math
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+
+# ========================
+# 📄 Tabelas paginadas com destaque vetorizado
+# ========================
+TAMANHO_PAGINA = 500
+COR_DESTAQUE = "background-color: #ffcccc"
+SEM_ORDENACAO = "(ordem original)"
+
+
+def _css_destaque(pagina, mascara, colunas):
+    # Uma única matriz de estilos para a página inteira (Styler.apply com axis=None)
+    css = np.full(pagina.shape, "", dtype=object)
+    alvo = [pagina.columns.get_loc(col) for col in colunas] if colunas else slice(None)
+    css[np.ix_(mascara, np.arange(pagina.shape[1])[alvo])] = COR_DESTAQUE
+    return pd.DataFrame(css, index=pagina.index, columns=pagina.columns)
+
+
+def mesmo_minuto(a, b):
+    # Mesmo horário HH:MM exibido: compara só a hora do dia, sem a data
+    return a.dt.floor("min").dt.time == b.dt.floor("min").dt.time
+
+
+def _ordem(serie, decrescente):
+    try:
+        ordenada = serie.sort_values(ascending=not decrescente, kind="stable", na_position="last")
+    except TypeError:
+        # Colunas com tipos misturados (ex.: Stand numérico e texto)
+        ordenada = serie.astype(str).sort_values(ascending=not decrescente, kind="stable")
+    return ordenada.index.to_numpy()
+
+
+def mostrar_tabela(df, chave, destaque=None, colunas_destaque=None, formatos=None, tamanho_pagina=TAMANHO_PAGINA):
+    # df chega com os valores brutos; só a página exibida é formatada e estilizada
+    df = df.reset_index(drop=True)
+    posicoes = np.arange(len(df))
+
+    if len(df) > tamanho_pagina:
+        total_paginas = math.ceil(len(df) / tamanho_pagina)
+        c1, c2, c3, c4 = st.columns([2, 1, 1, 2])
+        coluna = c1.selectbox("Ordenar por", [SEM_ORDENACAO] + list(df.columns), key=f"{chave}_ordenar")
+        decrescente = c2.toggle("Decrescente", key=f"{chave}_decrescente")
+        pagina = c3.number_input("Página", min_value=1, max_value=total_paginas, value=1, key=f"{chave}_pagina")
+        c4.caption(f"{len(df)} linhas – página {pagina} de {total_paginas}")
+
+        if coluna != SEM_ORDENACAO:
+            posicoes = _ordem(df[coluna], decrescente)
+        posicoes = posicoes[(pagina - 1) * tamanho_pagina:pagina * tamanho_pagina]
+
+    st.dataframe(preparar_pagina(df, posicoes, destaque, colunas_destaque, formatos), hide_index=True, use_container_width=True)
+
+
+def preparar_pagina(df, posicoes, destaque=None, colunas_destaque=None, formatos=None):
+    # Linhas da página formatadas; Styler só quando alguma delas é destacada
+    pagina_df = df.iloc[posicoes]
+    if formatos:
+        pagina_df = pagina_df.assign(**{coluna: pagina_df[coluna].dt.strftime(formato) for coluna, formato in formatos.items()})
+
+    if destaque is not None:
+        mascara = np.asarray(destaque, dtype=bool)[posicoes]
+        if mascara.any():
+            return pagina_df.style.apply(_css_destaque, axis=None, mascara=mascara, colunas=colunas_destaque)
+    return pagina_df
+
+
+def tabela_associados(df):
+    # Id.Asociado vazio vira "–"; quando preenchido (e diferente do Id.Vuelo) fica destacado
+    destaque = df["Id.Asociado"].notna().to_numpy()
+    return df.assign(**{"Id.Asociado": df["Id.Asociado"].astype(object).fillna("–")}), destaque
+
+
+def mostrar_tabela_associados(df, chave):
+    df, destaque = tabela_associados(df)
+    mostrar_tabela(df, chave, destaque=destaque, colunas_destaque=["Id.Asociado"], formatos={"Data": "%d/%m/%Y"})
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+from carregamento import identificar_estrutura
+
+
+# ========================
+# 🔄 Giros: uma linha por visita da aeronave (chegada → saída)
+# ========================
+# Métrica: (início, fim) em minutos
+METRICAS_GIRO = {
+    "Solo (min)": ("AIBT", "AOBT"),
+    "Taxi-in (min)": ("ALDT", "AIBT"),
+    "Taxi-out (min)": ("AOBT", "ATOT"),
+}
+COLUNAS_HORARIO_GIRO = ["ALDT", "AIBT", "AOBT", "ATOT"]
+COLUNAS_DISTRIBUICAO = ["Voos", "Média", "Mediana", "P90", "Máximo"]
+
+
+def operador_voo(id_vuelo):
+    # Prefixo do Id.Vuelo ("AZU1234" -> "AZU"); voos ZZZ- são aviação geral/militar
+    texto = id_vuelo.astype("string")
+    avg = texto.str.startswith("ZZZ-").fillna(False).astype(bool)
+    return texto.str[:3].mask(avg, "AVG")
+
+
+def montar_giros(df_completo):
+    tem_chegada, tem_saida_associada, tem_saida_simples = identificar_estrutura(df_completo.columns)
+    # Arquivo conjunto: a saída da mesma visita está nas colunas "Assoc."
+    prefixo_saida = "Assoc. " if tem_saida_associada else ""
+    tem_saida = tem_saida_associada or tem_saida_simples
+
+    def coluna(nome, presente, prefixo=""):
+        if presente and prefixo + nome in df_completo.columns:
+            return df_completo[prefixo + nome]
+        return None
+
+    def primeira(nome, tipo):
+        # Valor da chegada; na falta dela, o da saída
+        chegada = coluna(nome, tem_chegada)
+        saida = coluna(nome, tem_saida, prefixo_saida)
+        partes = [serie.astype(tipo) for serie in (chegada, saida) if serie is not None]
+        if not partes:
+            return pd.Series(index=df_completo.index, dtype=tipo)
+        return partes[0] if len(partes) == 1 else partes[0].fillna(partes[1])
+
+    vazio = pd.Series(index=df_completo.index, dtype="datetime64[ns]")
+    horarios = {
+        "ALDT": coluna("ALDT", tem_chegada),
+        "AIBT": coluna("AIBT", tem_chegada),
+        "AOBT": coluna("AOBT", tem_saida, prefixo_saida),
+        "ATOT": coluna("ATOT", tem_saida, prefixo_saida),
+    }
+    id_chegada = coluna("Id.Vuelo", tem_chegada)
+    id_saida = coluna("Id.Vuelo", tem_saida, prefixo_saida)
+
+    giros = pd.DataFrame({
+        "Data": primeira("Data", "datetime64[ns]"),
+        "Registro": primeira("Registro", "string"),
+        "Operador": operador_voo(primeira("Id.Vuelo", "string")).astype("category"),
+        "Stand": primeira("Stand", "string").astype("category"),
+        "Sit.": primeira("Sit.", "string").astype("category"),
+        "Voo chegada": id_chegada if id_chegada is not None else pd.Series(index=df_completo.index, dtype="string"),
+        "Voo saída": id_saida if id_saida is not None else pd.Series(index=df_completo.index, dtype="string"),
+        **{nome: vazio if serie is None else serie for nome, serie in horarios.items()},
+    }, index=df_completo.index)
+
+    for metrica, (inicio, fim) in METRICAS_GIRO.items():
+        giros[metrica] = (giros[fim] - giros[inicio]).dt.total_seconds() / 60
+    return giros
+
+
+def distribuicao_giros(giros, por=None):
+    # Estatísticas de cada métrica (por Stand/Operador, se pedido): só voos OPE
+    # e intervalos não negativos – os negativos já aparecem como violação
+    operados = giros.loc[giros["Sit."].eq("OPE").fillna(False).to_numpy(dtype=bool)]
+    chaves = ([por] if por else []) + ["Métrica"]
+    longo = operados.melt(
+        id_vars=[por] if por else None, value_vars=list(METRICAS_GIRO), var_name="Métrica", value_name="Minutos"
+    )
+    longo = longo[longo["Minutos"] >= 0]
+    if longo.empty:
+        return pd.DataFrame(columns=chaves + COLUNAS_DISTRIBUICAO)
+
+    agrupado = longo.groupby(chaves, observed=True)["Minutos"]
+    distribuicao = pd.DataFrame({
+        "Voos": agrupado.size(),
+        "Média": agrupado.mean(),
+        "Mediana": agrupado.median(),
+        "P90": agrupado.quantile(0.9),
+        "Máximo": agrupado.max(),
+    })
+    return distribuicao.round(1).reset_index()
+
+
+def giros_completos(giros):
+    # Visitas com calço e descalço: as únicas com tempo de solo
+    return int(np.count_nonzero(giros["AIBT"].notna().to_numpy() & giros["AOBT"].notna().to_numpy()))
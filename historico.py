@@ -0,0 +1,188 @@
+import os
+
+import pandas as pd
+
+from carregamento import (
+    COLUNAS_TEXTO_RIMA, COLUNAS_TEXTO_SCENA, coluna_base, concatenar_blocos, identificar_estrutura, memoria_df
+)
+
+
+# ========================
+# 🗄️ Histórico local: Parquet particionado por mês, sem duplicatas
+# ========================
+DIRETORIO_HISTORICO = os.environ.get("SBJU_HISTORICO", "historico_sbju")
+
+# Identidade de cada linha: a versão mais recente (último upload) prevalece
+CHAVES = {
+    "SCENA": ["Id.Vuelo", "Data"],
+    "RIMA": ["AERONAVE_MARCAS", "VOO_NUMERO", "PREVISTO_DATA"],
+}
+COLUNA_PARTICAO = {
+    "SCENA": "Data",
+    "RIMA": "PREVISTO_DATA",
+}
+
+# Linhas sem data de referência: guardadas à parte, só entram em consultas sem período
+PARTICAO_SEM_DATA = "mes=sem_data"
+ARQUIVO_PARTICAO = "dados.parquet"
+
+
+def nome_conjunto(tipo, colunas):
+    # Chegada, saída e conjunto têm colunas diferentes: cada estrutura tem seu histórico
+    if tipo == "RIMA":
+        return "RIMA"
+    tem_chegada, tem_saida_associada, tem_saida_simples = identificar_estrutura(colunas)
+    if tem_saida_associada:
+        return "SCENA_conjunto"
+    if tem_chegada:
+        return "SCENA_chegada"
+    if tem_saida_simples:
+        return "SCENA_saida"
+    raise ValueError("Nenhuma estrutura de chegada ou saída reconhecida para o histórico.")
+
+
+def tipo_conjunto(conjunto):
+    return conjunto.split("_", 1)[0]
+
+
+def conjuntos_disponiveis(diretorio=DIRETORIO_HISTORICO):
+    if not os.path.isdir(diretorio):
+        return []
+    return sorted(nome for nome in os.listdir(diretorio) if os.path.isdir(os.path.join(diretorio, nome)))
+
+
+def _nome_particao(mes):
+    return f"mes={mes}"
+
+
+def _particoes(diretorio, conjunto, inicio=None, fim=None):
+    # Poda por nome da pasta: só os meses que intersectam [inicio, fim]
+    pasta = os.path.join(diretorio, conjunto)
+    if not os.path.isdir(pasta):
+        return []
+
+    sem_periodo = inicio is None and fim is None
+    primeiro = _nome_particao(pd.Timestamp(inicio).strftime("%Y-%m")) if inicio is not None else None
+    ultimo = _nome_particao(pd.Timestamp(fim).strftime("%Y-%m")) if fim is not None else None
+
+    caminhos = []
+    for nome in sorted(os.listdir(pasta)):
+        caminho = os.path.join(pasta, nome, ARQUIVO_PARTICAO)
+        if not os.path.isfile(caminho):
+            continue
+        if nome == PARTICAO_SEM_DATA:
+            if sem_periodo:
+                caminhos.append(caminho)
+            continue
+        if (primeiro is None or nome >= primeiro) and (ultimo is None or nome <= ultimo):
+            caminhos.append(caminho)
+    return caminhos
+
+
+def _como_texto(serie):
+    # VOO_NUMERO vem inteiro do Excel e texto do CSV: no histórico é sempre texto.
+    # Vazios continuam vazios (astype("str") os transformaria em "nan"/"<NA>")
+    if pd.api.types.is_numeric_dtype(serie) and (serie.dropna() % 1 == 0).all():
+        texto = serie.astype("Int64").astype("str")
+    else:
+        texto = serie.astype("str")
+    return texto.where(serie.notna().to_numpy(), None)
+
+
+def _preparar_gravacao(df):
+    # Parquet não grava colunas object com tipos misturados (ex.: Stand 1 e "HOLD")
+    df = df.copy(deep=False)
+    df.attrs = {}
+    colunas_texto = set(COLUNAS_TEXTO_SCENA + COLUNAS_TEXTO_RIMA)
+    for coluna in df.columns:
+        serie = df[coluna]
+        if coluna_base(coluna) in colunas_texto:
+            df[coluna] = _como_texto(serie)
+        elif isinstance(serie.dtype, pd.CategoricalDtype):
+            if serie.cat.categories.dtype == object:
+                df[coluna] = _como_texto(serie).astype("category")
+        elif serie.dtype == object:
+            df[coluna] = _como_texto(serie)
+    return df
+
+
+def _gravar_particao(df, caminho):
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    # Grava ao lado e troca de uma vez: uma falha no meio não corrompe a partição
+    temporario = caminho + ".tmp"
+    df.to_parquet(temporario, index=False)
+    os.replace(temporario, caminho)
+
+
+def _duplicadas(df, chaves):
+    # Com a chave completa vale a última versão; linhas sem chave só são
+    # duplicadas quando todas as colunas coincidem (NaN não identifica ninguém)
+    completas = df[chaves].notna().all(axis=1).to_numpy()
+    return (completas & df.duplicated(chaves, keep="last").to_numpy()) | (~completas & df.duplicated(keep="last").to_numpy())
+
+
+def anexar(df, tipo, diretorio=DIRETORIO_HISTORICO):
+    conjunto = nome_conjunto(tipo, df.columns)
+    chaves = CHAVES[tipo]
+    coluna_data = COLUNA_PARTICAO[tipo]
+
+    df = _preparar_gravacao(df)
+    meses = df[coluna_data].dt.strftime("%Y-%m").fillna("sem_data")
+
+    resumo = {"conjunto": conjunto, "linhas": len(df), "novas": 0, "atualizadas": 0, "meses": []}
+    for mes, novas in df.groupby(meses.to_numpy(), sort=True):
+        caminho = os.path.join(diretorio, conjunto, _nome_particao(mes), ARQUIVO_PARTICAO)
+        # Duplicatas dentro do próprio arquivo: vale a última linha
+        novas = novas[~_duplicadas(novas, chaves)]
+
+        if os.path.isfile(caminho):
+            existentes = pd.read_parquet(caminho)
+            particao = concatenar_blocos([existentes, novas])
+            particao = particao[~_duplicadas(particao, chaves)].reset_index(drop=True)
+            adicionadas = len(particao) - len(existentes)
+        else:
+            adicionadas = len(novas)
+            particao = novas.reset_index(drop=True)
+
+        _gravar_particao(particao, caminho)
+        resumo["novas"] += adicionadas
+        resumo["atualizadas"] += len(novas) - adicionadas
+        resumo["meses"].append(mes)
+    return resumo
+
+
+def consultar(conjunto, inicio=None, fim=None, diretorio=DIRETORIO_HISTORICO):
+    coluna_data = COLUNA_PARTICAO[tipo_conjunto(conjunto)]
+    caminhos = _particoes(diretorio, conjunto, inicio, fim)
+    if not caminhos:
+        return pd.DataFrame()
+
+    df = concatenar_blocos([pd.read_parquet(caminho) for caminho in caminhos])
+
+    # Meses das bordas podem ter dias fora do período pedido
+    filtro = pd.Series(True, index=df.index)
+    if inicio is not None:
+        filtro &= df[coluna_data] >= pd.Timestamp(inicio)
+    if fim is not None:
+        filtro &= df[coluna_data] < pd.Timestamp(fim) + pd.Timedelta(days=1)
+    df = df[filtro].reset_index(drop=True)
+
+    memoria = memoria_df(df)
+    df.attrs["relatorio_carga"] = {
+        "colunas": len(df.columns),
+        "linhas": len(df),
+        "memoria_sem_tipagem": memoria,
+        "memoria_depois": memoria,
+        "datas_invalidas": {},
+        "motor": "parquet",
+    }
+    return df
+
+
+def assinatura(conjunto, inicio=None, fim=None, diretorio=DIRETORIO_HISTORICO):
+    # Muda sempre que alguma partição consultada for regravada (chave do cache)
+    partes = []
+    for caminho in _particoes(diretorio, conjunto, inicio, fim):
+        estado = os.stat(caminho)
+        partes.append((os.path.basename(os.path.dirname(caminho)), estado.st_mtime_ns, estado.st_size))
+    return (conjunto, str(inicio), str(fim), tuple(partes))
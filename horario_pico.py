@@ -0,0 +1,267 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+# ========================
+# 🕓 Horário de pico – cubo hora × operador × movimento
+# ========================
+COLUNAS_PICO = ["CALCO_HORARIO", "PAX_LOCAL", "PAX_CONEXAO_DOMESTICO", "AERONAVE_OPERADOR", "MOVIMENTO_TIPO"]
+
+# Eixo de movimento do cubo: P = pouso (desembarque), D = decolagem (embarque)
+MOVIMENTOS = ("P", "D", "Outros")
+FILTROS_MOVIMENTO = {
+    "Todas": [0, 1, 2],
+    "Desembarque": [0],
+    "Embarque": [1],
+}
+
+COLUNAS_FAIXA = ["Faixa Horária", "Total_PAX", "Total_Operações", "Companhia Aérea", "PAX Total Cia Aérea"]
+
+FAIXAS_HORARIAS = np.array([f"{h:02d}:00 - {h:02d}:59" for h in range(24)], dtype=object)
+
+
+@dataclass
+class CuboPico:
+    # Eixo de operador com uma posição a mais no fim: movimentos sem
+    # AERONAVE_OPERADOR, que entram nos totais mas nunca como companhia do pico
+    operadores: np.ndarray
+    pax: np.ndarray
+    operacoes: np.ndarray
+    horarios_invalidos: int
+
+
+@dataclass
+class EventosPico:
+    # Movimentos comerciais ordenados pelo instante do calço (minutos desde 1970)
+    instantes: np.ndarray
+    pax: np.ndarray
+    movimentos: np.ndarray
+
+
+def converter_horario(serie):
+    # "HH:MM:SS", "HH:MM" ou datetime.time -> minutos desde 00:00 (NaN se inválido)
+    partes = serie.astype(str).str.strip().str.extract(r"^(\d{1,2}):(\d{2})(?::(\d{2}))?$")
+    horas = pd.to_numeric(partes[0], errors="coerce")
+    minutos = pd.to_numeric(partes[1], errors="coerce")
+    validos = (horas < 24) & (minutos < 60)
+    return (horas * 60 + minutos).where(validos).to_numpy(dtype=float)
+
+
+def _comercial(df):
+    # Apenas aviação comercial
+    comercial = df[df["AERONAVE_OPERADOR"].astype("string").ne("GERAL").fillna(True).to_numpy(dtype=bool)]
+
+    minutos = converter_horario(comercial["CALCO_HORARIO"])
+
+    movimento = comercial["MOVIMENTO_TIPO"].astype(str).str.upper().to_numpy()
+    codigo_movimento = np.where(movimento == "P", 0, np.where(movimento == "D", 1, 2))
+
+    total_pax = (
+        pd.to_numeric(comercial["PAX_LOCAL"], errors="coerce").fillna(0).to_numpy(dtype=float)
+        + pd.to_numeric(comercial["PAX_CONEXAO_DOMESTICO"], errors="coerce").fillna(0).to_numpy(dtype=float)
+    )
+    return comercial, minutos, codigo_movimento, total_pax
+
+
+def montar_cubo(df):
+    comercial, minutos, codigo_movimento, total_pax = _comercial(df)
+    validos = ~np.isnan(minutos)
+
+    codigo_operador, operadores = pd.factorize(comercial["AERONAVE_OPERADOR"].astype("string"), sort=True)
+    operadores = np.asarray(operadores, dtype=object)
+    codigo_operador = np.where(codigo_operador < 0, len(operadores), codigo_operador)
+
+    hora = (minutos[validos] // 60).astype(int)
+    formato = (24, len(operadores) + 1, len(MOVIMENTOS))
+    indice = np.ravel_multi_index((hora, codigo_operador[validos], codigo_movimento[validos]), formato)
+    tamanho = int(np.prod(formato))
+
+    return CuboPico(
+        operadores=operadores,
+        pax=np.bincount(indice, weights=total_pax[validos], minlength=tamanho).reshape(formato),
+        operacoes=np.bincount(indice, minlength=tamanho).reshape(formato),
+        horarios_invalidos=int((~validos).sum()),
+    )
+
+
+def fatiar_cubo(cubo, filtro_mov):
+    movimentos = FILTROS_MOVIMENTO[filtro_mov]
+    pax = cubo.pax[:, :, movimentos].sum(axis=2)
+    operacoes = cubo.operacoes[:, :, movimentos].sum(axis=2)
+
+    # Só as faixas com alguma operação no filtro
+    horas = np.flatnonzero(operacoes.sum(axis=1))
+    pax, operacoes = pax[horas], operacoes[horas]
+    if not len(cubo.operadores):
+        return pd.DataFrame(columns=COLUNAS_FAIXA)
+
+    # Companhia com mais PAX na faixa, entre as que operaram nela (sem a posição
+    # dos movimentos sem operador); faixa só com esses fica sem companhia
+    com_operador = operacoes[:, :-1] > 0
+    top = np.where(com_operador, pax[:, :-1], -np.inf).argmax(axis=1)
+    tem_companhia = com_operador.any(axis=1)
+
+    analise_pico = pd.DataFrame({
+        "Faixa Horária": FAIXAS_HORARIAS[horas],
+        "Total_PAX": pax.sum(axis=1),
+        "Total_Operações": operacoes.sum(axis=1),
+        "Companhia Aérea": np.where(tem_companhia, cubo.operadores[top], None),
+        "PAX Total Cia Aérea": np.where(tem_companhia, pax[np.arange(len(horas)), top], 0.0),
+    })
+    return analise_pico.sort_values(by="Total_PAX", ascending=False, kind="stable").reset_index(drop=True)
+
+
+# ========================
+# 🕓 Janela móvel de 60 minutos (resolução de minuto)
+# ========================
+MINUTOS_DIA = 24 * 60
+
+
+def montar_eventos(df):
+    comercial, minutos, codigo_movimento, total_pax = _comercial(df)
+
+    dias = pd.to_datetime(comercial["CALCO_DATA"], errors="coerce").dt.floor("D")
+    validos = ~np.isnan(minutos) & dias.notna().to_numpy()
+
+    instantes = (
+        dias.to_numpy()[validos].astype("datetime64[m]").astype(np.int64)
+        + minutos[validos].astype(np.int64)
+    )
+    ordem = np.argsort(instantes, kind="stable")
+
+    return EventosPico(
+        instantes=instantes[ordem],
+        pax=total_pax[validos][ordem],
+        movimentos=codigo_movimento[validos][ordem],
+    )
+
+
+def _totais_janelas(instantes, pesos_acumulados, fins):
+    # Janela [instante, fim) iniciando em cada evento: duas buscas binárias
+    inicio = np.searchsorted(instantes, instantes, side="left")
+    fim = np.searchsorted(instantes, fins, side="left")
+    return fim - inicio, pesos_acumulados[fim] - pesos_acumulados[inicio]
+
+
+def _melhor_por_dia(dias, totais):
+    # Ordena por (dia, total desc) e pega a primeira janela de cada dia
+    ordem = np.lexsort((-totais, dias))
+    _, primeiros = np.unique(dias[ordem], return_index=True)
+    return ordem[primeiros]
+
+
+def _formatar_janela(inicio, largura):
+    inicio = pd.to_datetime(inicio.astype("datetime64[m]"))
+    fim = inicio + pd.Timedelta(minutes=largura - 1)
+    return inicio.strftime("%H:%M") + " – " + fim.strftime("%H:%M")
+
+
+def picos_janela_movel(eventos, filtro_mov, largura=60):
+    filtro = np.isin(eventos.movimentos, FILTROS_MOVIMENTO[filtro_mov])
+    instantes = eventos.instantes[filtro]
+    pax_acumulado = np.concatenate([[0.0], np.cumsum(eventos.pax[filtro])])
+
+    if not len(instantes):
+        return pd.DataFrame(), {}
+
+    # Janelas do dia não atravessam a meia-noite
+    dias = instantes // MINUTOS_DIA
+    movimentos_dia, pax_dia = _totais_janelas(
+        instantes, pax_acumulado, np.minimum(instantes + largura, (dias + 1) * MINUTOS_DIA)
+    )
+
+    melhor_pax = _melhor_por_dia(dias, pax_dia)
+    melhor_mov = _melhor_por_dia(dias, movimentos_dia)
+
+    por_dia = pd.DataFrame({
+        "Dia": pd.to_datetime(np.unique(dias) * MINUTOS_DIA, unit="m").strftime("%d/%m/%Y"),
+        "Janela Pico PAX": _formatar_janela(instantes[melhor_pax], largura),
+        "PAX na Janela": pax_dia[melhor_pax],
+        "Movimentos (Janela PAX)": movimentos_dia[melhor_pax],
+        "Janela Pico Movimentos": _formatar_janela(instantes[melhor_mov], largura),
+        "Movimentos na Janela": movimentos_dia[melhor_mov],
+    })
+
+    # Arquivo inteiro: a janela pode atravessar a meia-noite
+    movimentos_total, pax_total = _totais_janelas(instantes, pax_acumulado, instantes + largura)
+    i_pax, i_mov = int(pax_total.argmax()), int(movimentos_total.argmax())
+    geral = {
+        "inicio_pax": pd.to_datetime(instantes[i_pax], unit="m"),
+        "pax": float(pax_total[i_pax]),
+        "inicio_movimentos": pd.to_datetime(instantes[i_mov], unit="m"),
+        "movimentos": int(movimentos_total[i_mov]),
+    }
+    return por_dia, geral
+
+
+# ========================
+# 📈 Hora de projeto: matriz dia × hora
+# ========================
+def matriz_dia_hora(eventos, filtro_mov):
+    filtro = np.isin(eventos.movimentos, FILTROS_MOVIMENTO[filtro_mov])
+    instantes = eventos.instantes[filtro]
+    if not len(instantes):
+        return pd.DatetimeIndex([]), np.zeros((0, 24)), np.zeros((0, 24), dtype=int)
+
+    # Todos os dias do período, inclusive os sem movimento (horas zeradas)
+    dia_inicial = instantes.min() // MINUTOS_DIA
+    celula = (instantes // MINUTOS_DIA - dia_inicial) * 24 + (instantes % MINUTOS_DIA) // 60
+    n_dias = int(instantes.max() // MINUTOS_DIA - dia_inicial + 1)
+
+    pax = np.bincount(celula, weights=eventos.pax[filtro], minlength=n_dias * 24).reshape(n_dias, 24)
+    movimentos = np.bincount(celula, minlength=n_dias * 24).reshape(n_dias, 24)
+    dias = pd.to_datetime((dia_inicial + np.arange(n_dias)) * MINUTOS_DIA, unit="m")
+    return dias, pax, movimentos
+
+
+def _enesima_hora(dias, matriz, posicao):
+    valores = matriz.ravel()
+    posicao = min(posicao, len(valores))
+    # Seleção parcial O(n) em vez de ordenar todas as horas do período
+    indice = np.argpartition(-valores, posicao - 1)[posicao - 1]
+    dia, hora = divmod(int(indice), 24)
+    return valores[indice], f"{dias[dia]:%d/%m/%Y} {FAIXAS_HORARIAS[hora]}"
+
+
+def _milhar(valor):
+    return f"{valor:,.0f}".replace(",", ".")
+
+
+def _dia_pico_tipico(dias, matriz):
+    # Dia do mês de pico cujo total diário é o mais próximo da média diária do mês
+    totais_dia = matriz.sum(axis=1)
+    meses = dias.to_period("M")
+    totais_mes = pd.Series(totais_dia).groupby(np.asarray(meses)).sum()
+    mes_pico = totais_mes.idxmax()
+
+    no_mes = np.flatnonzero(meses == mes_pico)
+    media = totais_dia[no_mes].mean()
+    dia = no_mes[np.abs(totais_dia[no_mes] - media).argmin()]
+    hora = int(matriz[dia].argmax())
+    return (
+        totais_dia[dia],
+        f"{dias[dia]:%d/%m/%Y} (mês de pico {mes_pico.strftime('%m/%Y')}, média {_milhar(media)}/dia; "
+        f"pico {FAIXAS_HORARIAS[hora]} com {_milhar(matriz[dia, hora])})"
+    )
+
+
+def estatisticas_hora_projeto(eventos, filtro_mov, posicao=30, percentil=95):
+    dias, pax, movimentos = matriz_dia_hora(eventos, filtro_mov)
+    if not len(dias):
+        return pd.DataFrame()
+
+    linhas = []
+    for metrica, matriz in (("PAX", pax), ("Movimentos", movimentos)):
+        valor_max, ref_max = _enesima_hora(dias, matriz, 1)
+        valor_n, ref_n = _enesima_hora(dias, matriz, posicao)
+        valor_tipico, ref_tipico = _dia_pico_tipico(dias, matriz)
+        linhas += [
+            ("Hora de pico absoluta", metrica, valor_max, ref_max),
+            (f"{posicao}ª hora mais movimentada", metrica, valor_n, ref_n),
+            (f"Hora no percentil {percentil}", metrica, np.percentile(matriz, percentil), f"{matriz.size} horas de {len(dias)} dias"),
+            ("Dia pico típico (total do dia)", metrica, valor_tipico, ref_tipico),
+        ]
+
+    return pd.DataFrame(linhas, columns=["Indicador", "Métrica", "Valor", "Referência"])
@@ -0,0 +1,89 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from carregamento import normalizar_chave
+
+
+# ========================
+# 🔎 Índice de movimentos: matrícula / Id.Vuelo → linhas em ordem cronológica
+# ========================
+# Primeiro horário disponível de cada movimento (chegada ou saída); sem nenhum, vale a Data
+COLUNAS_INSTANTE = ["ALDT", "AIBT", "AOBT", "ATOT"]
+COLUNAS_HISTORICO = ["Análise", "Data", "Id.Vuelo", "Registro", "Stand", "Sit.", "Sv.", "Id.Asociado"] + COLUNAS_INSTANTE
+
+
+@dataclass
+class IndiceBusca:
+    # Chaves distintas ordenadas; as linhas da chave i são posicoes[inicio[i]:inicio[i + 1]]
+    chaves: np.ndarray
+    inicio: np.ndarray
+    posicoes: np.ndarray
+
+    def buscar(self, termo):
+        chave = normalizar_chave(pd.Series([termo])).iloc[0]
+        if pd.isna(chave):
+            return self.posicoes[:0]
+        i = np.searchsorted(self.chaves, chave)
+        if i == len(self.chaves) or self.chaves[i] != chave:
+            return self.posicoes[:0]
+        return self.posicoes[self.inicio[i]:self.inicio[i + 1]]
+
+    def sugestoes(self, prefixo, limite=20):
+        # Chaves que começam com o prefixo: faixa contígua do vetor ordenado
+        prefixo = normalizar_chave(pd.Series([prefixo])).iloc[0]
+        if pd.isna(prefixo):
+            return []
+        i = np.searchsorted(self.chaves, prefixo)
+        fim = np.searchsorted(self.chaves, prefixo + "\uffff")
+        return list(self.chaves[i:min(fim, i + limite)])
+
+
+def _instante(df):
+    colunas = [col for col in COLUNAS_INSTANTE if col in df.columns]
+    instante = df["Data"].astype("datetime64[ns]") if "Data" in df.columns else pd.Series(pd.NaT, index=df.index)
+    for col in reversed(colunas):
+        instante = df[col].astype("datetime64[ns]").fillna(instante)
+    return instante.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+
+
+def montar_indice(chaves, posicoes, instante):
+    # Ordena (chave, instante) uma única vez; cada busca depois é só uma busca binária
+    validas = pd.notna(chaves)
+    codigos, distintas = pd.factorize(chaves[validas], sort=True)
+    posicoes = posicoes[validas]
+    ordem = np.lexsort((instante[posicoes], codigos))
+    inicio = np.r_[0, np.cumsum(np.bincount(codigos, minlength=len(distintas)))]
+    return IndiceBusca(np.asarray(distintas, dtype=object), inicio, posicoes[ordem])
+
+
+@dataclass
+class IndiceMovimentos:
+    registro: IndiceBusca
+    voo: IndiceBusca
+
+
+def indexar_movimentos(df):
+    # df: chegadas e saídas empilhadas (movimentos_scena). A matrícula dos voos
+    # ZZZ- também aponta para o movimento, mesmo quando diverge do Registro
+    linhas = np.arange(len(df))
+    instante = _instante(df)
+    registro = normalizar_chave(df["Registro"]).to_numpy(dtype=object, na_value=None)
+    id_voo = normalizar_chave(df["Id.Vuelo"]).to_numpy(dtype=object, na_value=None)
+
+    zzz = df["Id.Vuelo"].astype("string").str.startswith("ZZZ-").fillna(False).to_numpy(dtype=bool)
+    matricula = normalizar_chave(df["Id.Vuelo"].astype("string").str[4:]).to_numpy(dtype=object, na_value=None)
+    extra = zzz & (matricula != registro)
+
+    return IndiceMovimentos(
+        registro=montar_indice(np.r_[registro, matricula[extra]], np.r_[linhas, linhas[extra]], instante),
+        voo=montar_indice(id_voo, linhas, instante),
+    )
+
+
+def historico_movimentos(df, posicoes):
+    # Linhas do índice já em ordem cronológica; "Linha" é a linha na planilha
+    colunas = [col for col in COLUNAS_HISTORICO if col in df.columns]
+    historico = df.iloc[posicoes][colunas]
+    return historico.assign(Linha=historico.index.to_numpy() + 2).reset_index(drop=True)
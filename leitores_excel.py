@@ -0,0 +1,172 @@
+import importlib.util
+import os
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+
+from carga_segundo_plano import CargaCancelada
+
+
+# ========================
+# 📚 Leitores de Excel plugáveis (escolha automática do mais rápido)
+# ========================
+# Linhas lidas por candidato na medição feita na primeira carga de cada extensão
+LINHAS_AMOSTRA = 2000
+
+
+@dataclass(frozen=True)
+class Leitor:
+    modulo: str
+    extensoes: tuple
+    ler: object
+
+
+def _ler_pandas(motor):
+    def ler(arquivo, sheet_name, usecols, nrows=None, progresso=None):
+        # Sem leitura incremental: o progresso só avança ao fim
+        return pd.read_excel(arquivo, sheet_name=sheet_name, usecols=usecols, nrows=nrows, engine=motor)
+    return ler
+
+
+# Intervalo de linhas entre avisos de progresso na leitura linha a linha
+LINHAS_POR_AVISO = 5000
+
+
+def nomes_colunas(cabecalho):
+    # Mesmos nomes do read_excel: vazios viram "Unnamed: i" e repetidos ganham
+    # ".1", ".2"... pulando sufixos que já existem no cabeçalho
+    nomes = [f"Unnamed: {i}" if nome is None else nome for i, nome in enumerate(cabecalho)]
+    contagem = {}
+    for i, nome in enumerate(nomes):
+        original, vezes = nome, contagem.get(nome, 0)
+        while vezes > 0:
+            contagem[original] = vezes + 1
+            nome = f"{original}.{vezes}"
+            vezes = vezes + 1 if nome in nomes else contagem.get(nome, 0)
+        nomes[i] = nome
+        contagem[nome] = vezes + 1
+    return nomes
+
+
+def _ler_openpyxl_streaming(arquivo, sheet_name, usecols, nrows=None, progresso=None):
+    # Modo read_only: linhas lidas uma a uma do XML, só as colunas usadas são guardadas
+    import openpyxl
+
+    livro = openpyxl.load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        planilha = livro[sheet_name] if isinstance(sheet_name, str) else livro.worksheets[sheet_name]
+        linhas = planilha.iter_rows(values_only=True)
+        cabecalho = nomes_colunas(next(linhas, ()))
+        indices = [i for i, nome in enumerate(cabecalho) if usecols is None or usecols(nome)]
+        colunas = {i: [] for i in indices}
+        # max_row vem da dimensão gravada no arquivo; pode faltar
+        total = nrows or planilha.max_row
+
+        preenchidas = 0
+        for n, linha in enumerate(linhas):
+            if nrows is not None and n >= nrows:
+                break
+            vazia = True
+            for i in indices:
+                valor = linha[i] if i < len(linha) else None
+                if type(valor) is float and valor.is_integer():
+                    # Mesmo tratamento do read_excel: 3.0 vira 3
+                    valor = int(valor)
+                colunas[i].append(valor)
+                vazia = vazia and valor is None
+            if not vazia:
+                preenchidas = n + 1
+            if progresso and total and n % LINHAS_POR_AVISO == 0:
+                progresso(min(n / total, 1.0), f"{n:,} de {total:,} linhas".replace(",", "."))
+    finally:
+        livro.close()
+
+    # Como no read_excel: linhas vazias no fim da planilha são descartadas
+    return pd.DataFrame({cabecalho[i]: valores[:preenchidas] for i, valores in colunas.items()})
+
+
+LEITORES = {
+    "calamine": Leitor("python_calamine", (".xlsx", ".xlsm", ".xlsb", ".xls", ".ods"), _ler_pandas("calamine")),
+    "openpyxl_streaming": Leitor("openpyxl", (".xlsx", ".xlsm"), _ler_openpyxl_streaming),
+    "openpyxl": Leitor("openpyxl", (".xlsx", ".xlsm"), _ler_pandas("openpyxl")),
+    "xlrd": Leitor("xlrd", (".xls",), _ler_pandas("xlrd")),
+}
+
+# Motor escolhido por extensão: medido uma vez por processo
+_motores_escolhidos = {}
+
+
+def extensao_arquivo(arquivo):
+    nome = arquivo if isinstance(arquivo, (str, os.PathLike)) else getattr(arquivo, "name", "")
+    return os.path.splitext(str(nome))[1].lower() or ".xlsx"
+
+
+def motores_disponiveis(extensao):
+    return [
+        motor for motor, leitor in LEITORES.items()
+        if extensao in leitor.extensoes and importlib.util.find_spec(leitor.modulo) is not None
+    ]
+
+
+def _voltar_inicio(arquivo):
+    if hasattr(arquivo, "seek"):
+        arquivo.seek(0)
+
+
+def medir_motores(arquivo, sheet_name=0, usecols=None, motores=None, nrows=LINHAS_AMOSTRA):
+    # {motor: segundos} lendo as primeiras `nrows` linhas; None se o motor falhou
+    tempos = {}
+    for motor in motores or motores_disponiveis(extensao_arquivo(arquivo)):
+        _voltar_inicio(arquivo)
+        inicio = time.perf_counter()
+        try:
+            LEITORES[motor].ler(arquivo, sheet_name, usecols, nrows)
+            tempos[motor] = time.perf_counter() - inicio
+        except Exception:
+            tempos[motor] = None
+    _voltar_inicio(arquivo)
+    return tempos
+
+
+def escolher_motor(arquivo, sheet_name=0, usecols=None):
+    extensao = extensao_arquivo(arquivo)
+    candidatos = motores_disponiveis(extensao)
+
+    # SBJU_MOTOR_EXCEL força um motor (se disponível para a extensão)
+    forcado = os.environ.get("SBJU_MOTOR_EXCEL")
+    if forcado in candidatos:
+        return forcado, candidatos
+
+    if extensao not in _motores_escolhidos:
+        if len(candidatos) > 1:
+            tempos = medir_motores(arquivo, sheet_name, usecols, candidatos)
+            validos = {motor: segundos for motor, segundos in tempos.items() if segundos is not None}
+            if validos:
+                _motores_escolhidos[extensao] = min(validos, key=validos.get)
+        elif candidatos:
+            _motores_escolhidos[extensao] = candidatos[0]
+
+    escolhido = _motores_escolhidos.get(extensao)
+    return escolhido, candidatos
+
+
+def ler_excel(arquivo, sheet_name=0, usecols=None, progresso=None):
+    # Devolve (df, motor usado); se o escolhido falhar, tenta os demais disponíveis.
+    # progresso(fração, mensagem) é chamado durante a leitura, quando o motor permite
+    escolhido, candidatos = escolher_motor(arquivo, sheet_name, usecols)
+    ordem = ([escolhido] if escolhido else []) + [motor for motor in candidatos if motor != escolhido]
+    if not ordem:
+        # Nenhum leitor conhecido instalado: o read_excel padrão explica o que falta
+        return pd.read_excel(arquivo, sheet_name=sheet_name, usecols=usecols), "pandas"
+
+    primeiro_erro = None
+    for motor in ordem:
+        _voltar_inicio(arquivo)
+        try:
+            return LEITORES[motor].ler(arquivo, sheet_name, usecols, progresso=progresso), motor
+        except CargaCancelada:
+            raise
+        except Exception as e:
+            primeiro_erro = primeiro_erro or e
+    raise primeiro_erro
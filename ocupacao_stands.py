@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+
+
+# ========================
+# 🅿️ Ocupação de stands: intervalos [AIBT, AOBT) por Stand, varredura ordenada
+# ========================
+# Stands que não representam uma posição física
+STANDS_IGNORADOS = {"HOLD"}
+
+COLUNAS_CONFLITO = [
+    "Stand", "Data", "Voo", "Registro", "Calço", "Descalço",
+    "Voo ocupante", "Registro ocupante", "Calço ocupante", "Descalço ocupante", "Sobreposição (min)",
+]
+
+
+def intervalos_stands(giros):
+    # Uma ocupação por giro OPE com calço e descalço válidos (descalço depois do calço)
+    stand = giros["Stand"].astype("string").str.strip().str.upper()
+    validos = (
+        giros["Sit."].eq("OPE").fillna(False).to_numpy(dtype=bool)
+        & stand.notna().to_numpy(dtype=bool)
+        & ~stand.isin(STANDS_IGNORADOS).fillna(False).to_numpy(dtype=bool)
+        & (giros["AOBT"] > giros["AIBT"]).fillna(False).to_numpy(dtype=bool)
+    )
+    origem = giros.loc[validos]
+    return pd.DataFrame({
+        "Stand": stand[validos].astype("category"),
+        "Data": origem["Data"],
+        "Voo": origem["Voo chegada"].fillna(origem["Voo saída"]),
+        "Registro": origem["Registro"],
+        "Calço": origem["AIBT"],
+        "Descalço": origem["AOBT"],
+    }, index=origem.index)
+
+
+def _ordenar(intervalos):
+    # Posições ordenadas por (Stand, Calço) e os vetores já nessa ordem
+    codigos = intervalos["Stand"].cat.codes.to_numpy()
+    inicio = intervalos["Calço"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    fim = intervalos["Descalço"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    ordem = np.lexsort((inicio, codigos))
+    return ordem, codigos[ordem], inicio[ordem], fim[ordem]
+
+
+def conflitos_stands(intervalos):
+    # Varredura por stand: cada ocupação é comparada só com a que mantém o stand
+    # ocupado por mais tempo até ali (maior descalço acumulado) – O(n log n)
+    if len(intervalos) < 2:
+        return pd.DataFrame(columns=COLUNAS_CONFLITO)
+
+    ordem, codigos, inicio, fim = _ordenar(intervalos)
+    n = len(ordem)
+    mesmo_stand = np.r_[False, codigos[1:] == codigos[:-1]]
+    grupo = np.cumsum(~mesmo_stand)
+
+    # Maior descalço até cada posição, reiniciado a cada stand
+    fim_acumulado = pd.Series(fim).groupby(grupo).cummax().to_numpy()
+    # Posição da ocupação dona desse descalço (a 1ª de cada stand sempre é dona do seu)
+    dona = np.maximum.accumulate(np.where(fim == fim_acumulado, np.arange(n), -1))
+
+    conflito = mesmo_stand & (inicio < np.r_[np.iinfo(np.int64).min, fim_acumulado[:-1]])
+    atual = np.flatnonzero(conflito)
+    ocupante = dona[atual - 1]
+
+    linhas = intervalos.iloc[ordem[atual]]
+    ocupantes = intervalos.iloc[ordem[ocupante]]
+    sobreposicao = (np.minimum(fim[atual], fim[ocupante]) - inicio[atual]) / 6e10
+    return pd.DataFrame({
+        "Stand": linhas["Stand"].to_numpy(),
+        "Data": linhas["Data"].to_numpy(),
+        "Voo": linhas["Voo"].to_numpy(),
+        "Registro": linhas["Registro"].to_numpy(),
+        "Calço": linhas["Calço"].to_numpy(),
+        "Descalço": linhas["Descalço"].to_numpy(),
+        "Voo ocupante": ocupantes["Voo"].to_numpy(),
+        "Registro ocupante": ocupantes["Registro"].to_numpy(),
+        "Calço ocupante": ocupantes["Calço"].to_numpy(),
+        "Descalço ocupante": ocupantes["Descalço"].to_numpy(),
+        "Sobreposição (min)": np.round(sobreposicao, 1),
+    }, index=linhas.index, columns=COLUNAS_CONFLITO)
+
+
+def pico_ocupacao(intervalos):
+    # Maior número de stands ocupados ao mesmo tempo: +1 no calço, -1 no descalço.
+    # No mesmo instante o descalço vem antes, então ocupações encostadas não somam
+    if intervalos.empty:
+        return {"stands": 0, "inicio": None}
+    inicio = intervalos["Calço"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    fim = intervalos["Descalço"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    instantes = np.concatenate([fim, inicio])
+    variacao = np.concatenate([np.full(len(fim), -1), np.ones(len(inicio), dtype=int)])
+    ordem = np.lexsort((variacao, instantes))
+    ocupados = np.cumsum(variacao[ordem])
+    maior = int(np.argmax(ocupados))
+    return {"stands": int(ocupados[maior]), "inicio": pd.Timestamp(instantes[ordem][maior])}
+
+
+def _tempo_ocupado_ate(bordas, inicio, fim):
+    # F(t) = Σ |[s, e) ∩ (-∞, t)| para cada borda t, com somas acumuladas dos
+    # inícios e fins ordenados: F(t) = Σ_{s<t} (t - s) - Σ_{e<t} (t - e)
+    inicio, fim = np.sort(inicio), np.sort(fim)
+    soma_inicio = np.r_[0.0, np.cumsum(inicio)]
+    soma_fim = np.r_[0.0, np.cumsum(fim)]
+    qtd_inicio = np.searchsorted(inicio, bordas)
+    qtd_fim = np.searchsorted(fim, bordas)
+    return (bordas * qtd_inicio - soma_inicio[qtd_inicio]) - (bordas * qtd_fim - soma_fim[qtd_fim])
+
+
+def utilizacao_stands(intervalos, frequencia="D"):
+    # % do período ocupado por stand (linhas = início de cada período). Acima de
+    # 100% indica ocupações sobrepostas no stand
+    if intervalos.empty:
+        return pd.DataFrame()
+
+    primeiro = intervalos["Calço"].min().floor(frequencia)
+    ultimo = intervalos["Descalço"].max().ceil(frequencia)
+    periodos = pd.date_range(primeiro, max(ultimo, primeiro + pd.tseries.frequencies.to_offset(frequencia)), freq=frequencia)
+    # Segundos desde o primeiro período: float sem perda de precisão
+    bordas = (periodos - primeiro).total_seconds().to_numpy()
+    inicio = (intervalos["Calço"] - primeiro).dt.total_seconds().to_numpy()
+    fim = (intervalos["Descalço"] - primeiro).dt.total_seconds().to_numpy()
+
+    utilizacao = {}
+    codigos = intervalos["Stand"].cat.codes.to_numpy()
+    for codigo, stand in enumerate(intervalos["Stand"].cat.categories):
+        do_stand = codigos == codigo
+        if do_stand.any():
+            ocupado = np.diff(_tempo_ocupado_ate(bordas, inicio[do_stand], fim[do_stand]))
+            utilizacao[stand] = 100 * ocupado / np.diff(bordas)
+    return pd.DataFrame(utilizacao, index=periodos[:-1]).round(1)
+
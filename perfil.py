@@ -0,0 +1,102 @@
+import json
+import threading
+import time
+import tracemalloc
+import uuid
+import weakref
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+
+# ========================
+# ⏱️ Perfil de execução: tempo e alocação por etapa (opcional)
+# ========================
+# O tracemalloc é global ao processo e o servidor atende várias sessões: cada
+# sessão com o perfil ligado é uma referência, e o rastreamento só para quando
+# nenhuma resta. Sessões encerradas saem sozinhas do conjunto (referência fraca)
+_trava_rastreio = threading.Lock()
+_sessoes_rastreando = weakref.WeakSet()
+
+
+class SessaoPerfil:
+    # Marcador da sessão, guardado no estado dela enquanto existir
+    pass
+
+
+def _rastrear(sessao, ligar):
+    with _trava_rastreio:
+        if ligar:
+            _sessoes_rastreando.add(sessao)
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+        else:
+            _sessoes_rastreando.discard(sessao)
+            if not len(_sessoes_rastreando) and tracemalloc.is_tracing():
+                tracemalloc.stop()
+
+
+class Perfilador:
+    def __init__(self, ativo=False, caminho_log=None, sessao=None):
+        self.ativo = ativo
+        self.caminho_log = caminho_log
+        self.execucao = uuid.uuid4().hex[:12]
+        self.contexto = {}
+        self.registros = []
+        # Pico absoluto de cada etapa aberta antes de uma etapa interna zerá-lo
+        self._picos_abertos = []
+
+        # Sem sessão, a referência dura o tempo de vida do próprio perfilador
+        _rastrear(self if sessao is None else sessao, self.ativo)
+
+    @contextmanager
+    def etapa(self, nome):
+        if not self.ativo:
+            yield
+            return
+
+        # O pico é zerado no início de cada etapa; com etapas aninhadas, o pico
+        # da externa até aqui é guardado e volta a valer quando ela termina
+        if self._picos_abertos:
+            self._picos_abertos[-1] = max(self._picos_abertos[-1], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        memoria_inicio, _ = tracemalloc.get_traced_memory()
+        self._picos_abertos.append(memoria_inicio)
+        inicio = time.perf_counter()
+        erro = None
+        try:
+            yield
+        except Exception as e:
+            erro = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            segundos = time.perf_counter() - inicio
+            memoria_fim, pico = tracemalloc.get_traced_memory()
+            pico = max(pico, self._picos_abertos.pop())
+            self.registros.append({
+                "etapa": nome,
+                "segundos": round(segundos, 4),
+                "memoria_retida_mb": round((memoria_fim - memoria_inicio) / 1024 / 1024, 3),
+                "pico_mb": round((pico - memoria_inicio) / 1024 / 1024, 3),
+                "erro": erro,
+            })
+
+    def registrar(self, nome, segundos, erro=None):
+        # Etapas executadas fora da thread do script (ex.: carga em segundo plano): só o tempo
+        if self.ativo:
+            self.registros.append({
+                "etapa": nome, "segundos": round(segundos, 4), "memoria_retida_mb": None, "pico_mb": None, "erro": erro,
+            })
+
+    def tabela(self):
+        return pd.DataFrame(self.registros, columns=["etapa", "segundos", "memoria_retida_mb", "pico_mb", "erro"])
+
+    def gravar(self):
+        if not (self.ativo and self.caminho_log and self.registros):
+            return
+        momento = datetime.now().isoformat(timespec="seconds")
+        with open(self.caminho_log, "a", encoding="utf-8") as arquivo:
+            for registro in self.registros:
+                linha = {"execucao": self.execucao, "momento": momento, **self.contexto, **registro}
+                arquivo.write(json.dumps(linha, ensure_ascii=False) + "\n")
@@ -0,0 +1,108 @@
+import io
+import re
+from dataclasses import dataclass
+from datetime import datetime
+
+import pandas as pd
+
+from validacoes import linhas_violadas, separar_analises
+
+
+# ========================
+# 📦 Relatório de auditoria: XLSX com uma aba por verificação + resumo em PDF
+# ========================
+# Limite de linhas de uma aba do Excel (menos o cabeçalho)
+LINHAS_POR_ABA = 1_048_575
+
+
+@dataclass
+class Secao:
+    grupo: str
+    titulo: str
+    tabela: pd.DataFrame
+
+
+def secoes_scena(movimentos, violacoes):
+    # Uma seção por regra de cada análise, a partir da matriz já avaliada
+    secoes = []
+    for analise, df, violacoes_analise, regras in separar_analises(movimentos, violacoes):
+        for regra in regras:
+            if regra.violacao:
+                secoes.append(Secao(analise, regra.titulo, linhas_violadas(df, violacoes_analise, regra.nome)))
+    return secoes
+
+
+def resumo_secoes(secoes):
+    return pd.DataFrame({
+        "Grupo": [secao.grupo for secao in secoes],
+        "Verificação": [secao.titulo for secao in secoes],
+        "Ocorrências": [len(secao.tabela) for secao in secoes],
+    })
+
+
+def _nome_aba(nome, usados):
+    # Máx. 31 caracteres, sem []:*?/\ e sem repetir
+    base = re.sub(r"[\[\]:*?/\\]", "-", nome)[:31]
+    candidato, n = base, 2
+    while candidato.lower() in usados:
+        sufixo = f" ({n})"
+        candidato, n = base[:31 - len(sufixo)] + sufixo, n + 1
+    usados.add(candidato.lower())
+    return candidato
+
+
+def gerar_xlsx(secoes):
+    # Escrito direto num único buffer, que é entregue ao download sem cópias
+    buffer = io.BytesIO()
+    usados = set()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as escritor:
+        resumo_secoes(secoes).to_excel(escritor, sheet_name=_nome_aba("Resumo", usados), index=False)
+        for secao in secoes:
+            if secao.tabela.empty:
+                continue
+            for inicio in range(0, len(secao.tabela), LINHAS_POR_ABA):
+                secao.tabela.iloc[inicio:inicio + LINHAS_POR_ABA].to_excel(
+                    escritor, sheet_name=_nome_aba(f"{secao.grupo} - {secao.titulo}", usados), index=False
+                )
+    buffer.seek(0)
+    return buffer
+
+
+def _latin1(texto):
+    # Fontes padrão do PDF só cobrem latin-1
+    trocas = {"≤": "<=", "≥": ">=", "≠": "!=", "–": "-", "—": "-", "↔": "<->", "→": "->", "Δ": "Dif."}
+    for original, troca in trocas.items():
+        texto = texto.replace(original, troca)
+    return texto.encode("latin-1", "replace").decode("latin-1")
+
+
+def gerar_pdf(secoes, arquivos):
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+
+    pdf.set_font("Helvetica", "B", 16)
+    pdf.cell(0, 10, _latin1("Relatório de Auditoria – SBJU"), new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("Helvetica", "", 10)
+    pdf.cell(0, 6, _latin1(f"Gerado em {datetime.now():%d/%m/%Y %H:%M}"), new_x="LMARGIN", new_y="NEXT")
+    for tipo, nome in arquivos.items():
+        pdf.cell(0, 6, _latin1(f"{tipo}: {nome}"), new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(4)
+
+    resumo = resumo_secoes(secoes)
+    for grupo, linhas in resumo.groupby("Grupo", sort=False):
+        pdf.set_font("Helvetica", "B", 12)
+        pdf.cell(0, 8, _latin1(grupo), new_x="LMARGIN", new_y="NEXT")
+        pdf.set_font("Helvetica", "", 10)
+        for verificacao, ocorrencias in zip(linhas["Verificação"], linhas["Ocorrências"]):
+            pdf.cell(150, 7, _latin1(verificacao), border=1)
+            pdf.cell(30, 7, f"{ocorrencias:,}".replace(",", "."), border=1, align="R", new_x="LMARGIN", new_y="NEXT")
+        pdf.ln(3)
+
+    pdf.set_font("Helvetica", "I", 9)
+    pdf.multi_cell(0, 5, _latin1(f"Total de ocorrências: {int(resumo['Ocorrências'].sum())}. "
+                                 "As linhas de cada verificação estão na planilha XLSX do mesmo relatório."),
+                   new_x="LMARGIN", new_y="NEXT")
+    return io.BytesIO(pdf.output())
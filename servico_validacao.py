@@ -0,0 +1,378 @@
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from carregamento import ativar_copy_on_write
+from validar_lote import EXTENSOES, carregar_e_validar
+
+
+# ========================
+# 🌐 Serviço HTTP de validação: fila limitada + pool de processos (sem Streamlit)
+# ========================
+# Mesmo limite de upload padrão do Streamlit
+TAMANHO_MAXIMO = 200 * 1024 * 1024
+# Trabalhos concluídos guardados em memória (os mais antigos saem primeiro)
+RESULTADOS_GUARDADOS = 200
+# Janela das métricas de tempo (últimos N trabalhos)
+JANELA_METRICAS = 500
+# Upload copiado para o disco em blocos (nunca inteiro na memória)
+TAMANHO_BLOCO = 1024 * 1024
+
+
+def processar_upload(caminho):
+    # Roda no processo do pool: o relógio de parede marca o fim da espera na fila
+    inicio = time.time()
+    _, violacoes, resumo = carregar_e_validar(caminho)
+    return inicio, violacoes, resumo
+
+
+class ServicoValidacao:
+    def __init__(self, processos=2, fila_maxima=None, diretorio_temporario=None):
+        self.processos = processos
+        # Trabalhos aceitos e ainda não concluídos (na fila + em execução)
+        self.fila_maxima = fila_maxima or 2 * processos
+        self.diretorio_temporario = diretorio_temporario or tempfile.mkdtemp(prefix="sbju_servico_")
+        self.executor = ProcessPoolExecutor(max_workers=processos, initializer=ativar_copy_on_write)
+        self.trabalhos = OrderedDict()
+        self.pendentes = 0
+        # aceitos: enfileirados; abortados: vaga reservada, mas o upload falhou
+        self.contadores = {"aceitos": 0, "recusados": 0, "abortados": 0, "concluidos": 0, "erros": 0}
+        self.tempos = deque(maxlen=JANELA_METRICAS)
+        self.trava = threading.Lock()
+
+    def reservar(self):
+        # Vaga na fila reservada antes de ler o corpo: com a fila cheia, quem
+        # chamou responde 503 sem receber o arquivo (backpressure)
+        with self.trava:
+            if self.pendentes >= self.fila_maxima:
+                self.contadores["recusados"] += 1
+                return False
+            self.pendentes += 1
+            return True
+
+    def liberar(self, abortado=False):
+        with self.trava:
+            self.pendentes -= 1
+            if abortado:
+                self.contadores["abortados"] += 1
+
+    def enviar(self, nome, leitor, tamanho):
+        # Só depois de reservar(): copia o corpo para o disco e enfileira o trabalho
+        id_trabalho = uuid.uuid4().hex
+        extensao = os.path.splitext(nome)[1].lower()
+        descritor, caminho = tempfile.mkstemp(suffix=extensao, dir=self.diretorio_temporario)
+        try:
+            with os.fdopen(descritor, "wb") as arquivo:
+                restante = tamanho
+                while restante > 0:
+                    bloco = leitor.read(min(TAMANHO_BLOCO, restante))
+                    if not bloco:
+                        raise ConnectionError("upload interrompido antes do fim")
+                    arquivo.write(bloco)
+                    restante -= len(bloco)
+            recebido = time.time()
+            futuro = self.executor.submit(processar_upload, caminho)
+        except Exception:
+            self.liberar(abortado=True)
+            os.remove(caminho)
+            raise
+        trabalho = {
+            "id": id_trabalho, "arquivo": nome, "situacao": "na fila", "recebido": recebido, "caminho": caminho,
+            "futuro": futuro, "erro": None, "resumo": None, "violacoes": None, "tempos": None,
+        }
+        with self.trava:
+            self.trabalhos[id_trabalho] = trabalho
+            self.contadores["aceitos"] += 1
+        futuro.add_done_callback(lambda futuro: self._concluir(trabalho, futuro))
+        return id_trabalho
+
+    def _concluir(self, trabalho, futuro):
+        fim = time.time()
+        try:
+            inicio, violacoes, resumo = futuro.result()
+            # O arquivo que chega ao usuário é o enviado, não o temporário
+            violacoes["Arquivo"] = trabalho["arquivo"]
+            resumo["Arquivo"] = trabalho["arquivo"]
+            erro = resumo["Erro"]
+        except Exception as e:
+            inicio, violacoes, resumo = fim, None, None
+            erro = f"{type(e).__name__}: {e}"
+
+        tempos = {
+            "fila_s": round(max(inicio - trabalho["recebido"], 0.0), 3),
+            "processamento_s": round(fim - inicio, 3),
+            "total_s": round(fim - trabalho["recebido"], 3),
+        }
+        try:
+            os.remove(trabalho["caminho"])
+        except OSError:
+            pass
+
+        with self.trava:
+            trabalho.update(
+                situacao="erro" if erro else "concluido", erro=erro, resumo=resumo,
+                violacoes=violacoes, tempos=tempos, futuro=None,
+            )
+            self.pendentes -= 1
+            self.contadores["erros" if erro else "concluidos"] += 1
+            self.tempos.append(tempos)
+            self._descartar_antigos()
+
+    def _descartar_antigos(self):
+        concluidos = [id_trabalho for id_trabalho, trabalho in self.trabalhos.items() if trabalho["futuro"] is None]
+        for id_trabalho in concluidos[:max(len(concluidos) - RESULTADOS_GUARDADOS, 0)]:
+            del self.trabalhos[id_trabalho]
+
+    def situacao(self, id_trabalho):
+        with self.trava:
+            trabalho = self.trabalhos.get(id_trabalho)
+            if trabalho is None:
+                return None
+            situacao = trabalho["situacao"]
+            if trabalho["futuro"] is not None and trabalho["futuro"].running():
+                situacao = "em execução"
+            return {
+                "id": id_trabalho,
+                "arquivo": trabalho["arquivo"],
+                "situacao": situacao,
+                "erro": trabalho.get("erro"),
+                "resumo": trabalho["resumo"],
+                "tempos": trabalho["tempos"],
+            }
+
+    def violacoes(self, id_trabalho):
+        with self.trava:
+            trabalho = self.trabalhos.get(id_trabalho)
+            return None if trabalho is None else trabalho["violacoes"]
+
+    def metricas(self):
+        with self.trava:
+            em_execucao = sum(
+                1 for trabalho in self.trabalhos.values()
+                if trabalho["futuro"] is not None and trabalho["futuro"].running()
+            )
+            metricas = {
+                "processos": self.processos,
+                "fila_maxima": self.fila_maxima,
+                "pendentes": self.pendentes,
+                "em_execucao": em_execucao,
+                "na_fila": self.pendentes - em_execucao,
+                **self.contadores,
+            }
+            tempos = list(self.tempos)
+        for chave in ("fila_s", "processamento_s", "total_s"):
+            valores = np.array([tempo[chave] for tempo in tempos])
+            metricas[chave] = {
+                "media": round(float(valores.mean()), 3) if len(valores) else None,
+                "p90": round(float(np.quantile(valores, 0.9)), 3) if len(valores) else None,
+            }
+        return metricas
+
+    def encerrar(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+# ========================
+# HTTP
+# ========================
+def _json_violacoes(violacoes):
+    return violacoes.to_json(orient="records", date_format="iso", force_ascii=False)
+
+
+def _parquet_violacoes(violacoes):
+    buffer = io.BytesIO()
+    violacoes.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+
+class TratadorValidacao(BaseHTTPRequestHandler):
+    # POST /trabalhos?nome=arquivo.xlsx               -> 202 {"id": ...} (503 com a fila cheia)
+    # GET  /trabalhos/<id>                            -> situação, resumo e tempos
+    # GET  /trabalhos/<id>/violacoes?formato=parquet  -> violações em JSON (padrão) ou Parquet
+    # GET  /metricas                                  -> profundidade da fila e tempos
+    servico = None
+    # Upload parado por mais que isso: a leitura do corpo falha com TimeoutError
+    timeout = 60
+
+    def _responder(self, status, corpo, tipo="application/json; charset=utf-8", cabecalhos=None):
+        if not isinstance(corpo, bytes):
+            corpo = (corpo if isinstance(corpo, str) else json.dumps(corpo, ensure_ascii=False, default=str)).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(corpo)))
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _erro(self, status, mensagem, cabecalhos=None):
+        # O corpo de uma requisição recusada não é lido: a conexão é encerrada
+        self.close_connection = True
+        self._responder(status, {"erro": mensagem}, cabecalhos=cabecalhos)
+
+    def _erro_upload(self, status, mensagem):
+        # A conexão pode já estar quebrada: a resposta é só uma tentativa
+        try:
+            self._erro(status, mensagem)
+        except OSError:
+            self.close_connection = True
+
+    def do_POST(self):
+        url = urllib.parse.urlsplit(self.path)
+        if url.path.rstrip("/") != "/trabalhos":
+            return self._erro(404, "rota inexistente")
+
+        nome = urllib.parse.parse_qs(url.query).get("nome", [""])[0]
+        if not nome.lower().endswith(EXTENSOES):
+            return self._erro(400, "informe ?nome= com extensão .xlsx, .xls ou .csv")
+        if "Content-Length" not in self.headers:
+            return self._erro(411, "Content-Length obrigatório")
+        try:
+            tamanho = int(self.headers["Content-Length"])
+        except ValueError:
+            return self._erro(400, "Content-Length inválido")
+        if tamanho <= 0:
+            return self._erro(400, "corpo vazio")
+        if tamanho > TAMANHO_MAXIMO:
+            return self._erro(413, f"arquivo maior que {TAMANHO_MAXIMO // (1024 * 1024)} MB")
+        if not self.servico.reservar():
+            return self._erro(503, "fila cheia, tente novamente", cabecalhos={"Retry-After": "5"})
+
+        try:
+            id_trabalho = self.servico.enviar(os.path.basename(nome), self.rfile, tamanho)
+        except (ConnectionError, TimeoutError) as e:
+            # Corpo interrompido ou parado: falha do lado do cliente
+            return self._erro_upload(400, f"upload interrompido: {e}")
+        except Exception as e:
+            # Disco cheio, pool de processos quebrado...
+            return self._erro_upload(500, f"falha ao receber o arquivo: {type(e).__name__}: {e}")
+        self._responder(202, {"id": id_trabalho}, cabecalhos={"Location": f"/trabalhos/{id_trabalho}"})
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        partes = [parte for parte in url.path.split("/") if parte]
+
+        if partes == ["metricas"]:
+            return self._responder(200, self.servico.metricas())
+        if len(partes) == 2 and partes[0] == "trabalhos":
+            situacao = self.servico.situacao(partes[1])
+            if situacao is None:
+                return self._erro(404, "trabalho inexistente ou já descartado")
+            return self._responder(200, situacao)
+        if len(partes) == 3 and partes[0] == "trabalhos" and partes[2] == "violacoes":
+            situacao = self.servico.situacao(partes[1])
+            if situacao is None:
+                return self._erro(404, "trabalho inexistente ou já descartado")
+            violacoes = self.servico.violacoes(partes[1])
+            if violacoes is None:
+                return self._erro(409, f"trabalho {situacao['situacao']}")
+            formato = urllib.parse.parse_qs(url.query).get("formato", ["json"])[0]
+            if formato == "parquet":
+                return self._responder(200, _parquet_violacoes(violacoes), tipo="application/vnd.apache.parquet")
+            return self._responder(200, _json_violacoes(violacoes))
+        self._erro(404, "rota inexistente")
+
+    def log_message(self, formato, *args):
+        print(f"{self.address_string()} - {formato % args}", file=sys.stderr)
+
+
+def servir(host="127.0.0.1", porta=8765, processos=2, fila_maxima=None):
+    servico = ServicoValidacao(processos, fila_maxima)
+    tratador = type("Tratador", (TratadorValidacao,), {"servico": servico})
+    with ThreadingHTTPServer((host, porta), tratador) as servidor:
+        print(f"Serviço de validação em http://{host}:{porta} ({processos} processos, fila de {servico.fila_maxima})", file=sys.stderr)
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            servico.encerrar()
+
+
+# ========================
+# Cliente local
+# ========================
+def _requisitar(url, dados=None):
+    requisicao = urllib.request.Request(url, data=dados, method="POST" if dados is not None else "GET")
+    with urllib.request.urlopen(requisicao) as resposta:
+        return resposta.read()
+
+
+def enviar_arquivo(caminho, url="http://127.0.0.1:8765", intervalo=0.5, tentativas_fila=60):
+    # Envia, espera o trabalho terminar e devolve (situação, violações)
+    with open(caminho, "rb") as arquivo:
+        conteudo = arquivo.read()
+    destino = f"{url}/trabalhos?nome={urllib.parse.quote(os.path.basename(caminho))}"
+    for _ in range(tentativas_fila):
+        try:
+            id_trabalho = json.loads(_requisitar(destino, conteudo))["id"]
+            break
+        except urllib.error.HTTPError as e:
+            if e.code != 503:
+                raise
+            time.sleep(float(e.headers.get("Retry-After", 5)))
+        except (urllib.error.URLError, ConnectionError) as e:
+            # Fila cheia com arquivo grande: o serviço fecha a conexão sem ler o corpo
+            if not isinstance(getattr(e, "reason", e), ConnectionError):
+                raise
+            time.sleep(5)
+    else:
+        raise TimeoutError("fila do serviço continua cheia")
+
+    while True:
+        situacao = json.loads(_requisitar(f"{url}/trabalhos/{id_trabalho}"))
+        if situacao["situacao"] in ("concluido", "erro"):
+            break
+        time.sleep(intervalo)
+    violacoes = pd.DataFrame()
+    if situacao["situacao"] == "concluido":
+        violacoes = pd.read_parquet(io.BytesIO(_requisitar(f"{url}/trabalhos/{id_trabalho}/violacoes?formato=parquet")))
+    return situacao, violacoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço HTTP local de validação SCENA/RIMA.")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    servidor = comandos.add_parser("servir", help="Sobe o serviço")
+    servidor.add_argument("--host", default="127.0.0.1")
+    servidor.add_argument("--porta", type=int, default=8765)
+    servidor.add_argument("-p", "--processos", type=int, default=2, help="Processos validando em paralelo")
+    servidor.add_argument("-f", "--fila", type=int, default=None, help="Trabalhos pendentes aceitos (padrão: 2× processos)")
+
+    cliente = comandos.add_parser("enviar", help="Envia arquivos e espera o resultado")
+    cliente.add_argument("arquivos", nargs="+")
+    cliente.add_argument("--url", default="http://127.0.0.1:8765")
+    args = parser.parse_args(argv)
+
+    if args.comando == "servir":
+        servir(args.host, args.porta, args.processos, args.fila)
+        return 0
+
+    falhou = False
+    for caminho in args.arquivos:
+        situacao, violacoes = enviar_arquivo(caminho, args.url)
+        falhou |= situacao["situacao"] == "erro"
+        detalhe = situacao["erro"] or f"{len(violacoes)} violações"
+        print(f"{caminho}: {detalhe} (tempos: {situacao['tempos']})", file=sys.stderr)
+    print(json.dumps(json.loads(_requisitar(f"{args.url}/metricas")), ensure_ascii=False, indent=2))
+    return 1 if falhou else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+from anomalias import AMOSTRAS_MINIMAS, anomalias, escores_anomalia, resumo_anomalias
+
+
+def _medidas(grupos):
+    # grupos: [(operador, stand, hora, [minutos...])] de uma única métrica
+    linhas = [(operador, stand, hora, minuto) for operador, stand, hora, minutos in grupos for minuto in minutos]
+    return pd.DataFrame({
+        "Métrica": pd.Categorical(["Taxi-in (min)"] * len(linhas)),
+        "Data": pd.Timestamp("2024-03-01"),
+        "Voo": [f"V{i}" for i in range(len(linhas))],
+        "Registro": "PRABC",
+        "Operador": pd.Categorical([linha[0] for linha in linhas]),
+        "Stand": pd.Categorical([linha[1] for linha in linhas]),
+        "Hora": [linha[2] for linha in linhas],
+        "Minutos": np.array([linha[3] for linha in linhas], dtype=float),
+        "Linha": np.arange(len(linhas)) + 2,
+    })
+
+
+def _normais(n, centro):
+    # Valores em torno do centro com dispersão de alguns minutos
+    return list(centro + np.resize([-2, -1, 0, 1, 2], n))
+
+
+def test_usa_o_nivel_mais_especifico_com_amostras_suficientes():
+    medidas = _medidas([
+        ("AZU", "1", 10, _normais(AMOSTRAS_MINIMAS, 8)),
+        ("GLO", "3", 10, _normais(AMOSTRAS_MINIMAS, 12)),
+        ("GLO", "2", 10, _normais(5, 12)),
+        ("AVG", "4", 3, [15.0]),
+    ])
+    escores = escores_anomalia(medidas)
+    base = escores.groupby(["Operador", "Stand"], observed=True)["Base"].unique()
+
+    assert list(base[("AZU", "1")]) == ["Operador × Stand × Hora"]
+    assert list(base[("GLO", "3")]) == ["Operador × Stand × Hora"]
+    # Só 5 voos no stand 2: cai para GLO × hora 10 (25 voos)
+    assert list(base[("GLO", "2")]) == ["Operador × Hora"]
+    # Um voo isolado na madrugada: cai até a métrica inteira
+    assert list(base[("AVG", "4")]) == ["Geral"]
+
+
+def test_nivel_hora_quando_o_operador_tem_poucos_voos():
+    medidas = _medidas([
+        ("AZU", "1", 10, _normais(AMOSTRAS_MINIMAS, 8)),
+        ("PTB", "5", 10, _normais(3, 8)),
+    ])
+    escores = escores_anomalia(medidas)
+    assert set(escores.loc[escores["Operador"] == "PTB", "Base"]) == {"Hora"}
+    assert set(escores.loc[escores["Operador"] == "PTB", "Mediana"]) == {8.0}
+
+
+def test_marca_o_taxi_implausivel_e_nao_os_normais():
+    medidas = _medidas([("AZU", "1", 10, _normais(AMOSTRAS_MINIMAS, 8) + [90.0])])
+    escores = escores_anomalia(medidas)
+    fora = anomalias(escores)
+    assert list(fora["Minutos"]) == [90.0]
+    assert fora["Escore"].iloc[0] > 3.5
+    assert resumo_anomalias(escores).to_dict("records") == [
+        {"Métrica": "Taxi-in (min)", "Medidas": AMOSTRAS_MINIMAS + 1, "Anômalas": 1}
+    ]
+
+
+def test_mad_zero_nao_divide_por_zero():
+    # Todos iguais: MAD 0 vira o mínimo de 1 minuto
+    medidas = _medidas([("AZU", "1", 10, [10.0] * AMOSTRAS_MINIMAS + [11.0, 40.0])])
+    escores = escores_anomalia(medidas)
+    assert np.isfinite(escores["Escore"]).all()
+    assert list(anomalias(escores)["Minutos"]) == [40.0]
+
+
+def test_stand_vazio_forma_seu_proprio_grupo():
+    medidas = _medidas([("AZU", None, 10, _normais(AMOSTRAS_MINIMAS, 8))])
+    escores = escores_anomalia(medidas)
+    assert set(escores["Base"]) == {"Operador × Stand × Hora"}
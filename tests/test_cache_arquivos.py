@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+from cache_arquivos import CacheArquivos, _tamanho_resultado
+from conciliacao import Conciliacao
+from indice_movimentos import IndiceBusca
+
+
+def _df(linhas):
+    return pd.DataFrame({"valor": np.arange(linhas, dtype=np.int64)})
+
+
+def test_acertos_e_falhas():
+    cache = CacheArquivos()
+    chamadas = []
+
+    def carregar():
+        chamadas.append(1)
+        return _df(10)
+
+    cache.obter("a", carregar)
+    cache.obter("a", carregar)
+    cache.obter("b", carregar)
+
+    assert len(chamadas) == 2
+    assert cache.estatisticas()["acertos"] == 1
+    assert cache.estatisticas()["falhas"] == 2
+
+
+def test_descarta_o_menos_usado_recentemente():
+    cache = CacheArquivos(max_entradas=2)
+    cache.obter("a", lambda: _df(1))
+    cache.obter("b", lambda: _df(1))
+    cache.obter("a", lambda: _df(1))
+    cache.obter("c", lambda: _df(1))
+
+    assert cache.em_cache("a") and cache.em_cache("c")
+    assert not cache.em_cache("b")
+    assert cache.estatisticas()["descartes"] == 1
+
+
+def test_limite_de_bytes():
+    tamanho = _tamanho_resultado(_df(1000))
+    cache = CacheArquivos(max_bytes=2 * tamanho)
+    cache.obter("a", lambda: _df(1000))
+    cache.obter("b", lambda: _df(1000))
+    cache.obter("c", lambda: _df(1000))
+
+    assert not cache.em_cache("a")
+    assert cache.estatisticas()["bytes"] == 2 * tamanho
+
+    # Maior que o limite inteiro: devolvido, mas não guardado
+    cache.obter("grande", lambda: _df(3000))
+    assert not cache.em_cache("grande")
+
+
+def test_tamanho_conta_dicionarios_e_objetos_dos_arrays():
+    tabelas = {"violacoes": _df(1000), "resumo": _df(500)}
+    assert _tamanho_resultado(tabelas) == _tamanho_resultado(tabelas["violacoes"]) + _tamanho_resultado(tabelas["resumo"])
+
+    chaves = np.array([f"PR{i:05d}" for i in range(1000)], dtype=object)
+    indice = IndiceBusca(chaves, np.arange(1001), np.arange(1000))
+    assert _tamanho_resultado(indice) > chaves.nbytes + 2 * np.arange(1000).nbytes
+
+
+def test_dataclass_em_cache_nao_e_alterado_pela_copia():
+    cache = CacheArquivos()
+    conciliacao = Conciliacao(_df(3), _df(2), _df(1))
+    copia = cache.obter("c", lambda: conciliacao)
+    copia.conciliados.loc[0, "valor"] = 99
+    copia.scena_sem_par = None
+
+    de_novo = cache.obter("c", lambda: None)
+    assert de_novo.conciliados["valor"].tolist() == [0, 1, 2]
+    assert de_novo.scena_sem_par is not None
+
+
+def test_dicionario_em_cache_nao_e_alterado_pela_copia():
+    cache = CacheArquivos()
+    copia = cache.obter("v", lambda: {"violacoes": _df(2)})
+    copia.pop("violacoes")
+
+    assert "violacoes" in cache.obter("v", lambda: None)
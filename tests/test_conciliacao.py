@@ -0,0 +1,97 @@
+import pandas as pd
+
+from conciliacao import conciliar, divergencias_conciliacao
+
+
+def _giros(linhas):
+    # linhas: (registro, voo, calço/AIBT, toque/ALDT) de pousos OPE
+    return pd.DataFrame({
+        "Sit.": "OPE",
+        "Registro": [linha[0] for linha in linhas],
+        "Voo chegada": [linha[1] for linha in linhas],
+        "Voo saída": None,
+        "AIBT": pd.to_datetime([linha[2] for linha in linhas]),
+        "ALDT": pd.to_datetime([linha[3] for linha in linhas]),
+        "AOBT": pd.NaT,
+        "ATOT": pd.NaT,
+    })
+
+
+def _rima(linhas):
+    # linhas: (matrícula, nº voo, calço, toque) de pousos
+    calco = pd.to_datetime([linha[2] for linha in linhas])
+    toque = pd.to_datetime([linha[3] for linha in linhas])
+    return pd.DataFrame({
+        "MOVIMENTO_TIPO": "P",
+        "AERONAVE_MARCAS": [linha[0] for linha in linhas],
+        "VOO_NUMERO": [linha[1] for linha in linhas],
+        "CALCO_DATA": calco.normalize(),
+        "CALCO_HORARIO": calco.strftime("%H:%M"),
+        "TOQUE_DATA": toque.normalize(),
+        "TOQUE_HORARIO": toque.strftime("%H:%M"),
+    })
+
+
+def test_casa_pela_matricula_normalizada_e_mede_diferenca():
+    giros = _giros([("PR-ABC", "AZU4012", "2024-03-01 10:10", "2024-03-01 10:02")])
+    rima = _rima([("prabc", "4012", "2024-03-01 10:00", "2024-03-01 09:55")])
+    resultado = conciliar(giros, rima, tolerancia_min=30)
+
+    assert len(resultado.conciliados) == 1
+    assert resultado.conciliados["Δ Calço (min)"].iloc[0] == 10
+    assert resultado.conciliados["Δ Toque (min)"].iloc[0] == 7
+    assert resultado.scena_sem_par.empty and resultado.rima_sem_par.empty
+    assert len(divergencias_conciliacao(resultado, limite_min=5)) == 1
+    assert divergencias_conciliacao(resultado, limite_min=10).empty
+
+
+def test_fora_da_tolerancia_ou_outra_matricula_fica_sem_par():
+    giros = _giros([("PRABC", "AZU1", "2024-03-01 10:00", None), ("PRXYZ", "AZU2", "2024-03-01 12:00", None)])
+    rima = _rima([("PRABC", "1", "2024-03-01 11:00", "2024-03-01 10:55"), ("PRDEF", "2", "2024-03-01 12:00", "2024-03-01 11:55")])
+    resultado = conciliar(giros, rima, tolerancia_min=30)
+
+    assert resultado.conciliados.empty
+    assert len(resultado.scena_sem_par) == 2
+    assert len(resultado.rima_sem_par) == 2
+
+
+def test_circuitos_seguidos_casam_todos_os_pares():
+    # Dois SCENA disputam o mesmo RIMA mais próximo; o perdedor deve ficar com o
+    # outro RIMA livre dentro da tolerância, em vez de ir para "sem par"
+    giros = _giros([
+        ("PRABC", "ZZZ-PRABC", "2024-03-01 10:00", None),
+        ("PRABC", "ZZZ-PRABC", "2024-03-01 10:12", None),
+    ])
+    rima = _rima([
+        ("PRABC", "1", "2024-03-01 10:08", "2024-03-01 10:03"),
+        ("PRABC", "2", "2024-03-01 09:50", "2024-03-01 09:45"),
+    ])
+    resultado = conciliar(giros, rima, tolerancia_min=15)
+
+    assert len(resultado.conciliados) == 2
+    assert resultado.scena_sem_par.empty
+    assert resultado.rima_sem_par.empty
+    # O RIMA das 10:08 fica com o SCENA mais próximo (10:12)
+    par = resultado.conciliados.set_index("Calço SCENA")["Calço RIMA"]
+    assert par[pd.Timestamp("2024-03-01 10:12")] == pd.Timestamp("2024-03-01 10:08")
+    assert par[pd.Timestamp("2024-03-01 10:00")] == pd.Timestamp("2024-03-01 09:50")
+
+
+def test_rima_unico_fica_com_um_so_scena():
+    giros = _giros([("PRABC", "A", "2024-03-01 10:00", None), ("PRABC", "B", "2024-03-01 10:05", None)])
+    rima = _rima([("PRABC", "1", "2024-03-01 10:04", "2024-03-01 09:58")])
+    resultado = conciliar(giros, rima, tolerancia_min=30)
+
+    assert len(resultado.conciliados) == 1
+    assert resultado.conciliados["Voo"].iloc[0] == "B"
+    assert len(resultado.scena_sem_par) == 1
+
+
+def test_matricula_vazia_nao_casa_nem_com_outra_vazia():
+    # Mesma normalização do índice de movimentos: "---" não é matrícula
+    giros = _giros([("---", "AZU1", "2024-03-01 10:00", None)])
+    rima = _rima([(" - ", "1", "2024-03-01 10:00", "2024-03-01 09:55")])
+    resultado = conciliar(giros, rima, tolerancia_min=30)
+
+    assert resultado.conciliados.empty
+    assert len(resultado.scena_sem_par) == 1 and len(resultado.rima_sem_par) == 1
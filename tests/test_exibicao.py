@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+from pandas.io.formats.style import Styler
+
+from exibicao import mesmo_minuto, preparar_pagina
+
+
+def test_mesmo_minuto_compara_o_horario_exibido():
+    calco = pd.Series(pd.to_datetime(["2024-03-01 10:00:59", "2024-03-02 00:05:00", "2024-03-01 10:00:00", None]))
+    pouso = pd.Series(pd.to_datetime(["2024-03-01 10:00:01", "2024-03-01 00:05:00", "2024-03-01 10:01:00", None]))
+
+    # Os segundos e a data não aparecem no HH:MM; NaT nunca é destacado
+    assert mesmo_minuto(calco, pouso).tolist() == [True, True, False, False]
+
+
+def test_pagina_formata_so_as_linhas_exibidas_e_destaca_com_styler():
+    df = pd.DataFrame({"Data": pd.date_range("2024-03-01", periods=4), "Id.Vuelo": ["A", "B", "C", "D"]})
+
+    pagina = preparar_pagina(df, np.array([2, 3]), destaque=[False] * 4, formatos={"Data": "%d/%m/%Y"})
+    assert pagina["Data"].tolist() == ["03/03/2024", "04/03/2024"]
+    assert df["Data"].dtype.kind == "M"
+
+    estilizada = preparar_pagina(df, np.array([2, 3]), destaque=[False, False, False, True], colunas_destaque=["Id.Vuelo"])
+    assert isinstance(estilizada, Styler)
+    estilos = estilizada._compute().ctx
+    assert list(estilos) == [(1, 1)]
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+from giros import distribuicao_giros, giros_completos, montar_giros
+
+
+def _horario(texto):
+    return pd.Timestamp(f"2024-03-01 {texto}") if texto else pd.NaT
+
+
+def _chegadas(linhas):
+    # linhas: (Id.Vuelo, Registro, Stand, Sit., ALDT, AIBT)
+    return pd.DataFrame({
+        "Id.Vuelo": [linha[0] for linha in linhas],
+        "Data": pd.Timestamp("2024-03-01"),
+        "Registro": [linha[1] for linha in linhas],
+        "Stand": [linha[2] for linha in linhas],
+        "Sit.": [linha[3] for linha in linhas],
+        "ALDT": [_horario(linha[4]) for linha in linhas],
+        "AIBT": [_horario(linha[5]) for linha in linhas],
+    })
+
+
+def _saidas(linhas, prefixo=""):
+    # linhas: (Id.Vuelo, Registro, Stand, Sit., AOBT, ATOT)
+    return pd.DataFrame({
+        f"{prefixo}Id.Vuelo": [linha[0] for linha in linhas],
+        f"{prefixo}Data": [pd.Timestamp("2024-03-01") if linha[0] else pd.NaT for linha in linhas],
+        f"{prefixo}Registro": [linha[1] for linha in linhas],
+        f"{prefixo}Stand": [linha[2] for linha in linhas],
+        f"{prefixo}Sit.": [linha[3] for linha in linhas],
+        f"{prefixo}AOBT": [_horario(linha[4]) for linha in linhas],
+        f"{prefixo}ATOT": [_horario(linha[5]) for linha in linhas],
+    })
+
+
+def test_arquivo_conjunto_une_chegada_e_saida_associada():
+    df = pd.concat([
+        _chegadas([("AZU4001", "PRABC", "3", "OPE", "10:00", "10:06")]),
+        _saidas([("AZU4002", "PRABC", "3", "OPE", "11:06", "11:20")], prefixo="Assoc. "),
+    ], axis=1)
+    giro = montar_giros(df).iloc[0]
+
+    assert (giro["Voo chegada"], giro["Voo saída"]) == ("AZU4001", "AZU4002")
+    assert giro["Operador"] == "AZU"
+    assert (giro["Taxi-in (min)"], giro["Solo (min)"], giro["Taxi-out (min)"]) == (6, 60, 14)
+    assert giros_completos(montar_giros(df)) == 1
+
+
+def test_arquivo_so_de_chegadas():
+    giros = montar_giros(_chegadas([("GLO1001", "PRXYZ", "5", "OPE", "10:00", "10:04")]))
+
+    assert giros["Taxi-in (min)"].iloc[0] == 4
+    assert giros[["AOBT", "ATOT"]].isna().all().all()
+    assert np.isnan(giros["Solo (min)"].iloc[0]) and np.isnan(giros["Taxi-out (min)"].iloc[0])
+    assert pd.isna(giros["Voo saída"].iloc[0])
+    assert giros_completos(giros) == 0
+
+
+def test_arquivo_so_de_saidas():
+    giros = montar_giros(_saidas([("ZZZ-PRABC", "PRABC", "7", "OPE", "11:00", "11:09")]))
+
+    assert giros["Taxi-out (min)"].iloc[0] == 9
+    assert giros["Operador"].iloc[0] == "AVG"
+    assert giros["Stand"].iloc[0] == "7"
+    assert pd.isna(giros["Voo chegada"].iloc[0])
+    assert giros[["ALDT", "AIBT"]].isna().all().all()
+
+
+def test_sem_chegada_usa_os_valores_da_saida_associada():
+    # Visita só com a saída no arquivo conjunto: identificação vem das colunas "Assoc."
+    df = pd.concat([
+        _chegadas([(None, None, None, None, None, None)]).assign(Data=pd.NaT),
+        _saidas([("TAM3001", "PRTAM", "9", "OPE", "12:00", "12:12")], prefixo="Assoc. "),
+    ], axis=1)
+    giro = montar_giros(df).iloc[0]
+
+    assert (giro["Registro"], giro["Stand"], giro["Sit."], giro["Operador"]) == ("PRTAM", "9", "OPE", "TAM")
+    assert giro["Data"] == pd.Timestamp("2024-03-01")
+    assert giro["Taxi-out (min)"] == 12
+
+
+def test_distribuicao_ignora_intervalos_negativos_e_voos_nao_operados():
+    df = pd.concat([
+        _chegadas([
+            ("AZU1", "PRA", "1", "OPE", "10:00", "10:04"),
+            ("AZU2", "PRB", "1", "OPE", "10:00", "10:10"),
+            ("AZU3", "PRC", "1", "OPE", "10:00", "09:50"),   # calço antes do pouso
+            ("AZU4", "PRD", "2", "CAN", "10:00", "10:30"),   # não operado
+        ]),
+        _saidas([(None, None, None, None, None, None)] * 4, prefixo="Assoc. "),
+    ], axis=1)
+    distribuicao = distribuicao_giros(montar_giros(df)).set_index("Métrica")
+
+    assert list(distribuicao.index) == ["Taxi-in (min)"]
+    taxi_in = distribuicao.loc["Taxi-in (min)"]
+    assert (taxi_in["Voos"], taxi_in["Mediana"], taxi_in["Máximo"]) == (2, 7, 10)
+
+    por_stand = distribuicao_giros(montar_giros(df), por="Stand")
+    assert por_stand["Stand"].tolist() == ["1"]
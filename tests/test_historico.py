@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+import historico
+from validacoes import PREDICADOS
+
+
+def _scena_chegada():
+    return pd.DataFrame({
+        "Data": pd.to_datetime(["2024-03-01", "2024-03-01", "2024-03-01", "2024-03-02"]),
+        "Id.Vuelo": ["AZU4012", None, None, "GLO1010"],
+        "Registro": ["PRABC", "PRDEF", "PRDEF", None],
+        "Id.Asociado": [None, "ZZZ-PRDEF", None, "GLO1011"],
+        "Est.": pd.Categorical(["IBK", None, "IBK", None]),
+        "Stand": pd.Categorical([1, "HOLD", None, 3]),
+        "AIBT": pd.to_datetime(["2024-03-01 10:00", None, "2024-03-02 08:00", "2024-03-02 09:00"]),
+    })
+
+
+def test_vazios_continuam_vazios_apos_anexar_e_consultar(tmp_path):
+    df = _scena_chegada()
+    historico.anexar(df, "SCENA", diretorio=tmp_path)
+    lido = historico.consultar("SCENA_chegada", diretorio=tmp_path).sort_values("AIBT", na_position="first")
+
+    for coluna in ("Id.Vuelo", "Registro", "Id.Asociado", "Est.", "Stand"):
+        assert lido[coluna].isna().sum() == df[coluna].isna().sum(), coluna
+        assert not lido[coluna].astype("string").isin(["nan", "<NA>", "None"]).any(), coluna
+    # Est. vazio não vira divergência
+    assert not PREDICADOS["est_diferente_ibk"](lido).any()
+
+
+def test_linhas_sem_chave_nao_sao_fundidas(tmp_path):
+    df = _scena_chegada()
+    resumo = historico.anexar(df, "SCENA", diretorio=tmp_path)
+    assert resumo["novas"] == len(df)
+    assert len(historico.consultar("SCENA_chegada", diretorio=tmp_path)) == len(df)
+
+    # Reenviar o mesmo arquivo não duplica nada, nem as linhas sem Id.Vuelo
+    resumo = historico.anexar(df, "SCENA", diretorio=tmp_path)
+    assert resumo["novas"] == 0
+    assert resumo["atualizadas"] == len(df)
+    assert len(historico.consultar("SCENA_chegada", diretorio=tmp_path)) == len(df)
+
+
+def test_voo_numero_inteiro_vira_texto_sem_perder_vazios(tmp_path):
+    rima = pd.DataFrame({
+        "PREVISTO_DATA": pd.to_datetime(["2024-03-01", "2024-03-01"]),
+        "AERONAVE_MARCAS": ["PRABC", "PRDEF"],
+        "VOO_NUMERO": [4012.0, np.nan],
+    })
+    historico.anexar(rima, "RIMA", diretorio=tmp_path)
+    lido = historico.consultar("RIMA", diretorio=tmp_path).sort_values("AERONAVE_MARCAS")
+    assert lido["VOO_NUMERO"].iloc[0] == "4012"
+    assert pd.isna(lido["VOO_NUMERO"].iloc[1])
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from horario_pico import COLUNAS_FAIXA, fatiar_cubo, montar_cubo
+
+
+def _rima(linhas):
+    # linhas: [(operador, horário do calço, movimento, pax)]
+    return pd.DataFrame({
+        "CALCO_HORARIO": [linha[1] for linha in linhas],
+        "PAX_LOCAL": [linha[3] for linha in linhas],
+        "PAX_CONEXAO_DOMESTICO": 0,
+        "AERONAVE_OPERADOR": [linha[0] for linha in linhas],
+        "MOVIMENTO_TIPO": [linha[2] for linha in linhas],
+    })
+
+
+def test_companhia_com_mais_pax_em_cada_faixa():
+    cubo = montar_cubo(_rima([
+        ("AZU", "10:05", "P", 100),
+        ("GLO", "10:40", "D", 150),
+        ("AZU", "14:10", "D", 80),
+        ("GERAL", "14:20", "P", 500),
+    ]))
+    analise = fatiar_cubo(cubo, "Todas")
+
+    assert list(analise["Faixa Horária"]) == ["10:00 - 10:59", "14:00 - 14:59"]
+    assert list(analise["Total_PAX"]) == [250, 80]
+    assert list(analise["Companhia Aérea"]) == ["GLO", "AZU"]
+    assert list(analise["PAX Total Cia Aérea"]) == [150, 80]
+
+
+def test_operador_ausente_conta_nos_totais_mas_nao_vira_companhia():
+    cubo = montar_cubo(_rima([
+        ("AZU", "10:05", "P", 100),
+        (np.nan, "10:10", "P", 300),
+        (None, "12:00", "D", 50),
+    ]))
+    analise = fatiar_cubo(cubo, "Todas")
+
+    assert list(cubo.operadores) == ["AZU"]
+    assert list(analise["Total_PAX"]) == [400, 50]
+    assert list(analise["Total_Operações"]) == [2, 1]
+    assert analise["Companhia Aérea"].iloc[0] == "AZU"
+    assert analise["Companhia Aérea"].iloc[1] is None
+    assert analise["PAX Total Cia Aérea"].iloc[1] == 0
+
+
+def test_sem_voos_comerciais_devolve_tabela_vazia():
+    cubo = montar_cubo(_rima([("GERAL", "09:00", "P", 4), ("GERAL", "11:30", "D", 2)]))
+    analise = fatiar_cubo(cubo, "Todas")
+
+    assert analise.empty
+    assert list(analise.columns) == COLUNAS_FAIXA
+
+
+def test_filtro_sem_movimentos_devolve_tabela_vazia():
+    cubo = montar_cubo(_rima([("AZU", "10:05", "P", 100)]))
+
+    assert fatiar_cubo(cubo, "Embarque").empty
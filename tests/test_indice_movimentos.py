@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+from indice_movimentos import historico_movimentos, indexar_movimentos, montar_indice
+
+
+def _movimentos():
+    # Chegadas e saídas empilhadas, fora de ordem cronológica
+    return pd.DataFrame({
+        "Análise": ["Chegada", "Saída", "Chegada", "Saída", "Chegada"],
+        "Data": pd.to_datetime(["2024-03-02", "2024-03-01", "2024-03-01", "2024-03-02", "2024-03-01"]),
+        "Id.Vuelo": ["AZU4012", "AZU4013", "AZU4012", "ZZZ-PRXYZ", None],
+        "Registro": ["PR-ABC", "PR-ABC", "PR-ABC", "PRDEF", None],
+        "ALDT": pd.to_datetime(["2024-03-02 09:50", None, "2024-03-01 09:50", None, None]),
+        "AIBT": pd.to_datetime(["2024-03-02 10:00", None, "2024-03-01 10:00", None, None]),
+        "AOBT": pd.to_datetime([None, "2024-03-01 11:00", None, "2024-03-02 08:00", None]),
+        "ATOT": pd.to_datetime([None, "2024-03-01 11:10", None, "2024-03-02 08:10", None]),
+    }, index=[10, 20, 30, 40, 50])
+
+
+def test_busca_por_matricula_em_ordem_cronologica():
+    df = _movimentos()
+    indice = indexar_movimentos(df)
+    # Hífen, espaço e caixa não importam
+    for termo in ("PR-ABC", "prabc", " pr abc "):
+        assert list(indice.registro.buscar(termo)) == [2, 1, 0]
+    historico = historico_movimentos(df, indice.registro.buscar("PRABC"))
+    assert list(historico["Linha"]) == [32, 22, 12]
+
+
+def test_busca_por_voo_e_chave_inexistente():
+    indice = indexar_movimentos(_movimentos())
+    assert list(indice.voo.buscar("azu4012")) == [2, 0]
+    assert len(indice.voo.buscar("GLO1")) == 0
+    assert len(indice.registro.buscar("")) == 0
+    assert len(indice.registro.buscar("-")) == 0
+
+
+def test_matricula_zzz_divergente_tambem_e_indexada():
+    indice = indexar_movimentos(_movimentos())
+    assert list(indice.registro.buscar("PR-XYZ")) == [3]
+    assert list(indice.registro.buscar("PRDEF")) == [3]
+
+
+def test_sugestoes_por_prefixo():
+    indice = indexar_movimentos(_movimentos())
+    assert indice.registro.sugestoes("pr") == ["PRABC", "PRDEF", "PRXYZ"]
+    assert indice.registro.sugestoes("PRD") == ["PRDEF"]
+    assert indice.registro.sugestoes("PRABC", limite=1) == ["PRABC"]
+    assert indice.registro.sugestoes("X") == []
+
+
+def test_montar_indice_agrupa_e_ordena_por_instante():
+    chaves = np.array(["B", None, "A", "B", "A"], dtype=object)
+    instante = np.array([5, 1, 9, 2, 3], dtype=np.int64)
+    indice = montar_indice(chaves, np.arange(5), instante)
+    assert list(indice.chaves) == ["A", "B"]
+    assert list(indice.inicio) == [0, 2, 4]
+    assert list(indice.posicoes) == [4, 2, 3, 0]
@@ -0,0 +1,33 @@
+import openpyxl
+import pandas as pd
+import pytest
+
+from leitores_excel import LEITORES, nomes_colunas
+
+
+def _planilha(caminho, cabecalho, linhas):
+    livro = openpyxl.Workbook()
+    planilha = livro.active
+    planilha.title = "data"
+    for linha in [cabecalho] + linhas:
+        planilha.append(linha)
+    livro.save(caminho)
+    return caminho
+
+
+@pytest.mark.parametrize("cabecalho", [
+    ["A", "A", "B", None, "A.1", "A"],
+    ["x", "x", "x.1", "x", "x.2"],
+    ["Stand", "Assoc. Stand", "Stand", None],
+])
+def test_nomes_iguais_aos_do_read_excel(tmp_path, cabecalho):
+    caminho = _planilha(tmp_path / "dup.xlsx", cabecalho, [list(range(len(cabecalho)))])
+    assert nomes_colunas(cabecalho) == list(pd.read_excel(caminho).columns)
+
+
+@pytest.mark.parametrize("usecols", [None, lambda nome: str(nome).startswith("A"), lambda nome: nome == "A.1"])
+def test_streaming_igual_ao_read_excel_com_colunas_repetidas(tmp_path, usecols):
+    caminho = _planilha(tmp_path / "dup.xlsx", ["A", "A", "B", None, "A.1"], [[1, 2, 3, 4, 5], [6.0, 7, None, 9, 10], [None] * 5])
+    esperado = pd.read_excel(caminho, sheet_name="data", usecols=usecols)
+    lido = LEITORES["openpyxl_streaming"].ler(caminho, "data", usecols)
+    pd.testing.assert_frame_equal(lido, esperado, check_dtype=False)
@@ -0,0 +1,85 @@
+import pandas as pd
+
+from ocupacao_stands import conflitos_stands, pico_ocupacao, utilizacao_stands
+
+
+def _intervalos(linhas):
+    # linhas: (stand, voo, calço, descalço) no mesmo dia
+    return pd.DataFrame({
+        "Stand": pd.Categorical([str(linha[0]) for linha in linhas]),
+        "Data": pd.Timestamp("2024-03-01"),
+        "Voo": [linha[1] for linha in linhas],
+        "Registro": [f"PR{linha[1]}" for linha in linhas],
+        "Calço": pd.to_datetime([f"2024-03-01 {linha[2]}" for linha in linhas]),
+        "Descalço": pd.to_datetime([f"2024-03-01 {linha[3]}" for linha in linhas]),
+    })
+
+
+def _pares(conflitos):
+    return set(zip(conflitos["Voo"], conflitos["Voo ocupante"]))
+
+
+def test_estadias_encostadas_nao_conflitam():
+    # [10:00, 11:00) e [11:00, 12:00): o descalço libera o stand no mesmo instante
+    conflitos = conflitos_stands(_intervalos([(1, "A", "10:00", "11:00"), (1, "B", "11:00", "12:00")]))
+    assert conflitos.empty
+
+
+def test_intervalos_aninhados_apontam_para_quem_segura_o_stand():
+    # C começa depois que B saiu, mas A ainda ocupa o stand
+    conflitos = conflitos_stands(_intervalos([
+        (1, "A", "10:00", "14:00"),
+        (1, "B", "11:00", "12:00"),
+        (1, "C", "12:30", "13:00"),
+    ]))
+    assert _pares(conflitos) == {("B", "A"), ("C", "A")}
+    assert conflitos.set_index("Voo").loc["B", "Sobreposição (min)"] == 60
+    assert conflitos.set_index("Voo").loc["C", "Sobreposição (min)"] == 30
+
+
+def test_empate_no_maior_descalco():
+    # A e B saem no mesmo instante: C conflita com um deles, B conflita com A
+    conflitos = conflitos_stands(_intervalos([
+        (1, "A", "10:00", "12:00"),
+        (1, "B", "10:30", "12:00"),
+        (1, "C", "11:00", "11:30"),
+    ]))
+    ocupantes = dict(zip(conflitos["Voo"], conflitos["Voo ocupante"]))
+    assert ocupantes["B"] == "A"
+    assert ocupantes["C"] in {"A", "B"}
+    assert len(conflitos) == 2
+
+
+def test_varredura_reinicia_em_cada_stand():
+    # O descalço tardio do stand 1 não vaza para o primeiro voo do stand 2
+    conflitos = conflitos_stands(_intervalos([
+        (1, "A", "10:00", "18:00"),
+        (2, "B", "11:00", "12:00"),
+        (2, "C", "11:30", "12:30"),
+    ]))
+    assert _pares(conflitos) == {("C", "B")}
+    assert conflitos["Stand"].iloc[0] == "2"
+
+
+def test_ordem_de_entrada_nao_importa():
+    linhas = [(1, "A", "10:00", "14:00"), (1, "B", "11:00", "12:00"), (2, "C", "09:00", "10:00"), (1, "D", "13:00", "15:00")]
+    assert _pares(conflitos_stands(_intervalos(linhas))) == _pares(conflitos_stands(_intervalos(linhas[::-1])))
+
+
+def test_pico_ocupacao():
+    intervalos = _intervalos([
+        (1, "A", "10:00", "11:00"),
+        (1, "B", "11:00", "12:00"),
+        (2, "C", "10:30", "11:30"),
+        (3, "D", "11:15", "11:45"),
+    ])
+    pico = pico_ocupacao(intervalos)
+    # Encostadas não somam: às 11:15 estão B, C e D
+    assert pico == {"stands": 3, "inicio": pd.Timestamp("2024-03-01 11:15")}
+    assert pico_ocupacao(intervalos.iloc[:0]) == {"stands": 0, "inicio": None}
+
+
+def test_utilizacao_diaria():
+    utilizacao = utilizacao_stands(_intervalos([(1, "A", "06:00", "12:00"), (2, "B", "00:00", "06:00")]))
+    assert utilizacao.loc[pd.Timestamp("2024-03-01"), "1"] == 25
+    assert utilizacao.loc[pd.Timestamp("2024-03-01"), "2"] == 25
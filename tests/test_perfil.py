@@ -0,0 +1,52 @@
+import gc
+import tracemalloc
+
+from perfil import Perfilador, SessaoPerfil
+
+
+def test_uma_sessao_desligando_nao_para_o_rastreio_da_outra():
+    sessao_a, sessao_b = SessaoPerfil(), SessaoPerfil()
+    try:
+        Perfilador(True, sessao=sessao_a)
+        perfil_b = Perfilador(True, sessao=sessao_b)
+        Perfilador(False, sessao=sessao_a)
+        assert tracemalloc.is_tracing()
+
+        with perfil_b.etapa("etapa"):
+            bytearray(1024)
+        assert perfil_b.registros[0]["pico_mb"] is not None
+
+        Perfilador(False, sessao=sessao_b)
+        assert not tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_sessao_encerrada_libera_a_referencia():
+    sessao_a, sessao_b = SessaoPerfil(), SessaoPerfil()
+    try:
+        Perfilador(True, sessao=sessao_a)
+        del sessao_a
+        gc.collect()
+
+        Perfilador(False, sessao=sessao_b)
+        assert not tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_etapa_interna_nao_apaga_o_pico_da_externa():
+    sessao = SessaoPerfil()
+    perfil = Perfilador(True, sessao=sessao)
+    try:
+        with perfil.etapa("externa"):
+            bloco = bytearray(8 * 1024 * 1024)
+            del bloco
+            with perfil.etapa("interna"):
+                bytearray(1024)
+        interna, externa = perfil.registros
+
+        assert interna["etapa"] == "interna" and interna["pico_mb"] < 1
+        assert externa["etapa"] == "externa" and externa["pico_mb"] >= 8
+    finally:
+        Perfilador(False, sessao=sessao)
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+from validacoes import REGRAS_CHEGADA, REGRAS_SAIDA, _casar, avaliar_regras, revalidar
+
+
+def _chegadas(linhas):
+    # linhas: [(Id.Vuelo, dia, Stand, Sv.)]; demais colunas sem violação
+    n = len(linhas)
+    aibt = pd.Timestamp("2024-03-01 10:00")
+    return pd.DataFrame({
+        "Id.Vuelo": [linha[0] for linha in linhas],
+        "Data": [pd.Timestamp("2024-03-01") + pd.Timedelta(days=linha[1]) for linha in linhas],
+        "Sit.": "OPE",
+        "Est.": "IBK",
+        "Stand": [linha[2] for linha in linhas],
+        "Sv.": [linha[3] for linha in linhas],
+        "F.ETime": pd.NaT,
+        "ETime": [aibt] * n,
+        "AIBT": [aibt] * n,
+        "ALDT": [aibt - pd.Timedelta(minutes=5)] * n,
+        "Registro": "PRABC",
+        "Id.Asociado": None,
+    })
+
+
+BASE = [
+    ("AZU4001", 0, "1", "J"),
+    ("GLO1002", 0, "HOLD", "J"),
+    ("AZU4003", 1, "2", "D"),
+    ("TAM3004", 1, "3", "J"),
+]
+
+
+def _revalidar_duas_vezes(antes, depois, regras=REGRAS_CHEGADA):
+    _, snapshot, _, _ = revalidar(antes, regras)
+    violacoes, _, mudancas, resumo = revalidar(depois, regras, snapshot)
+    # A matriz incremental tem de ser idêntica a uma avaliação completa
+    pd.testing.assert_frame_equal(violacoes, avaliar_regras(depois, regras), check_dtype=False)
+    return mudancas, resumo
+
+
+def test_reenvio_identico_reaproveita_tudo():
+    mudancas, resumo = _revalidar_duas_vezes(_chegadas(BASE), _chegadas(BASE))
+
+    assert resumo == {"inseridas": 0, "alteradas": 0, "inalteradas": 4, "removidas": 0, "novas": 0, "corrigidas": 0}
+    assert mudancas.empty
+
+
+def test_linha_editada_casa_pela_identidade():
+    editada = list(BASE)
+    editada[0] = ("AZU4001", 0, "HOLD", "J")   # passa a violar stand_hold
+    editada[1] = ("GLO1002", 0, "5", "J")      # deixa de violar stand_hold
+    mudancas, resumo = _revalidar_duas_vezes(_chegadas(BASE), _chegadas(editada))
+
+    assert resumo == {"inseridas": 0, "alteradas": 2, "inalteradas": 2, "removidas": 0, "novas": 1, "corrigidas": 1}
+    assert mudancas.set_index("Situação")["Identificação"].to_dict() == {"Nova": "AZU4001", "Corrigida": "GLO1002"}
+
+
+def test_linhas_removidas_e_inseridas():
+    depois = BASE[1:] + [("AZU4999", 2, "HOLD", "D")]
+    mudancas, resumo = _revalidar_duas_vezes(_chegadas(BASE), _chegadas(depois))
+
+    assert resumo["inseridas"] == 1 and resumo["removidas"] == 1
+    assert resumo["inalteradas"] == 3 and resumo["alteradas"] == 0
+    # A linha inserida viola stand_hold e sv_proibida_comercial
+    assert resumo["novas"] == 2 and resumo["corrigidas"] == 0
+    assert set(mudancas["Identificação"]) == {"AZU4999"}
+
+
+def test_linhas_embaralhadas_continuam_inalteradas():
+    depois = _chegadas(BASE).sample(frac=1, random_state=3).reset_index(drop=True)
+    _, resumo = _revalidar_duas_vezes(_chegadas(BASE), depois)
+
+    assert resumo["inalteradas"] == 4 and resumo["alteradas"] == 0
+
+
+def test_chaves_repetidas_casam_pela_ordem_de_ocorrencia():
+    assert list(_casar(np.array([5, 5, 7]), np.array([7, 5, 5]))) == [1, 2, 0]
+    assert list(_casar(np.array([5, 5, 5]), np.array([5, 5]))) == [0, 1, -1]
+
+    # Mesma identidade duas vezes: cada edição casa com a ocorrência correspondente
+    repetidas = BASE + [("AZU4001", 0, "HOLD", "J")]
+    editadas = list(repetidas)
+    editadas[0] = ("AZU4001", 0, "7", "D")
+    editadas[4] = ("AZU4001", 0, "8", "J")
+    _, resumo = _revalidar_duas_vezes(_chegadas(repetidas), _chegadas(editadas))
+
+    assert resumo["alteradas"] == 2 and resumo["inseridas"] == 0 and resumo["removidas"] == 0
+    # 1ª ocorrência passa a violar sv_proibida_comercial; a 2ª sai do HOLD
+    assert resumo["novas"] == 1 and resumo["corrigidas"] == 1
+
+
+def test_regras_diferentes_avaliam_tudo_de_novo():
+    df = _chegadas(BASE).assign(ATOT=pd.NaT, AOBT=pd.NaT)
+    _, snapshot, _, _ = revalidar(df, REGRAS_CHEGADA)
+    violacoes, novo_snapshot, mudancas, resumo = revalidar(df, REGRAS_SAIDA, snapshot)
+
+    assert mudancas is None and resumo is None
+    assert novo_snapshot.regras == tuple(regra.nome for regra in REGRAS_SAIDA)
+    pd.testing.assert_frame_equal(violacoes, avaliar_regras(df, REGRAS_SAIDA), check_dtype=False)
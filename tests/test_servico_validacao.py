@@ -0,0 +1,108 @@
+import http.client
+import io
+import json
+import socket
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from servico_validacao import ServicoValidacao, TratadorValidacao
+
+RIMA_CSV = (
+    "CALCO_DATA;CALCO_HORARIO;TOQUE_DATA;TOQUE_HORARIO;PREVISTO_DATA;MOVIMENTO_TIPO;"
+    "AERONAVE_OPERADOR;AERONAVE_MARCAS;VOO_NUMERO;PAX_LOCAL;PAX_CONEXAO_DOMESTICO\n"
+    "01/03/2024;10:05:00;01/03/2024;10:00:00;01/03/2024;P;AZU;PRABC;4001;100;0\n"
+    "02/03/2024;00:05:00;01/03/2024;23:55:00;01/03/2024;P;GLO;PRXYZ;1002;80;5\n"
+).encode("utf-8")
+
+
+@pytest.fixture
+def servico(tmp_path):
+    servico = ServicoValidacao(processos=1, fila_maxima=1, diretorio_temporario=str(tmp_path))
+    yield servico
+    servico.encerrar()
+
+
+def _esperar(servico, id_trabalho, limite=60):
+    fim = time.time() + limite
+    while time.time() < fim:
+        situacao = servico.situacao(id_trabalho)
+        if situacao["situacao"] in ("concluido", "erro"):
+            return situacao
+        time.sleep(0.05)
+    raise TimeoutError(id_trabalho)
+
+
+def test_fila_cheia_recusa_e_libera_ao_concluir(servico):
+    assert servico.reservar()
+    assert not servico.reservar()
+
+    id_trabalho = servico.enviar("rima.csv", io.BytesIO(RIMA_CSV), len(RIMA_CSV))
+    situacao = _esperar(servico, id_trabalho)
+
+    assert situacao["situacao"] == "concluido"
+    assert len(servico.violacoes(id_trabalho)) == 1
+    metricas = servico.metricas()
+    assert (metricas["aceitos"], metricas["recusados"], metricas["concluidos"], metricas["pendentes"]) == (1, 1, 1, 0)
+    assert servico.reservar()
+
+
+def test_upload_interrompido_libera_a_vaga_e_conta_como_abortado(servico, tmp_path):
+    assert servico.reservar()
+    with pytest.raises(ConnectionError):
+        servico.enviar("rima.csv", io.BytesIO(RIMA_CSV[:50]), len(RIMA_CSV))
+
+    metricas = servico.metricas()
+    assert (metricas["aceitos"], metricas["abortados"], metricas["pendentes"]) == (0, 1, 0)
+    assert list(tmp_path.iterdir()) == []
+    assert servico.reservar()
+
+
+@pytest.fixture
+def servidor(servico):
+    tratador = type("Tratador", (TratadorValidacao,), {"servico": servico, "timeout": 0.5})
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), tratador)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def _post_incompleto(servidor, corpo, tamanho, fechar_escrita):
+    # Declara `tamanho` bytes e envia só `corpo`; devolve o status da resposta
+    conexao = socket.create_connection(servidor.server_address)
+    conexao.sendall(
+        f"POST /trabalhos?nome=rima.csv HTTP/1.1\r\nHost: x\r\nContent-Length: {tamanho}\r\n\r\n".encode() + corpo
+    )
+    if fechar_escrita:
+        conexao.shutdown(socket.SHUT_WR)
+    resposta = http.client.HTTPResponse(conexao)
+    resposta.begin()
+    conexao.close()
+    return resposta.status, json.loads(resposta.read() or b"{}")
+
+
+def test_http_corpo_parado_responde_400(servidor, servico):
+    status, corpo = _post_incompleto(servidor, RIMA_CSV[:50], len(RIMA_CSV), fechar_escrita=False)
+
+    assert status == 400 and "interrompido" in corpo["erro"]
+    assert servico.metricas()["abortados"] == 1
+
+
+def test_http_corpo_truncado_responde_400(servidor, servico):
+    status, _ = _post_incompleto(servidor, RIMA_CSV[:50], len(RIMA_CSV), fechar_escrita=True)
+
+    assert status == 400
+    assert servico.metricas()["pendentes"] == 0
+
+
+def test_http_fila_cheia_responde_503(servidor, servico):
+    assert servico.reservar()
+    conexao = http.client.HTTPConnection(*servidor.server_address)
+    conexao.request("POST", "/trabalhos?nome=rima.csv", body=RIMA_CSV)
+    resposta = conexao.getresponse()
+
+    assert resposta.status == 503 and resposta.getheader("Retry-After") == "5"
+    assert servico.metricas()["recusados"] == 1
@@ -0,0 +1,53 @@
+import pandas as pd
+
+from validar_lote import carregar_e_validar, listar_arquivos, main
+
+RIMA_CSV = (
+    "CALCO_DATA;CALCO_HORARIO;TOQUE_DATA;TOQUE_HORARIO;PREVISTO_DATA;MOVIMENTO_TIPO;"
+    "AERONAVE_OPERADOR;AERONAVE_MARCAS;VOO_NUMERO;PAX_LOCAL;PAX_CONEXAO_DOMESTICO\n"
+    "01/03/2024;10:05:00;01/03/2024;10:00:00;01/03/2024;P;AZU;PRABC;4001;100;0\n"
+    "02/03/2024;00:05:00;01/03/2024;23:55:00;01/03/2024;P;GLO;PRXYZ;1002;80;5\n"
+)
+
+
+def _entrada(tmp_path):
+    entrada = tmp_path / "entrada"
+    entrada.mkdir()
+    (entrada / "rima.csv").write_text(RIMA_CSV, encoding="utf-8")
+    (entrada / "corrompido.xlsx").write_bytes(b"isto nao e uma planilha")
+    (entrada / "~$rima.xlsx").write_bytes(b"")      # arquivo de trava do Excel
+    (entrada / "notas.txt").write_text("ignorar", encoding="utf-8")
+    return entrada
+
+
+def test_lista_so_planilhas(tmp_path):
+    entrada = _entrada(tmp_path)
+
+    assert listar_arquivos([str(entrada)]) == [str(entrada / "corrompido.xlsx"), str(entrada / "rima.csv")]
+
+
+def test_arquivo_com_erro_vira_resumo_sem_violacoes(tmp_path):
+    df, violacoes, resumo = carregar_e_validar(str(_entrada(tmp_path) / "corrompido.xlsx"))
+
+    assert df is None and violacoes.empty
+    assert resumo["Erro"] and resumo["Violações"] == 0
+    assert list(violacoes.columns[:2]) == ["Arquivo", "Tipo"]
+
+
+def test_lote_consolida_violacoes_e_resumo(tmp_path):
+    entrada = _entrada(tmp_path)
+    saida, resumo = tmp_path / "violacoes.csv", tmp_path / "resumo.parquet"
+
+    codigo = main([str(entrada), "-o", str(saida), "-r", str(resumo), "-p", "2"])
+
+    # Um arquivo com erro não interrompe o lote, mas muda o código de saída
+    assert codigo == 1
+    violacoes = pd.read_csv(saida, sep=";")
+    assert violacoes["Arquivo"].tolist() == [str(entrada / "rima.csv")]
+    assert violacoes[["Tipo", "Regra"]].iloc[0].tolist() == ["RIMA", "calco_diferente_toque"]
+
+    resumos = pd.read_parquet(resumo).set_index("Arquivo")
+    assert resumos.loc[str(entrada / "rima.csv"), "Violações"] == 1
+    assert resumos.loc[str(entrada / "rima.csv"), "Linhas"] == 2
+    assert pd.isna(resumos.loc[str(entrada / "rima.csv"), "Erro"])
+    assert resumos.loc[str(entrada / "corrompido.xlsx"), "Erro"]
@@ -0,0 +1,84 @@
+import json
+import os
+
+from vigiar_pasta import ARQUIVO_ESTADO, ler_resultados, ler_resumos, pasta_resultados, vigiar
+
+RIMA_CSV = (
+    "CALCO_DATA;CALCO_HORARIO;TOQUE_DATA;TOQUE_HORARIO;PREVISTO_DATA;MOVIMENTO_TIPO;"
+    "AERONAVE_OPERADOR;AERONAVE_MARCAS;VOO_NUMERO;PAX_LOCAL;PAX_CONEXAO_DOMESTICO\n"
+    "01/03/2024;10:05:00;01/03/2024;10:00:00;01/03/2024;P;AZU;PRABC;4001;100;0\n"
+    "02/03/2024;00:05:00;01/03/2024;23:55:00;01/03/2024;P;GLO;PRXYZ;1002;80;5\n"
+)
+
+
+def _vigiar_uma_vez(entradas, saida):
+    return vigiar(entradas, str(saida), processos=1, intervalo=0.01, estabilizar=0, formato="csv", uma_vez=True)
+
+
+def test_processa_grava_resultados_e_estado(tmp_path):
+    entrada, saida = tmp_path / "entrada", tmp_path / "saida"
+    entrada.mkdir()
+    rima = entrada / "rima.csv"
+    rima.write_text(RIMA_CSV, encoding="utf-8")
+
+    processados = _vigiar_uma_vez([str(entrada)], saida)
+
+    assert list(processados) == [str(rima)]
+    pasta = saida / pasta_resultados(str(rima))
+    assert {"violacoes.csv", "resumo.json", "pico_faixa_horaria_todas.csv"} <= set(os.listdir(pasta))
+    with open(saida / ARQUIVO_ESTADO, encoding="utf-8") as arquivo:
+        assert json.load(arquivo) == processados
+
+    resumos = ler_resumos(str(saida))
+    assert resumos["Pasta"].tolist() == [pasta.name]
+    assert resumos["Tipo"].tolist() == ["RIMA"] and resumos["Violações"].tolist() == [1]
+    assert len(ler_resultados(str(saida), pasta.name)["violacoes"]) == 1
+
+
+def test_reinicio_nao_reprocessa_arquivo_inalterado(tmp_path):
+    entrada, saida = tmp_path / "entrada", tmp_path / "saida"
+    entrada.mkdir()
+    rima = entrada / "rima.csv"
+    rima.write_text(RIMA_CSV, encoding="utf-8")
+    _vigiar_uma_vez([str(entrada)], saida)
+    resumo = saida / pasta_resultados(str(rima)) / "resumo.json"
+    gravado_em = resumo.stat().st_mtime_ns
+
+    # Novo processo do vigia: o estado gravado evita a segunda validação
+    _vigiar_uma_vez([str(entrada)], saida)
+    assert resumo.stat().st_mtime_ns == gravado_em
+
+    # Arquivo alterado: processado de novo
+    rima.write_text(RIMA_CSV + "03/03/2024;08:00:00;03/03/2024;07:55:00;03/03/2024;D;AZU;PRABC;4002;90;0\n", encoding="utf-8")
+    _vigiar_uma_vez([str(entrada)], saida)
+    assert resumo.stat().st_mtime_ns != gravado_em
+    with open(resumo, encoding="utf-8") as arquivo:
+        assert json.load(arquivo)["Linhas"] == 3
+
+
+def test_resultados_dentro_da_pasta_vigiada_nao_sao_entradas(tmp_path):
+    # Saída dentro da entrada e um padrão que alcança os CSV gravados pelo vigia
+    entrada = tmp_path / "entrada"
+    entrada.mkdir()
+    saida = entrada / "resultados"
+    rima = entrada / "rima.csv"
+    rima.write_text(RIMA_CSV, encoding="utf-8")
+
+    _vigiar_uma_vez([str(entrada)], saida)
+    processados = _vigiar_uma_vez([str(entrada), str(saida / "*" / "*.csv")], saida)
+
+    assert list(processados) == [str(rima)]
+    assert ler_resumos(str(saida))["Pasta"].tolist() == [pasta_resultados(str(rima))]
+
+
+def test_agregado_vazio_em_csv_e_lido_como_tabela_vazia(tmp_path):
+    # Só pousos: os agregados de embarque da janela móvel ficam sem colunas
+    entrada, saida = tmp_path / "entrada", tmp_path / "saida"
+    entrada.mkdir()
+    rima = entrada / "rima.csv"
+    rima.write_text(RIMA_CSV, encoding="utf-8")
+    _vigiar_uma_vez([str(entrada)], saida)
+
+    tabelas = ler_resultados(str(saida), pasta_resultados(str(rima)))
+    assert tabelas["pico_janela_movel_embarque"].empty
+    assert not tabelas["pico_janela_movel_desembarque"].empty
@@ -0,0 +1,415 @@
+from dataclasses import dataclass, replace
+
+import numpy as np
+import pandas as pd
+
+from carregamento import concatenar_blocos, extrair_saida_associada, identificar_estrutura
+from giros import montar_giros
+from ocupacao_stands import conflitos_stands, intervalos_stands
+
+
+# ========================
+# 📐 Motor declarativo de validações
+# ========================
+# Cada regra é uma conjunção de sub-predicados nomeados. Um nome iniciado por
+# "~" indica negação. Os sub-predicados são calculados uma única vez por
+# avaliação e reaproveitados por todas as regras que os utilizam.
+# Regras com violacao=False apenas delimitam um universo (ex.: voos AVG
+# operados) e não entram na contagem de violações.
+
+DATA_INICIO_PAINEL1 = pd.Timestamp("2024-02-01")
+
+SV_PROIBIDA_COMERCIAL = ["D", "E", "K", "N", "T", "W"]
+
+# Categorias base proibidas para todos os voos AVG (ZZZ-)
+SV_PROIBIDAS_GERAL = ["A", "B", "C", "E", "F", "G", "H", "J", "L", "M", "N", "O", "P", "Q", "R", "S", "U", "V", "X", "Y", "Z"]
+# Proibidas para ZZZ-P (aviação geral)
+SV_PROIBIDAS_ZZZ_P = SV_PROIBIDAS_GERAL + ["W"]
+# Proibidas para ZZZ-[não P] (aviação militar)
+SV_PROIBIDAS_MILITAR = SV_PROIBIDAS_GERAL + ["D", "K", "T"]
+
+
+@dataclass(frozen=True)
+class Regra:
+    nome: str
+    titulo: str
+    predicados: tuple
+    violacao: bool = True
+
+
+def _texto(df, coluna):
+    return df[coluna].astype("string")
+
+
+def _iniciado_por(df, coluna, prefixo):
+    return _texto(df, coluna).str.startswith(prefixo).fillna(False).astype(bool)
+
+
+def _diferente(df, coluna_a, coluna_b):
+    # NaN de qualquer lado conta como diferente (mesmo comportamento do "!=")
+    return df[coluna_a].ne(df[coluna_b])
+
+
+def _menor_ou_igual(df, coluna_a, coluna_b):
+    return df[coluna_a].notna() & df[coluna_b].notna() & (df[coluna_a] <= df[coluna_b])
+
+
+def _matricula_divergente(df):
+    matricula = _texto(df, "Id.Vuelo").str.replace("ZZZ-", "", regex=False)
+    return matricula.ne(_texto(df, "Registro")).fillna(True).astype(bool)
+
+
+PREDICADOS = {
+    "ope": lambda df: df["Sit."].eq("OPE"),
+    "data_painel1": lambda df: df["Data"].notna() & (df["Data"] >= DATA_INICIO_PAINEL1),
+    "id_vuelo_preenchido": lambda df: df["Id.Vuelo"].notna(),
+    "zzz": lambda df: _iniciado_por(df, "Id.Vuelo", "ZZZ-"),
+    "zzz_p": lambda df: _iniciado_por(df, "Id.Vuelo", "ZZZ-P"),
+    "est_diferente_ibk": lambda df: df["Est."].notna() & df["Est."].ne("IBK"),
+    "est_diferente_air": lambda df: df["Est."].notna() & df["Est."].ne("AIR"),
+    "stand_hold": lambda df: _texto(df, "Stand").str.upper().eq("HOLD").fillna(False).astype(bool),
+    "sv_proibida_comercial": lambda df: df["Sv."].isin(SV_PROIBIDA_COMERCIAL),
+    "sv_proibida_zzz_p": lambda df: df["Sv."].isin(SV_PROIBIDAS_ZZZ_P),
+    "sv_proibida_militar": lambda df: df["Sv."].isin(SV_PROIBIDAS_MILITAR),
+    "f_etime_preenchido": lambda df: df["F.ETime"].notna(),
+    "etime_diferente_aibt": lambda df: _diferente(df, "ETime", "AIBT"),
+    "etime_diferente_aobt": lambda df: _diferente(df, "ETime", "AOBT"),
+    "aibt_menor_igual_aldt": lambda df: _menor_ou_igual(df, "AIBT", "ALDT"),
+    "atot_menor_igual_aobt": lambda df: _menor_ou_igual(df, "ATOT", "AOBT"),
+    "matricula_divergente": _matricula_divergente,
+    "associado_divergente": lambda df: _diferente(df, "Id.Vuelo", "Id.Asociado"),
+    "movimento_chegada": lambda df: df["Movimento"].eq("chegada"),
+    "movimento_saida": lambda df: df["Movimento"].eq("saida"),
+}
+
+
+# ========================
+# 📋 Regras por tipo de movimento
+# ========================
+REGRAS_AVG = (
+    Regra("voos_avg_ope", "Voos AVG (ZZZ-) com Situação OPE", ("ope", "zzz"), violacao=False),
+    Regra("matricula_divergente", "Matrícula divergente do Registro", ("ope", "zzz", "matricula_divergente")),
+    Regra("zzz_p_sv_proibida", "Categorias proibidas em voos AVG (ZZZ-P)", ("ope", "zzz", "zzz_p", "sv_proibida_zzz_p")),
+    Regra("zzz_militar_sv_proibida", "Categorias proibidas em voos AVG (ZZZ- militar)", ("ope", "zzz", "~zzz_p", "sv_proibida_militar")),
+    Regra("associado_divergente", "Operações divergentes de associados", ("ope", "zzz", "associado_divergente")),
+)
+
+REGRAS_CHEGADA = (
+    Regra("etime_diferente_aibt", "Divergência entre ETime e AIBT", ("ope", "data_painel1", "etime_diferente_aibt")),
+    Regra("est_divergente", "Voos Operados (OPE) mas com Estação divergente de IBK", ("ope", "est_diferente_ibk")),
+    Regra("stand_hold", "Stand em HOLD", ("ope", "stand_hold")),
+    Regra("sv_proibida_comercial", "Categoria proibida em voos comerciais", ("ope", "id_vuelo_preenchido", "~zzz", "sv_proibida_comercial")),
+    Regra("calco_menor_igual_pouso", "Calço ≤ Pouso", ("f_etime_preenchido", "aibt_menor_igual_aldt")),
+) + REGRAS_AVG
+
+REGRAS_SAIDA = (
+    Regra("etime_diferente_aobt", "Divergência entre ETime e AOBT", ("ope", "data_painel1", "etime_diferente_aobt")),
+    Regra("est_divergente", "Voos Operados (OPE) mas com Estação divergente de AIR", ("ope", "est_diferente_air")),
+    Regra("stand_hold", "Stand = HOLD", ("ope", "stand_hold")),
+    Regra("sv_proibida_comercial", "Categoria proibida em voos comerciais", ("ope", "id_vuelo_preenchido", "~zzz", "sv_proibida_comercial")),
+    Regra("decolagem_menor_igual_saida_patio", "Decolagem ≤ Saída Pátio", ("ope", "atot_menor_igual_aobt")),
+) + REGRAS_AVG
+
+
+REGRAS_MOVIMENTO = {"chegada": REGRAS_CHEGADA, "saida": REGRAS_SAIDA}
+MOVIMENTO_ANALISE = {"Chegada": "chegada", "Saída (Associados)": "saida", "Saída": "saida"}
+
+
+def regras_do_movimento(movimento):
+    # Regras do movimento restritas às suas linhas no quadro empilhado: "chegada/stand_hold"...
+    return tuple(
+        replace(regra, nome=f"{movimento}/{regra.nome}", predicados=(f"movimento_{movimento}",) + regra.predicados)
+        for regra in REGRAS_MOVIMENTO[movimento]
+    )
+
+
+# ========================
+# ⚙️ Avaliação em passada única
+# ========================
+def avaliar_regras(df, regras):
+    calculados = {}
+
+    def predicado(nome):
+        if nome not in calculados:
+            calculados[nome] = np.asarray(PREDICADOS[nome](df), dtype=bool)
+        return calculados[nome]
+
+    matriz = np.ones((len(df), len(regras)), dtype=bool)
+    for j, regra in enumerate(regras):
+        for nome in regra.predicados:
+            if nome.startswith("~"):
+                matriz[:, j] &= ~predicado(nome[1:])
+            else:
+                matriz[:, j] &= predicado(nome)
+
+    return pd.DataFrame(matriz, index=df.index, columns=[regra.nome for regra in regras])
+
+
+def linhas_violadas(df, violacoes, *nomes_regras):
+    # Linhas que violam pelo menos uma das regras informadas
+    mascara = violacoes[list(nomes_regras)].any(axis=1)
+    return df.loc[mascara.to_numpy()]
+
+
+def resumo_violacoes(violacoes, regras):
+    regras = [regra for regra in regras if regra.violacao]
+    return pd.DataFrame({
+        "Regra": [regra.nome for regra in regras],
+        "Descrição": [regra.titulo for regra in regras],
+        "Ocorrências": violacoes[[regra.nome for regra in regras]].sum(axis=0).to_numpy(),
+    })
+
+
+# ========================
+# 🧾 API sem interface: violações em formato longo
+# ========================
+COLUNAS_VIOLACOES = ["Análise", "Regra", "Descrição", "Linha", "Data", "Identificação"]
+
+
+def analises_scena(df_completo):
+    # Mesma detecção de estrutura usada pela página
+    tem_chegada, tem_saida_associada, tem_saida_simples = identificar_estrutura(df_completo.columns)
+    analises = []
+    if tem_chegada:
+        analises.append(("Chegada", df_completo, REGRAS_CHEGADA))
+    if tem_saida_associada:
+        analises.append(("Saída (Associados)", extrair_saida_associada(df_completo), REGRAS_SAIDA))
+    if tem_saida_simples:
+        analises.append(("Saída", df_completo, REGRAS_SAIDA))
+    return analises
+
+
+# ========================
+# 🔄 Chegadas e saídas empilhadas: uma única avaliação para as duas metades
+# ========================
+# Os sub-predicados comuns (OPE, ZZZ-, Stand, Sv....) são calculados uma vez
+# sobre todas as linhas; cada regra só vale nas linhas do seu movimento.
+@dataclass
+class MovimentosScena:
+    df: pd.DataFrame
+    regras: tuple
+    # {análise: colunas da análise antes do empilhamento}
+    analises: dict
+
+
+def movimentos_scena(df_completo):
+    partes, regras, analises = [], (), {}
+    for analise, df, _ in analises_scena(df_completo):
+        movimento = MOVIMENTO_ANALISE[analise]
+        colunas = [col for col in df.columns if not str(col).startswith("Assoc.")]
+        rotulos = {
+            "Análise": pd.Categorical.from_codes(np.zeros(len(df), dtype=int), [analise]),
+            "Movimento": pd.Categorical.from_codes(np.zeros(len(df), dtype=int), [movimento]),
+        }
+        partes.append(df[colunas].assign(**rotulos))
+        regras += regras_do_movimento(movimento)
+        analises[analise] = colunas
+
+    if not partes:
+        return MovimentosScena(pd.DataFrame(), (), {})
+    empilhado = concatenar_blocos(partes)
+    # O índice continua sendo a linha da planilha nas duas metades
+    empilhado.index = np.concatenate([parte.index.to_numpy() for parte in partes])
+    return MovimentosScena(empilhado, regras, analises)
+
+
+def separar_analises(movimentos, violacoes):
+    # [(análise, df, violações, regras)] com os nomes de regra sem o prefixo do movimento
+    analise_linha = movimentos.df["Análise"].to_numpy()
+    separadas = []
+    for analise, colunas in movimentos.analises.items():
+        posicoes = np.flatnonzero(analise_linha == analise)
+        prefixo = f"{MOVIMENTO_ANALISE[analise]}/"
+        violacoes_analise = violacoes.iloc[posicoes][[col for col in violacoes.columns if col.startswith(prefixo)]]
+        separadas.append((
+            analise,
+            movimentos.df.iloc[posicoes][colunas],
+            violacoes_analise.rename(columns=lambda col: col[len(prefixo):]),
+            REGRAS_MOVIMENTO[MOVIMENTO_ANALISE[analise]],
+        ))
+    return separadas
+
+
+def tabela_violacoes(df, violacoes, regras, analise):
+    regras = [regra for regra in regras if regra.violacao]
+    matriz = violacoes[[regra.nome for regra in regras]].to_numpy()
+    linhas, colunas = np.nonzero(matriz)
+
+    return pd.DataFrame({
+        "Análise": analise,
+        "Regra": np.array([regra.nome for regra in regras], dtype=object)[colunas],
+        "Descrição": np.array([regra.titulo for regra in regras], dtype=object)[colunas],
+        # Linha da planilha Excel (cabeçalho na linha 1)
+        "Linha": df.index.to_numpy()[linhas] + 2,
+        "Data": df["Data"].to_numpy()[linhas] if "Data" in df.columns else pd.NaT,
+        "Identificação": df["Id.Vuelo"].to_numpy()[linhas],
+    }, columns=COLUNAS_VIOLACOES)
+
+
+def validar_scena(df_completo):
+    movimentos = movimentos_scena(df_completo)
+    if not movimentos.analises:
+        raise ValueError("nenhuma estrutura de chegada ou saída reconhecida")
+
+    violacoes = avaliar_regras(movimentos.df, movimentos.regras)
+    tabelas = [
+        tabela_violacoes(df, violacoes_analise, regras, analise)
+        for analise, df, violacoes_analise, regras in separar_analises(movimentos, violacoes)
+    ]
+    tabelas.append(violacoes_ocupacao(conflitos_stands(intervalos_stands(montar_giros(df_completo)))))
+    return pd.concat(tabelas, ignore_index=True)
+
+
+def violacoes_ocupacao(conflitos):
+    # Conflitos de stand no mesmo formato longo; a linha é a da ocupação que chegou depois
+    return pd.DataFrame({
+        "Análise": "Ocupação de Stands",
+        "Regra": "conflito_stand",
+        "Descrição": "Stand ocupado por outra aeronave no mesmo horário",
+        # Linha da planilha Excel (cabeçalho na linha 1)
+        "Linha": conflitos.index.to_numpy() + 2,
+        "Data": conflitos["Data"].to_numpy(),
+        "Identificação": conflitos["Voo"].to_numpy(),
+    }, columns=COLUNAS_VIOLACOES)
+
+
+# ========================
+# 🔁 Revalidação incremental: só linhas inseridas ou alteradas
+# ========================
+# Todos os predicados dependem apenas da própria linha; por isso o resultado
+# de uma linha idêntica à do upload anterior pode ser reaproveitado.
+CHAVES_REVALIDACAO = ["Id.Vuelo", "Data"]
+
+
+@dataclass
+class Snapshot:
+    identidades: np.ndarray
+    hashes: np.ndarray
+    violacoes: np.ndarray
+    regras: tuple
+
+
+def hash_linhas(df, colunas=None):
+    # Um hash por linha sobre as colunas carregadas (já restritas às usadas)
+    colunas = list(df.columns) if colunas is None else [coluna for coluna in colunas if coluna in df.columns]
+    return pd.util.hash_pandas_object(df[colunas], index=False).to_numpy()
+
+
+def _casar(atual, anterior):
+    # Posição de cada valor de `atual` em `anterior` (-1 = ausente)
+    indice = pd.Index(anterior)
+    if indice.is_unique and pd.Index(atual).is_unique:
+        return indice.get_indexer(atual)
+    # Valores repetidos casam pela ordem de ocorrência (1º com 1º, 2º com 2º...)
+    ocorrencia = lambda valores: pd.Series(valores).groupby(valores, sort=False).cumcount().to_numpy()
+    return pd.MultiIndex.from_arrays([anterior, ocorrencia(anterior)]).get_indexer(
+        pd.MultiIndex.from_arrays([atual, ocorrencia(atual)])
+    )
+
+
+def revalidar(df, regras, anterior=None):
+    nomes = tuple(regra.nome for regra in regras)
+    hashes = hash_linhas(df)
+
+    if anterior is None or anterior.regras != nomes:
+        matriz = avaliar_regras(df, regras).to_numpy()
+        snapshot = Snapshot(hash_linhas(df, CHAVES_REVALIDACAO), hashes, matriz, nomes)
+        return pd.DataFrame(matriz, index=df.index, columns=list(nomes)), snapshot, None, None
+
+    # 1º: linhas idênticas (mesmo hash); 2º: mesma identidade de voo com conteúdo alterado
+    posicao = _casar(hashes, anterior.hashes)
+    inalteradas = posicao >= 0
+    restantes = np.flatnonzero(~inalteradas)
+
+    # Linha idêntica tem a mesma identidade: só as restantes precisam de hash da chave
+    identidades = np.empty(len(df), dtype=anterior.identidades.dtype)
+    identidades[inalteradas] = anterior.identidades[posicao[inalteradas]]
+    identidades[restantes] = hash_linhas(df.iloc[restantes], CHAVES_REVALIDACAO)
+
+    usadas = np.zeros(len(anterior.hashes), dtype=bool)
+    usadas[posicao[inalteradas]] = True
+    livres = np.flatnonzero(~usadas)
+    casadas = _casar(identidades[restantes], anterior.identidades[livres])
+    posicao[restantes] = np.where(casadas >= 0, livres[casadas], -1)
+    casou = posicao >= 0
+
+    antes = np.zeros((len(df), len(nomes)), dtype=bool)
+    antes[casou] = anterior.violacoes[posicao[casou]]
+
+    matriz = antes.copy()
+    if len(restantes):
+        matriz[restantes] = avaliar_regras(df.iloc[restantes], regras).to_numpy()
+
+    novas = pd.DataFrame(matriz & ~antes, index=df.index, columns=list(nomes))
+    corrigidas = pd.DataFrame(antes & ~matriz, index=df.index, columns=list(nomes))
+    mudancas = pd.concat([
+        tabela_violacoes(df, novas, regras, "Nova"),
+        tabela_violacoes(df, corrigidas, regras, "Corrigida"),
+    ], ignore_index=True).rename(columns={"Análise": "Situação"})
+
+    resumo = {
+        "inseridas": int((~casou).sum()),
+        "alteradas": int((casou & ~inalteradas).sum()),
+        "inalteradas": int(inalteradas.sum()),
+        "removidas": len(anterior.hashes) - int(casou.sum()),
+        "novas": int((mudancas["Situação"] == "Nova").sum()),
+        "corrigidas": int((mudancas["Situação"] == "Corrigida").sum()),
+    }
+    snapshot = Snapshot(identidades, hashes, matriz, nomes)
+    return pd.DataFrame(matriz, index=df.index, columns=list(nomes)), snapshot, mudancas, resumo
+
+
+# ========================
+# 📋 RIMA – Divergência entre Calço e Toque
+# ========================
+COLUNAS_EXIBIR_RIMA = [
+    "Data", "Movimento", "Matrícula", "Operador", "Nº Voo",
+    "Calço Aeronave", "Pouso ou Decolagem"
+]
+
+
+def divergencias_rima(df):
+    # Datas já normalizadas por carregar_rima
+    calco_data = df["CALCO_DATA"]
+    toque_data = df["TOQUE_DATA"]
+
+    # Filtrar divergência
+    mascara = calco_data.notna() & toque_data.notna() & (calco_data != toque_data)
+    origem = df.loc[mascara]
+
+    divergentes = pd.DataFrame(index=origem.index)
+
+    # Criar coluna Movimento
+    divergentes["Movimento"] = origem["MOVIMENTO_TIPO"].astype(object).map({"P": "Pouso", "D": "Decolagem"})
+
+    # Colunas auxiliares formatadas
+    divergentes["Data"] = origem["PREVISTO_DATA"].dt.strftime("%d/%m/%Y")
+    divergentes["Matrícula"] = origem["AERONAVE_MARCAS"]
+    divergentes["Operador"] = origem["AERONAVE_OPERADOR"].astype(object)
+
+    divergentes["Nº Voo"] = origem["VOO_NUMERO"].astype(str).str.replace(",", "").str.strip()
+
+    divergentes["Calço Aeronave"] = (
+        "Calço " + calco_data[mascara].dt.strftime("%d/%m/%Y") +
+        " – " + origem["CALCO_HORARIO"].astype(str).str.strip().str[:5]
+    )
+
+    divergentes["Pouso ou Decolagem"] = (
+        divergentes["Movimento"] + " " +
+        toque_data[mascara].dt.strftime("%d/%m/%Y") +
+        " – " + origem["TOQUE_HORARIO"].astype(str).str.strip().str[:5]
+    )
+
+    return divergentes[COLUNAS_EXIBIR_RIMA]
+
+
+def validar_rima(df):
+    divergentes = divergencias_rima(df)
+    return pd.DataFrame({
+        "Análise": "RIMA",
+        "Regra": "calco_diferente_toque",
+        "Descrição": "Divergência Calço ≠ Toque",
+        "Linha": divergentes.index.to_numpy() + 2,
+        "Data": df.loc[divergentes.index, "PREVISTO_DATA"].to_numpy(),
+        "Identificação": (divergentes["Matrícula"].astype(str) + " " + divergentes["Nº Voo"]).to_numpy(),
+    }, columns=COLUNAS_VIOLACOES)
@@ -0,0 +1,119 @@
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from carregamento import ativar_copy_on_write, carregar_rima, carregar_voos, tipo_arquivo
+from validacoes import COLUNAS_VIOLACOES, validar_rima, validar_scena
+
+
+# ========================
+# 🗂️ Validação em lote de exportações SCENA/RIMA (sem Streamlit)
+# ========================
+EXTENSOES = (".xlsx", ".xls", ".csv")
+
+
+def listar_arquivos(entradas):
+    arquivos = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            candidatos = [os.path.join(entrada, nome) for nome in os.listdir(entrada)]
+        else:
+            candidatos = glob.glob(entrada)
+        arquivos.extend(
+            caminho for caminho in candidatos
+            if os.path.isfile(caminho)
+            and caminho.lower().endswith(EXTENSOES)
+            and not os.path.basename(caminho).startswith("~$")
+        )
+    return sorted(set(arquivos))
+
+
+def carregar_e_validar(caminho):
+    # (DataFrame carregado ou None, violações, resumo): usado também pelo vigia de pasta
+    inicio = time.perf_counter()
+    resumo = {"Arquivo": caminho, "Tipo": None, "Linhas": 0, "Violações": 0, "Datas inválidas": 0, "Motor": None, "Tempo (s)": 0.0, "Erro": None}
+    violacoes = pd.DataFrame(columns=COLUNAS_VIOLACOES)
+    df = None
+
+    try:
+        resumo["Tipo"] = tipo_arquivo(caminho)
+        if resumo["Tipo"] == "SCENA":
+            _, df_completo = carregar_voos(caminho)
+            resumo["Linhas"] = len(df_completo)
+            resumo["Datas inválidas"] = sum(df_completo.attrs["relatorio_carga"]["datas_invalidas"].values())
+            resumo["Motor"] = df_completo.attrs["relatorio_carga"]["motor"]
+            violacoes = validar_scena(df_completo)
+            df = df_completo
+        else:
+            _, df_rima = carregar_rima(caminho)
+            resumo["Linhas"] = len(df_rima)
+            resumo["Datas inválidas"] = sum(df_rima.attrs["relatorio_carga"]["datas_invalidas"].values())
+            resumo["Motor"] = df_rima.attrs["relatorio_carga"]["motor"]
+            violacoes = validar_rima(df_rima)
+            df = df_rima
+    except Exception as e:
+        resumo["Erro"] = f"{type(e).__name__}: {e}"
+
+    violacoes.insert(0, "Arquivo", caminho)
+    violacoes.insert(1, "Tipo", resumo["Tipo"])
+    resumo["Violações"] = len(violacoes)
+    resumo["Tempo (s)"] = round(time.perf_counter() - inicio, 3)
+    return df, violacoes, resumo
+
+
+def validar_arquivo(caminho):
+    _, violacoes, resumo = carregar_e_validar(caminho)
+    return violacoes, resumo
+
+
+def validar_lote(arquivos, processos=None):
+    tabelas, resumos = [], []
+    with ProcessPoolExecutor(max_workers=processos, initializer=ativar_copy_on_write) as executor:
+        futuros = {executor.submit(validar_arquivo, caminho): caminho for caminho in arquivos}
+        for futuro in as_completed(futuros):
+            violacoes, resumo = futuro.result()
+            tabelas.append(violacoes)
+            resumos.append(resumo)
+            situacao = resumo["Erro"] or f"{resumo['Violações']} violações"
+            print(f"[{len(resumos)}/{len(arquivos)}] {resumo['Arquivo']}: {situacao} ({resumo['Tempo (s)']} s)", file=sys.stderr)
+
+    violacoes = pd.concat(tabelas, ignore_index=True) if tabelas else pd.DataFrame(columns=["Arquivo", "Tipo"] + COLUNAS_VIOLACOES)
+    resumo = pd.DataFrame(resumos).sort_values("Arquivo").reset_index(drop=True)
+    return violacoes.sort_values(["Arquivo", "Análise", "Regra", "Linha"], kind="stable").reset_index(drop=True), resumo
+
+
+def gravar_tabela(df, caminho):
+    if caminho.lower().endswith(".parquet"):
+        df.to_parquet(caminho, index=False)
+    else:
+        df.to_csv(caminho, index=False, sep=";", encoding="utf-8")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Valida em lote exportações SCENA/RIMA (SBJU).")
+    parser.add_argument("entradas", nargs="+", help="Diretórios ou padrões glob com planilhas SCENA/RIMA (CSV só RIMA)")
+    parser.add_argument("-o", "--saida", default="violacoes.csv", help="Arquivo consolidado de violações (.csv ou .parquet)")
+    parser.add_argument("-r", "--resumo", default="resumo_arquivos.csv", help="Resumo por arquivo (.csv ou .parquet)")
+    parser.add_argument("-p", "--processos", type=int, default=None, help="Número de processos (padrão: núcleos da CPU)")
+    args = parser.parse_args(argv)
+    ativar_copy_on_write()
+
+    arquivos = listar_arquivos(args.entradas)
+    if not arquivos:
+        parser.error("nenhuma planilha .xlsx/.xls/.csv encontrada nas entradas informadas")
+
+    violacoes, resumo = validar_lote(arquivos, args.processos)
+    gravar_tabela(violacoes, args.saida)
+    gravar_tabela(resumo, args.resumo)
+
+    print(f"{len(arquivos)} arquivos, {len(violacoes)} violações -> {args.saida} / {args.resumo}", file=sys.stderr)
+    return 1 if resumo["Erro"].notna().any() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
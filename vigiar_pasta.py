@@ -0,0 +1,210 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from carregamento import ativar_copy_on_write
+from horario_pico import (
+    COLUNAS_PICO, FILTROS_MOVIMENTO, estatisticas_hora_projeto, fatiar_cubo, montar_cubo, montar_eventos,
+    picos_janela_movel
+)
+from validar_lote import carregar_e_validar, listar_arquivos
+
+
+# ========================
+# 👀 Vigia de pasta: valida exportações SCENA/RIMA assim que chegam (sem Streamlit)
+# ========================
+ARQUIVO_ESTADO = "estado_vigia.json"
+
+
+def assinatura(caminho):
+    estado = os.stat(caminho)
+    return [estado.st_size, estado.st_mtime_ns]
+
+
+def _gravar_atomico(caminho, gravar):
+    # Grava num temporário e troca de nome: quem lê nunca vê um arquivo pela metade
+    temporario = f"{caminho}.tmp"
+    gravar(temporario)
+    os.replace(temporario, caminho)
+
+
+def gravar_tabela(df, caminho):
+    if caminho.endswith(".parquet"):
+        _gravar_atomico(caminho, lambda destino: df.to_parquet(destino, index=False))
+    else:
+        _gravar_atomico(caminho, lambda destino: df.to_csv(destino, index=False, sep=";", encoding="utf-8"))
+
+
+def agregados_pico(df_rima):
+    # {nome: tabela} com os mesmos cálculos dos modos de horário de pico da página
+    agregados = {}
+    if all(col in df_rima.columns for col in COLUNAS_PICO):
+        cubo = montar_cubo(df_rima)
+        for filtro in FILTROS_MOVIMENTO:
+            agregados[f"pico_faixa_horaria_{filtro.lower()}"] = fatiar_cubo(cubo, filtro)
+    if all(col in df_rima.columns for col in COLUNAS_PICO + ["CALCO_DATA"]):
+        eventos = montar_eventos(df_rima)
+        for filtro in FILTROS_MOVIMENTO:
+            agregados[f"pico_janela_movel_{filtro.lower()}"], _ = picos_janela_movel(eventos, filtro)
+            agregados[f"hora_projeto_{filtro.lower()}"] = estatisticas_hora_projeto(eventos, filtro)
+    return agregados
+
+
+def pasta_resultados(caminho):
+    # Nome + extensão + hash do caminho completo: a/voos.xlsx, b/voos.xlsx e
+    # voos.csv não gravam um por cima do outro
+    raiz, extensao = os.path.splitext(os.path.basename(caminho))
+    sufixo = hashlib.sha1(os.path.abspath(caminho).encode("utf-8")).hexdigest()[:8]
+    return f"{raiz}_{extensao.lstrip('.').lower()}_{sufixo}"
+
+
+def processar_arquivo(caminho, diretorio_saida, formato):
+    # Uma pasta de resultados por arquivo de entrada; o resumo é gravado por último
+    df, violacoes, resumo = carregar_e_validar(caminho)
+    resumo["Pasta"] = pasta_resultados(caminho)
+    destino = os.path.join(diretorio_saida, resumo["Pasta"])
+    os.makedirs(destino, exist_ok=True)
+
+    gravar_tabela(violacoes, os.path.join(destino, f"violacoes.{formato}"))
+    if df is not None and resumo["Tipo"] == "RIMA":
+        try:
+            for nome, tabela in agregados_pico(df).items():
+                gravar_tabela(tabela, os.path.join(destino, f"{nome}.{formato}"))
+        except Exception as e:
+            resumo["Erro"] = f"horário de pico – {type(e).__name__}: {e}"
+
+    resumo["Processado em"] = pd.Timestamp.now().isoformat(timespec="seconds")
+    _gravar_atomico(
+        os.path.join(destino, "resumo.json"),
+        lambda temporario: _gravar_json(resumo, temporario)
+    )
+    return resumo
+
+
+def _gravar_json(dados, caminho):
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump(dados, arquivo, ensure_ascii=False, indent=2)
+
+
+def carregar_estado(diretorio_saida):
+    caminho = os.path.join(diretorio_saida, ARQUIVO_ESTADO)
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def vigiar(entradas, diretorio_saida, processos=2, intervalo=5.0, estabilizar=10.0, formato="parquet", uma_vez=False):
+    os.makedirs(diretorio_saida, exist_ok=True)
+    # {caminho: assinatura já processada}: sobrevive a reinícios do vigia
+    processados = carregar_estado(diretorio_saida)
+    # {caminho: (assinatura, desde quando está igual)}: debounce de arquivos ainda sendo copiados
+    observados = {}
+    em_andamento = {}
+    saida_absoluta = os.path.abspath(diretorio_saida) + os.sep
+
+    with ProcessPoolExecutor(max_workers=processos, initializer=ativar_copy_on_write) as executor:
+        try:
+            while True:
+                agora = time.monotonic()
+                listados = listar_arquivos(entradas)
+                # Arquivos removidos ou movidos antes de estabilizar deixam de ser observados
+                for caminho in set(observados) - set(listados):
+                    del observados[caminho]
+                for caminho in listados:
+                    if os.path.abspath(caminho).startswith(saida_absoluta):
+                        # Resultados gravados dentro de uma pasta vigiada não são entradas
+                        continue
+                    try:
+                        atual = assinatura(caminho)
+                    except FileNotFoundError:
+                        observados.pop(caminho, None)
+                        continue
+                    if processados.get(caminho) == atual or caminho in em_andamento:
+                        continue
+                    anterior = observados.get(caminho)
+                    if anterior is None or anterior[0] != atual:
+                        observados[caminho] = (atual, agora)
+                    elif agora - anterior[1] >= estabilizar and len(em_andamento) < processos:
+                        # Fila limitada ao tamanho do pool: o resto espera a próxima varredura
+                        del observados[caminho]
+                        em_andamento[caminho] = (atual, executor.submit(processar_arquivo, caminho, diretorio_saida, formato))
+                        print(f"Processando {caminho}...", file=sys.stderr)
+
+                for caminho, (atual, futuro) in list(em_andamento.items()):
+                    if not futuro.done():
+                        continue
+                    del em_andamento[caminho]
+                    try:
+                        resumo = futuro.result()
+                        situacao = resumo["Erro"] or f"{resumo['Violações']} violações"
+                    except Exception as e:
+                        situacao = f"{type(e).__name__}: {e}"
+                    # Mesmo com erro: só é reprocessado se o arquivo mudar
+                    processados[caminho] = atual
+                    _gravar_atomico(
+                        os.path.join(diretorio_saida, ARQUIVO_ESTADO),
+                        lambda temporario: _gravar_json(processados, temporario)
+                    )
+                    print(f"{caminho}: {situacao}", file=sys.stderr)
+
+                if uma_vez and not observados and not em_andamento:
+                    return processados
+                time.sleep(intervalo)
+        except KeyboardInterrupt:
+            executor.shutdown(wait=True, cancel_futures=True)
+            return processados
+
+
+def ler_resumos(diretorio_saida):
+    # Resumo de todos os arquivos já processados (para quem só lê os resultados)
+    resumos = []
+    if os.path.isdir(diretorio_saida):
+        for nome in sorted(os.listdir(diretorio_saida)):
+            caminho = os.path.join(diretorio_saida, nome, "resumo.json")
+            if os.path.exists(caminho):
+                with open(caminho, encoding="utf-8") as arquivo:
+                    resumos.append({**json.load(arquivo), "Pasta": nome})
+    return pd.DataFrame(resumos)
+
+
+def ler_resultados(diretorio_saida, pasta):
+    # {nome: tabela} gravados para um arquivo (violações e agregados de pico)
+    destino = os.path.join(diretorio_saida, pasta)
+    tabelas = {}
+    for nome in sorted(os.listdir(destino)):
+        raiz, extensao = os.path.splitext(nome)
+        if extensao == ".parquet":
+            tabelas[raiz] = pd.read_parquet(os.path.join(destino, nome))
+        elif extensao == ".csv":
+            try:
+                tabelas[raiz] = pd.read_csv(os.path.join(destino, nome), sep=";", encoding="utf-8")
+            except pd.errors.EmptyDataError:
+                # Agregado sem colunas (ex.: filtro sem movimentos) vira CSV vazio
+                tabelas[raiz] = pd.DataFrame()
+    return tabelas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vigia pastas e valida cada exportação SCENA/RIMA nova ou alterada.")
+    parser.add_argument("entradas", nargs="+", help="Diretórios ou padrões glob vigiados")
+    parser.add_argument("-o", "--saida", default="resultados_sbju", help="Diretório dos resultados pré-calculados")
+    parser.add_argument("-p", "--processos", type=int, default=2, help="Arquivos processados em paralelo")
+    parser.add_argument("-i", "--intervalo", type=float, default=5.0, help="Segundos entre varreduras")
+    parser.add_argument("-e", "--estabilizar", type=float, default=10.0, help="Segundos sem mudança de tamanho/data antes de ler o arquivo")
+    parser.add_argument("-f", "--formato", choices=["parquet", "csv"], default="parquet")
+    parser.add_argument("--uma-vez", action="store_true", help="Processa o que houver e encerra")
+    args = parser.parse_args(argv)
+
+    vigiar(args.entradas, args.saida, args.processos, args.intervalo, args.estabilizar, args.formato, args.uma_vez)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())